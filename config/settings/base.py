@@ -31,6 +31,11 @@ DATABASES = {
     )
 }
 
+# Cache: set CACHE_URL (e.g. redis://...) in production so all gunicorn workers share it
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # --- REBUILDING THE APP ---
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -111,6 +116,35 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Operational plan table: 'offset' (page numbers) or 'cursor' (keyset pagination for large plans)
+PLAN_LIST_PAGINATION = env('PLAN_LIST_PAGINATION', default='offset')
+# Rows fetched (and flushed to the client) per chunk when streaming per_page=all
+PLAN_STREAM_CHUNK_SIZE = env.int('PLAN_STREAM_CHUNK_SIZE', default=200)
+# Rendered table rows are cached in this CACHES alias (keys change whenever a row changes)
+PLAN_ROW_CACHE = env('PLAN_ROW_CACHE', default='default')
+PLAN_ROW_CACHE_TIMEOUT = env.int('PLAN_ROW_CACHE_TIMEOUT', default=60 * 60 * 24)
+# Field encryption keys (Fernet keys or passphrases), newest first: the first encrypts, all decrypt.
+# The key derived from SECRET_KEY is always tried last, so data written before keys were configured reads.
+FIELD_ENCRYPTION_KEYS = env.list('FIELD_ENCRYPTION_KEYS', default=[])
+# Cipher of newly written values: fernet, aes-gcm or chacha20-poly1305 (values of any of them read;
+# rotate_encryption_keys moves existing rows to the configured one)
+FIELD_ENCRYPTION_BACKEND = env('FIELD_ENCRYPTION_BACKEND', default='fernet')
+# HMAC key of the blind indexes of encrypted fields (derived from SECRET_KEY when empty)
+BLIND_INDEX_KEY = env('BLIND_INDEX_KEY', default='')
+# Chunked (resumable) evidence uploads: local staging directory, chunk and total size limits
+EVIDENCE_UPLOAD_STAGING_DIR = env('EVIDENCE_UPLOAD_STAGING_DIR', default=str(BASE_DIR / 'media' / 'upload_staging'))
+EVIDENCE_UPLOAD_CHUNK_SIZE = env.int('EVIDENCE_UPLOAD_CHUNK_SIZE', default=4 * 1024 * 1024)
+EVIDENCE_UPLOAD_MAX_SIZE = env.int('EVIDENCE_UPLOAD_MAX_SIZE', default=1024 * 1024 * 1024)
+# Photo evidence is downscaled, stripped of EXIF and re-encoded on upload (see image_optimization.py)
+EVIDENCE_IMAGE_OPTIMIZATION = env.bool('EVIDENCE_IMAGE_OPTIMIZATION', default=True)
+EVIDENCE_IMAGE_MAX_DIMENSION = env.int('EVIDENCE_IMAGE_MAX_DIMENSION', default=2048)
+EVIDENCE_IMAGE_QUALITY = env.int('EVIDENCE_IMAGE_QUALITY', default=82)
+EVIDENCE_IMAGE_KEEP_ORIGINAL = env.bool('EVIDENCE_IMAGE_KEEP_ORIGINAL', default=False)
+EVIDENCE_IMAGE_MAX_INPUT_SIZE = env.int('EVIDENCE_IMAGE_MAX_INPUT_SIZE', default=50 * 1024 * 1024)
+EVIDENCE_IMAGE_WORKERS = env.int('EVIDENCE_IMAGE_WORKERS', default=2)
+# Evidence previews are generated by a Celery worker when a broker is set, otherwise inline after the upload
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='')
+
 # Authentication URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
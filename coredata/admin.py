@@ -3,12 +3,14 @@ from django.contrib import admin
 from django.contrib.admin.models import LogEntry
 from django.contrib.auth.admin import UserAdmin, GroupAdmin
 from django.contrib.auth.models import User, Group
+from django.db.models import Count, Q
 from .models import (
     Staff, OperationalPlanItems, Committee,
     JobTitle, EvidenceFile,
     AcademicYear, StrategicGoal, OperationalGoal,
-    Student, EvidenceDocument, GroupExtension
+    Student, EvidenceDocument, GroupExtension, EvaluationAxis
 )
+from .rollups import rollup_total
 from import_export.admin import ImportExportModelAdmin
 from simple_history.admin import SimpleHistoryAdmin
 
@@ -54,6 +56,36 @@ class OperationalPlanItemsAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
     search_fields = ('code', 'procedure')
     autocomplete_fields = ['executor_committee', 'evaluator_committee']
 
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, 'context_data', {}).get('cl')
+        if cl is not None:
+            response.context_data['plan_stats'] = self.plan_stats(cl)
+        return response
+
+    def plan_stats(self, cl):
+        """
+        Stat cards of the changelist. With no filter but the academic year they come from the
+        rollup table; any other filter or a search counts the rows shown, so the cards match them.
+        """
+        params = set(cl.get_filters_params()) - {'academic_year__id__exact'}
+        if params or cl.query:
+            return cl.queryset.order_by().aggregate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(status='Completed')),
+                pending_review=Count('id', filter=Q(status='Pending Review')),
+                late=Count('id', filter=Q(follow_up='لم يتم الإنجاز')),
+            )
+        filters = {}
+        if cl.params.get('academic_year__id__exact'):
+            filters['academic_year_id'] = cl.params['academic_year__id__exact']
+        return {
+            'total': rollup_total(**filters),
+            'completed': rollup_total(status='Completed', **filters),
+            'pending_review': rollup_total(status='Pending Review', **filters),
+            'late': rollup_total(follow_up='لم يتم الإنجاز', **filters),
+        }
+
 @admin.register(JobTitle)
 class JobTitleAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
     list_display = ('code', 'title')
@@ -68,11 +100,11 @@ class EvidenceFileAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
 class StudentAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
     list_display = ('name_ar', 'grade', 'section', 'national_no')
     list_filter = ('grade', 'section')
-    search_fields = ('name_ar', 'national_no')
+    search_fields = ('name_ar', '=national_no')  # Exact match through the blind index
 
 @admin.register(EvidenceDocument)
 class EvidenceDocumentAdmin(admin.ModelAdmin):
-    list_display = ('title', 'evidence_type', 'user', 'academic_year')
+    list_display = ('title', 'evidence_type', 'user', 'academic_year', 'file_size', 'bytes_saved')
     list_filter = ('academic_year', 'evidence_type', 'user')
     search_fields = ('title', 'description', 'tags')
     autocomplete_fields = ['user', 'evidence_type']
@@ -94,4 +126,12 @@ class CommitteeAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
     search_fields = ('name', 'code')
     filter_horizontal = ('members',)
     list_filter = ('academic_year',)
-    autocomplete_fields = ['members']
\ No newline at end of file
+    autocomplete_fields = ['members']
+
+@admin.register(EvaluationAxis)
+class EvaluationAxisAdmin(admin.ModelAdmin):
+    list_display = ('name', 'group', 'ordinal')
+    list_filter = ('group',)
+    search_fields = ('name',)
+    filter_horizontal = ('evaluators',)
+
@@ -1,6 +1,9 @@
-
 from django.apps import AppConfig
 
 class CoredataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'coredata'
\ No newline at end of file
+    name = 'coredata'
+
+    def ready(self):
+        # Import signals so the cache invalidation hooks are connected
+        from . import signals  # noqa: F401
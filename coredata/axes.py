@@ -0,0 +1,44 @@
+from django.core.cache import cache
+
+# Group whose evaluation axes (rank_name values) and evaluators the plan modals show
+QUALITY_GROUP_NAME = 'لجنة الجودة والتخطيط'
+
+AXIS_EVALUATORS_KEY = 'plan:axis-evaluators'
+AXIS_EVALUATORS_TIMEOUT = 60 * 60 * 24
+
+
+def build_axis_evaluators():
+    """
+    {axis name (= plan item rank_name): [evaluator staff names]} for the quality committee,
+    read with one join over EvaluationAxis and its evaluators.
+    """
+    from .models import EvaluationAxis
+
+    rows = (
+        EvaluationAxis.objects.filter(group__name=QUALITY_GROUP_NAME)
+        .values_list('name', 'evaluators__staff_profile__name')
+    )
+    mapping = {}
+    for axis_name, staff_name in rows:
+        names = mapping.setdefault(axis_name, [])
+        if staff_name:  # Evaluators without a staff profile are not shown
+            names.append(staff_name)
+    return {axis: sorted(names) for axis, names in mapping.items()}
+
+
+def axis_evaluators():
+    """The cached axis -> evaluator names map (rebuilt after any change, see signals.py)."""
+    mapping = cache.get(AXIS_EVALUATORS_KEY)
+    if mapping is None:
+        mapping = build_axis_evaluators()
+        cache.set(AXIS_EVALUATORS_KEY, mapping, AXIS_EVALUATORS_TIMEOUT)
+    return mapping
+
+
+def evaluator_names(rank_name):
+    """Display string of the evaluators of an item's axis."""
+    return ", ".join(axis_evaluators().get(rank_name, [])) or "غير محدد"
+
+
+def invalidate_axis_evaluators():
+    cache.delete(AXIS_EVALUATORS_KEY)
@@ -0,0 +1,209 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.db.models.expressions import Col
+from django.db.models.lookups import Exact, In
+
+from .encryption import Ciphertext
+
+
+def _index_key():
+    # Separate from the Fernet key: knowing the blind indexes reveals nothing about it
+    key = settings.BLIND_INDEX_KEY or f'coredata.blind-index|{settings.SECRET_KEY}'
+    return hashlib.sha256(key.encode()).digest()
+
+
+def blind_index(value, context):
+    """
+    Keyed HMAC-SHA256 of a (stripped) plain value. `context` (the source field name) keeps equal
+    values in different fields from sharing an index. None/blank values have no index.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    return hmac.new(_index_key(), f'{context}:{value}'.encode(), hashlib.sha256).hexdigest()
+
+
+class BlindIndexField(models.CharField):
+    """
+    Companion column of an EncryptedCharField holding the blind index of its plain value.
+    Kept current on save; exact/in filters on the source field are answered from this column.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        for key, default in (('max_length', 64), ('null', True), ('blank', True), ('editable', False)):
+            if kwargs.get(key) == default:
+                del kwargs[key]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        if isinstance(model_instance.__dict__.get(self.source), Ciphertext):
+            # Source loaded and never read, so unchanged: keep the stored index, skip the decrypt
+            return getattr(model_instance, self.attname)
+        value = blind_index(getattr(model_instance, self.source), self.source)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class BlindIndexUniqueMixin:
+    """
+    Model mixin: validate_unique() also checks the unique blind indexes (editable=False, so Django
+    skips them), so forms and the admin report a duplicate encrypted value as a field error.
+    """
+
+    def validate_unique(self, exclude=None):
+        errors = {}
+        try:
+            super().validate_unique(exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        for field in self._meta.concrete_fields:
+            if not (isinstance(field, BlindIndexField) and field.unique):
+                continue
+            if (exclude and field.source in exclude) or field.source in errors:
+                continue
+            if isinstance(self.__dict__.get(field.source), Ciphertext):
+                continue  # Loaded and never changed: already unique
+            value = getattr(self, field.source)
+            if blind_index(value, field.source) is None:
+                continue
+            duplicates = type(self)._default_manager.filter(**{field.source: value})
+            if not self._state.adding and self.pk is not None:
+                duplicates = duplicates.exclude(pk=self.pk)
+            if duplicates.exists():
+                errors.setdefault(field.source, []).append(self.unique_error_message(type(self), (field.source,)))
+
+        if errors:
+            raise ValidationError(errors)
+
+
+def index_field_for(field):
+    """The BlindIndexField of an encrypted field, or None."""
+    try:
+        return field.__dict__['_blind_index_field']
+    except KeyError:
+        pass
+    index = next(
+        (f for f in field.model._meta.concrete_fields
+         if isinstance(f, BlindIndexField) and f.source == field.name),
+        None,
+    )
+    field.__dict__['_blind_index_field'] = index
+    return index
+
+
+class BlindIndexLookupMixin:
+    """Rewrites `encrypted_field <op> value` as `blind_index_column <op> hmac(value)`."""
+
+    def get_prep_lookup(self):
+        return self.rhs  # Plain values: encrypting them (get_prep_value) would never match
+
+    def _index_column(self):
+        if not isinstance(self.lhs, Col):
+            return None
+        try:
+            index = index_field_for(self.lhs.target)
+        except FieldDoesNotExist:
+            return None
+        return None if index is None else Col(self.lhs.alias, index)
+
+
+class BlindIndexExact(BlindIndexLookupMixin, Exact):
+    def as_sql(self, compiler, connection):
+        column = self._index_column()
+        if column is None:
+            return super().as_sql(compiler, connection)
+        sql, params = compiler.compile(column)
+        value = blind_index(self.rhs, self.lhs.target.name)
+        if value is None:
+            return f'{sql} IS NULL', params
+        return f'{sql} = %s', [*params, value]
+
+
+class BlindIndexIExact(BlindIndexExact):
+    """The admin's "=field" search uses iexact; identity numbers have no case, so it is an exact match."""
+    lookup_name = 'iexact'
+
+
+class BlindIndexIn(BlindIndexLookupMixin, In):
+    def get_prep_lookup(self):
+        return list(self.rhs)
+
+    def as_sql(self, compiler, connection):
+        column = self._index_column()
+        if column is None:
+            return super().as_sql(compiler, connection)
+        sql, params = compiler.compile(column)
+        values = sorted({v for v in (blind_index(r, self.lhs.target.name) for r in self.rhs) if v})
+        if not values:
+            return '1 = 0', []
+        placeholders = ', '.join(['%s'] * len(values))
+        return f'{sql} IN ({placeholders})', [*params, *values]
+
+
+def duplicate_values(model, sources, batch_size=500):
+    """
+    Rows sharing a value of the encrypted `sources` fields: {source: [[pk, ...], ...]}, oldest pk first.
+    Values are compared through their blind index, so they match the way the unique index will.
+    """
+    groups = {source: {} for source in sources}
+    for obj in model.objects.only('pk', *sources).order_by('pk').iterator(chunk_size=batch_size):
+        for source in sources:
+            value = blind_index(getattr(obj, source), source)
+            if value is not None:
+                groups[source].setdefault(value, []).append(obj.pk)
+    return {
+        source: [pks for pks in by_value.values() if len(pks) > 1]
+        for source, by_value in groups.items()
+        if any(len(pks) > 1 for pks in by_value.values())
+    }
+
+
+def refresh_blind_indexes(model, unique=None, batch_size=500):
+    """
+    Recomputes every blind index column of `model` (migration / after a key change).
+    For unique indexes (`unique`: field names, default: the fields declared unique) only the
+    oldest row of a duplicated value gets it; returns how many rows were left without one
+    so they can be merged by hand.
+    """
+    fields = [f for f in model._meta.concrete_fields if isinstance(f, BlindIndexField)]
+    if not fields:
+        return 0
+    if unique is None:
+        unique = [f.name for f in fields if f.unique]
+    seen = {name: set() for name in unique}
+    duplicates = 0
+    batch = []
+    for obj in model.objects.only('pk', *(f.source for f in fields)).order_by('pk').iterator(chunk_size=batch_size):
+        for f in fields:
+            value = blind_index(getattr(obj, f.source), f.source)
+            if value is not None and f.name in seen:
+                if value in seen[f.name]:
+                    value = None
+                    duplicates += 1
+                else:
+                    seen[f.name].add(value)
+            setattr(obj, f.attname, value)
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, [f.name for f in fields])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, [f.name for f in fields])
+    return duplicates
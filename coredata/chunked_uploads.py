@@ -0,0 +1,133 @@
+import hashlib
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .uploads import HashedFile
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadOffsetError(Exception):
+    """The chunk does not start where the upload stands; the client should resume from `offset`."""
+
+    def __init__(self, offset):
+        super().__init__(f"expected offset {offset}")
+        self.offset = offset
+
+
+class UploadIncompleteError(Exception):
+    pass
+
+
+def staging_dir(upload):
+    return os.path.join(settings.EVIDENCE_UPLOAD_STAGING_DIR, str(upload.pk))
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Stages `length` bytes read from `stream` as the chunk starting at `offset`.
+    Only the chunk at the current end of the upload is accepted, so a retried or
+    out-of-order chunk never corrupts the staged data. Returns the new offset.
+    """
+    from .models import EvidenceUpload
+
+    if offset != upload.received:
+        raise UploadOffsetError(upload.received)
+    if length <= 0 or length > settings.EVIDENCE_UPLOAD_CHUNK_SIZE or offset + length > upload.total_size:
+        raise ValueError("invalid chunk length")
+
+    directory = staging_dir(upload)
+    os.makedirs(directory, exist_ok=True)
+    part = os.path.join(directory, f'{offset:015d}.part')
+    partial = part + '.tmp'
+    written = 0
+    with open(partial, 'wb') as fh:
+        while written < length:
+            data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            if not data:
+                break
+            fh.write(data)
+            written += len(data)
+    if written != length:
+        # Connection dropped mid-chunk: nothing is recorded, the client resends from `offset`
+        os.remove(partial)
+        raise UploadOffsetError(upload.received)
+
+    # Only one request may advance the offset; a concurrent duplicate loses here
+    with transaction.atomic():
+        advanced = EvidenceUpload.objects.filter(pk=upload.pk, received=offset).update(
+            received=offset + length, updated_at=timezone.now()
+        )
+        if not advanced:
+            os.remove(partial)
+            upload.refresh_from_db(fields=['received'])
+            raise UploadOffsetError(upload.received)
+        os.replace(partial, part)
+    upload.received = offset + length
+    return upload.received
+
+
+def assemble(upload):
+    """
+    Concatenates the staged chunks into one file, hashing as it goes.
+    Returns (path, sha256 hex digest, size).
+    """
+    directory = staging_dir(upload)
+    parts = sorted(name for name in os.listdir(directory) if name.endswith('.part'))
+    path = os.path.join(directory, 'assembled')
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as out:
+        for name in parts:
+            with open(os.path.join(directory, name), 'rb') as part:
+                while data := part.read(COPY_BUFFER_SIZE):
+                    digest.update(data)
+                    out.write(data)
+                    size += len(data)
+    return path, digest.hexdigest(), size
+
+
+def finalize_upload(upload, academic_year=None):
+    """Turns a fully received upload into an EvidenceDocument and removes its staging files."""
+    from .models import EvidenceDocument
+
+    if upload.received != upload.total_size:
+        raise UploadIncompleteError(f"{upload.received} of {upload.total_size} bytes received")
+    path, sha256, size = assemble(upload)
+    if size != upload.total_size:
+        raise UploadIncompleteError(f"staged {size} of {upload.total_size} bytes")
+
+    doc = EvidenceDocument(
+        user=upload.user, academic_year=academic_year,
+        title=upload.title, description=upload.description,
+    )
+    with open(path, 'rb') as fh:
+        # Hash and size are already known: saving does not read the file again (see uploads.py)
+        doc.file = HashedFile(fh, name=upload.filename, sha256=sha256, size=size)
+        doc.save()
+    discard_upload(upload)
+    return doc
+
+
+def discard_upload(upload):
+    directory = staging_dir(upload)
+    upload.delete()
+    # Staged files go only once the row is gone for good
+    transaction.on_commit(lambda: shutil.rmtree(directory, ignore_errors=True))
+
+
+def purge_stale_uploads(max_age=timedelta(days=2)):
+    """Drops uploads not touched for `max_age` (abandoned transfers). Returns how many."""
+    from .models import EvidenceUpload
+
+    stale = EvidenceUpload.objects.filter(updated_at__lt=timezone.now() - max_age)
+    count = 0
+    for upload in stale.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
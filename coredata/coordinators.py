@@ -0,0 +1,76 @@
+from .text import normalize_arabic
+
+COORDINATOR_KEYWORD = "منسق"
+
+# Subject -> keywords found in job titles (e.g. "معلم رياضيات" -> الرياضيات)
+SUBJECTS_MAP = {
+    "الرياضيات": ["رياضيات", "الرياضيات"],
+    "العربية": ["العربية", "اللغة العربية"],
+    "الانجليزية": ["الإنجليزية", "اللغة الانجليزية", "اللغة الإنجليزية"],
+    "الاسلامية": ["الاسلامية", "الإسلامية", "التربية الإسلامية", "العلوم الشرعية"],
+    "العلوم": ["العلوم", "الكيمياء", "الفيزياء", "الأحياء"],
+    "الاجتماعية": ["الاجتماعية", "العلوم الاجتماعية", "الدراسات الاجتماعية"],
+    "تكنولوجيا": ["تكنولوجيا", "الحاسوب"],
+    "البدنية": ["البدنية", "الرياضة"],
+    "النفسي": ["النفسي", "الأخصائي النفسي"],
+    "الاجتماعي": ["الاجتماعي", "الأخصائي الاجتماعي"],
+}
+
+_NORMALIZED_SUBJECTS = [
+    (normalize_arabic(subject), [normalize_arabic(kw) for kw in keywords])
+    for subject, keywords in SUBJECTS_MAP.items()
+]
+
+
+def match_subject(job_title):
+    """Returns the normalized subject of a job title (first match wins), or None."""
+    title = normalize_arabic(job_title)
+    for subject, keywords in _NORMALIZED_SUBJECTS:
+        if any(kw in title for kw in keywords):
+            return subject
+    return None
+
+
+def build_coordinator_index(job_titles, committees):
+    """
+    Maps job title id -> ids of the coordinator committees ("منسق ..." + subject) of its subject.
+    `job_titles` and `committees` are iterables of (id, title/name) pairs.
+    """
+    coordinator = normalize_arabic(COORDINATOR_KEYWORD)
+    by_subject = {}
+    for committee_id, name in committees:
+        name = normalize_arabic(name)
+        if coordinator not in name:
+            continue
+        for subject, _ in _NORMALIZED_SUBJECTS:
+            if subject in name:
+                by_subject.setdefault(subject, []).append(committee_id)
+
+    index = {}
+    for job_title_id, title in job_titles:
+        subject = match_subject(title)
+        index[job_title_id] = by_subject.get(subject, []) if subject else []
+    return index
+
+
+def rebuild_coordinator_index(JobTitle, Committee, job_title_ids=None):
+    """
+    Persists the index into JobTitle.coordinator_committees.
+    Takes the model classes so it can also run from a data migration.
+    """
+    job_titles = JobTitle.objects.all()
+    if job_title_ids is not None:
+        job_titles = job_titles.filter(id__in=job_title_ids)
+    index = build_coordinator_index(
+        job_titles.values_list('id', 'title'),
+        Committee.objects.values_list('id', 'name'),
+    )
+
+    Through = JobTitle.coordinator_committees.through
+    Through.objects.filter(jobtitle_id__in=list(index)).delete()
+    Through.objects.bulk_create([
+        Through(jobtitle_id=job_title_id, committee_id=committee_id)
+        for job_title_id, committee_ids in index.items()
+        for committee_id in committee_ids
+    ])
+    return index
@@ -0,0 +1,367 @@
+import base64
+import binascii
+import hashlib
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db.models import ExpressionWrapper, F, TextField
+from django.db.models.query import (
+    FlatValuesListIterable,
+    NamedValuesListIterable,
+    ValuesIterable,
+    ValuesListIterable,
+)
+from django.db.models.query_utils import DeferredAttribute
+
+
+def _fernet_key(secret):
+    """A configured Fernet key as is; any other secret is stretched the way SECRET_KEY always was."""
+    try:
+        if len(base64.urlsafe_b64decode(secret.encode())) == 32:
+            return secret.encode()
+    except (binascii.Error, ValueError):
+        pass
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest())
+
+
+def key_id(key):
+    return hashlib.sha256(key).hexdigest()[:8]
+
+
+class FernetBackend:
+    """Fernet (AES-128-CBC + HMAC-SHA256). Its tokens carry no prefix: every value stored so far is one."""
+    name = 'fernet'
+    tag = None
+
+    def __init__(self, key):
+        self.cipher = Fernet(key)
+
+    def encrypt(self, data):
+        return self.cipher.encrypt(data).decode()
+
+    def decrypt(self, payload):
+        return self.cipher.decrypt(payload.encode())
+
+
+class AEADBackend:
+    """
+    An AEAD cipher from `cryptography`: stores base64(nonce + ciphertext + 16-byte tag), no padding.
+    Its key is derived from the field-encryption key per algorithm, so no key is shared across ciphers.
+    """
+    name = tag = algorithm = None
+    NONCE_SIZE = 12
+
+    def __init__(self, key):
+        self.cipher = self.algorithm(hashlib.sha256(self.name.encode() + b':' + key).digest())
+
+    def encrypt(self, data):
+        nonce = os.urandom(self.NONCE_SIZE)
+        return base64.urlsafe_b64encode(nonce + self.cipher.encrypt(nonce, data, None)).rstrip(b'=').decode()
+
+    def decrypt(self, payload):
+        try:
+            raw = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+            return self.cipher.decrypt(raw[:self.NONCE_SIZE], raw[self.NONCE_SIZE:], None)
+        except (InvalidTag, ValueError, binascii.Error):
+            raise InvalidToken
+
+
+class AESGCMBackend(AEADBackend):
+    name, tag, algorithm = 'aes-gcm', 'g1', AESGCM
+
+
+class ChaCha20Backend(AEADBackend):
+    name, tag, algorithm = 'chacha20-poly1305', 'c1', ChaCha20Poly1305
+
+
+BACKENDS = {backend.name: backend for backend in (FernetBackend, AESGCMBackend, ChaCha20Backend)}
+AEAD_BACKENDS = {backend.tag: backend for backend in (AESGCMBackend, ChaCha20Backend)}
+
+# Every Fernet token starts with the version byte and the high (zero) bytes of its timestamp
+FERNET_TOKEN_PREFIX = 'gAAAAA'
+# AEAD tokens are "<backend tag>$<key id>$<payload>" (no $ in base64, so never a Fernet token)
+TOKEN_SEPARATOR = '$'
+
+
+def is_token(value):
+    """Whether a stored value looks encrypted (by any backend) rather than a plain legacy value."""
+    return value.startswith(FERNET_TOKEN_PREFIX) or value.split(TOKEN_SEPARATOR, 1)[0] in AEAD_BACKENDS
+
+
+class KeyRing:
+    """
+    The field-encryption keys with their ciphers built once.
+    The first key encrypts, with `backend` (FIELD_ENCRYPTION_BACKEND). AEAD tokens name their
+    backend and key, so they open with one attempt; Fernet tokens are tried against every key
+    (primary first). Ciphertexts written before a key or backend change still read.
+    """
+
+    def __init__(self, secrets, backend='fernet'):
+        keys = []
+        for secret in secrets:
+            key = _fernet_key(secret)
+            if key not in keys:
+                keys.append(key)
+        if backend not in BACKENDS:
+            raise ImproperlyConfigured(f"Unknown FIELD_ENCRYPTION_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+        self.keys = {key_id(key): key for key in keys}
+        self.ciphers = {kid: Fernet(key) for kid, key in self.keys.items()}
+        self.primary_id = next(iter(self.ciphers))
+        self.backend = BACKENDS[backend]
+        self._writer = self.backend(self.keys[self.primary_id])
+        self._prefix = f'{self.backend.tag}${self.primary_id}$' if self.backend.tag else ''
+        self._aead = {}
+        self._decrypt_chain = tuple(c.decrypt for c in self.ciphers.values())
+
+    def _aead_cipher(self, tag, kid):
+        cipher = self._aead.get((tag, kid))
+        if cipher is None:
+            if tag not in AEAD_BACKENDS or kid not in self.keys:
+                raise InvalidToken
+            cipher = self._aead[(tag, kid)] = AEAD_BACKENDS[tag](self.keys[kid])
+        return cipher
+
+    def _open_aead(self, token):
+        tag, kid, payload = token.split(TOKEN_SEPARATOR, 2)
+        return self._aead_cipher(tag, kid).decrypt(payload).decode()
+
+    def encrypt(self, plain):
+        return self._prefix + self._writer.encrypt(plain.encode())
+
+    def decrypt(self, token):
+        if token.count(TOKEN_SEPARATOR) >= 2:
+            return self._open_aead(token)
+        data = token.encode()
+        for decrypt in self._decrypt_chain:
+            try:
+                return decrypt(data).decode()
+            except InvalidToken:
+                continue
+        raise InvalidToken
+
+    def is_current(self, token):
+        """Whether `token` is already written with the primary key and backend (nothing to rotate)."""
+        if self.backend.tag:
+            return token.startswith(self._prefix)
+        if TOKEN_SEPARATOR in token:
+            return False
+        try:
+            self.ciphers[self.primary_id].decrypt(token.encode())
+        except InvalidToken:
+            return False
+        return True
+
+    def decrypt_many(self, tokens, default=None):
+        """
+        Decrypts a batch: AEAD tokens open directly; each Fernet key is tried on all the tokens it
+        has not opened yet, so a batch written under the primary key costs one pass.
+        Tokens no key opens map to `default(token)`.
+        """
+        results = [None] * len(tokens)
+        pending = []
+        for i, token in enumerate(tokens):
+            if token is None:
+                continue
+            if token.count(TOKEN_SEPARATOR) >= 2:
+                try:
+                    results[i] = self._open_aead(token)
+                except InvalidToken:
+                    results[i] = default(token) if default else None
+            else:
+                pending.append((i, token.encode()))
+        for decrypt in self._decrypt_chain:
+            missed = []
+            for i, data in pending:
+                try:
+                    results[i] = decrypt(data).decode()
+                except InvalidToken:
+                    missed.append((i, data))
+            pending = missed
+            if not pending:
+                break
+        for i, data in pending:
+            results[i] = default(tokens[i]) if default else None
+        return results
+
+
+_keyring = None
+
+
+def keyring():
+    """The process-level KeyRing: FIELD_ENCRYPTION_KEYS, then the legacy SECRET_KEY-derived key."""
+    global _keyring
+    if _keyring is None:
+        _keyring = KeyRing([*settings.FIELD_ENCRYPTION_KEYS, settings.SECRET_KEY], settings.FIELD_ENCRYPTION_BACKEND)
+    return _keyring
+
+
+def _reset_keyring(setting, **kwargs):
+    global _keyring
+    if setting in ('FIELD_ENCRYPTION_KEYS', 'FIELD_ENCRYPTION_BACKEND', 'SECRET_KEY'):
+        _keyring = None
+
+
+setting_changed.connect(_reset_keyring)
+
+
+def encrypt(plain):
+    return keyring().encrypt(plain)
+
+
+def decrypt(token):
+    return keyring().decrypt(token)
+
+
+def decrypt_or_raw(token):
+    """Plain value of a stored token; values that no key opens (never encrypted) are returned as stored."""
+    try:
+        return decrypt(token)
+    except InvalidToken:
+        return token
+
+
+class Ciphertext:
+    """
+    An encrypted column value as loaded from the database, decrypted on first use.
+    It only lives in a model instance's __dict__: the attribute (EncryptedAttribute) resolves it
+    on access, and values()/values_list() rows get the plain str instead (PlainValuesMixin).
+    """
+    __slots__ = ('_plain', 'token')
+
+    def __init__(self, token):
+        self.token = token
+        self._plain = None
+
+    @property
+    def plain(self):
+        if self._plain is None:
+            self._plain = decrypt_or_raw(self.token)
+        return self._plain
+
+    def __str__(self):
+        return self.plain
+
+    def __repr__(self):
+        return '<Ciphertext>'  # Never the plain value in logs/tracebacks
+
+    def __eq__(self, other):
+        if isinstance(other, Ciphertext):
+            other = other.plain
+        return self.plain == other
+
+    def __hash__(self):
+        return hash(self.plain)
+
+    def __len__(self):
+        return len(self.plain)
+
+    def __getattr__(self, name):
+        return getattr(self.plain, name)
+
+    def __getstate__(self):
+        return {'token': self.token}
+
+    def __setstate__(self, state):
+        self.token = state['token']
+        self._plain = None
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """Model attribute of an encrypted field: decrypts the loaded Ciphertext when it is first read."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, Ciphertext):
+            value = value.plain
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor: otherwise the loaded value in __dict__ would shadow __get__
+        instance.__dict__[self.field.attname] = value
+
+
+def plain(value):
+    return value.plain if isinstance(value, Ciphertext) else value
+
+
+class PlainRowsMixin:
+    """Iterable mixin: rows with every Ciphertext replaced by its plain str."""
+
+    def __iter__(self):
+        for row in super().__iter__():
+            if isinstance(row, dict):
+                yield {key: plain(value) for key, value in row.items()}
+            elif hasattr(row, '_make'):
+                yield row._make(map(plain, row))  # values_list(named=True)
+            elif isinstance(row, tuple):
+                yield tuple(map(plain, row))
+            else:
+                yield plain(row)  # values_list(flat=True)
+
+
+class PlainValuesIterable(PlainRowsMixin, ValuesIterable):
+    pass
+
+
+class PlainValuesListIterable(PlainRowsMixin, ValuesListIterable):
+    pass
+
+
+class PlainFlatValuesListIterable(PlainRowsMixin, FlatValuesListIterable):
+    pass
+
+
+class PlainNamedValuesListIterable(PlainRowsMixin, NamedValuesListIterable):
+    pass
+
+
+PLAIN_ITERABLES = {
+    ValuesIterable: PlainValuesIterable,
+    ValuesListIterable: PlainValuesListIterable,
+    FlatValuesListIterable: PlainFlatValuesListIterable,
+    NamedValuesListIterable: PlainNamedValuesListIterable,
+}
+
+
+class PlainValuesMixin:
+    """
+    QuerySet mixin for models with encrypted fields: values()/values_list() rows hold plain str
+    (JSON, sorting and concatenation work as before). Only model instances load lazily.
+    """
+
+    def values(self, *fields, **expressions):
+        return self._plain_rows(super().values(*fields, **expressions))
+
+    def values_list(self, *fields, flat=False, named=False):
+        return self._plain_rows(super().values_list(*fields, flat=flat, named=named))
+
+    @staticmethod
+    def _plain_rows(clone):
+        clone._iterable_class = PLAIN_ITERABLES.get(clone._iterable_class, clone._iterable_class)
+        return clone
+
+
+def decrypted_values(queryset, *fields, others=('pk',)):
+    """
+    values() rows (`others` plus the encrypted `fields`) of `queryset`, the encrypted columns
+    read raw and decrypted in one batch per field instead of one from_db_value call per cell.
+    """
+    raw = {f'_raw_{name}': ExpressionWrapper(F(name), output_field=TextField()) for name in fields}
+    rows = list(queryset.values(*others, **raw))
+    ring = keyring()
+    for name in fields:
+        column = f'_raw_{name}'
+        # Values no key opens (never encrypted) are returned as stored, like from_db_value does
+        plain = ring.decrypt_many([row[column] for row in rows], default=lambda token: token)
+        for row, value in zip(rows, plain):
+            del row[column]
+            row[name] = value
+    return rows
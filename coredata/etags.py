@@ -0,0 +1,51 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+from .fragments import rows_version
+from .roles import roles_version
+
+
+def plan_list_validators(request, queryset, template_name):
+    """
+    Returns (etag, last_modified) for a plan page over the filtered `queryset`.
+
+    The data part is one aggregate (max(updated_at), count) on the filtered rows, so an
+    unchanged table is recognised without running the page queries or rendering anything.
+    The count catches deletions; the role/row cache versions catch membership and evidence changes.
+    The session, CSRF secret and language are part of it too: the full page embeds the CSRF token,
+    so a copy kept across a re-login or token rotation must not be replayed.
+    Only the ETag is used to answer 304: max(updated_at) alone would miss deletions.
+    """
+    get_token(request)  # Makes sure the CSRF secret exists (the page would create it anyway)
+    stats = queryset.order_by().aggregate(last=Max('updated_at'), rows=Count('id'))
+    last = stats['last']
+    session = getattr(request, 'session', None)
+    parts = [
+        template_name,
+        request.get_full_path(),
+        str(request.user.pk),
+        (session and session.session_key) or '-',
+        request.META.get('CSRF_COOKIE', '-'),
+        get_language() or '-',
+        roles_version(),
+        rows_version(),
+        last.isoformat() if last else '-',
+        str(stats['rows']),
+    ]
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+    return etag, last.timestamp() if last else None
+
+
+def set_validators(response, etag, last_modified):
+    """Adds the validators and makes clients revalidate (If-None-Match) on every use."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('HX-Request', 'HX-Target'))
+    return response
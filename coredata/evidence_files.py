@@ -0,0 +1,55 @@
+import uuid
+
+from django.core.cache import cache
+
+# Replaced whenever an EvidenceFile is saved or deleted; every process compares its
+# copy of the list against it, so changes made by one worker reach all of them
+EVIDENCE_FILES_VERSION_KEY = 'evidence-files:version'
+
+# Process-level copy: {'version': ..., 'choices': ((pk, name), ...), 'by_pk': {...}, 'by_name': {...}}
+_files = {'version': None}
+
+
+def evidence_files_version():
+    version = cache.get(EVIDENCE_FILES_VERSION_KEY)
+    if version is None:
+        cache.add(EVIDENCE_FILES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(EVIDENCE_FILES_VERSION_KEY)
+    return version
+
+
+def invalidate_evidence_files():
+    """Makes every process reload the evidence file list (called from the signal handlers)."""
+    cache.set(EVIDENCE_FILES_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _load():
+    global _files
+    version = evidence_files_version()
+    if _files['version'] != version:
+        from .models import EvidenceFile
+
+        choices = tuple(EvidenceFile.objects.order_by('name').values_list('pk', 'name'))
+        _files = {
+            'version': version,
+            'choices': choices,
+            'by_pk': dict(choices),
+            'by_name': {name.strip().casefold(): (pk, name) for pk, name in choices},
+        }
+    return _files
+
+
+def evidence_file_choices():
+    """((pk, name), ...) of every evidence file, ordered by name."""
+    return _load()['choices']
+
+
+def evidence_file_name(pk):
+    return _load()['by_pk'].get(pk)
+
+
+def find_evidence_file(name):
+    """(pk, name) of the file matching `name` case-insensitively, or None."""
+    if not name:
+        return None
+    return _load()['by_name'].get(name.strip().casefold())
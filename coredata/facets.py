@@ -0,0 +1,47 @@
+from collections import Counter
+
+from django.db.models import Count
+
+
+def plan_facets(year_field='academic_year__name'):
+    """
+    Dropdown facets shown in the plan filter bar: context key -> model field path.
+    `year_field` is where the plan model keeps the academic year name (diagnostics: 'year').
+    """
+    return {
+        'all_years': year_field,
+        'all_rank_names': 'rank_name',
+        'all_executors': 'executor',
+        'all_date_ranges': 'date_range',
+        'all_follow_ups': 'follow_up',
+        'all_evaluations': 'evaluation',
+    }
+
+
+PLAN_FACETS = plan_facets()
+
+
+def compute_facets(queryset, facets=PLAN_FACETS):
+    """
+    Computes the distinct values of every facet with their counts in ONE grouped query.
+
+    Instead of running a separate `values_list(...).distinct()` per dropdown, we group
+    the filtered queryset by all facet columns at once and fold the combinations in Python.
+    Returns {context_key: [(value, count), ...]} sorted by value, empty values dropped.
+    """
+    fields = list(facets.values())
+    rows = (
+        queryset.order_by()
+        .values(*fields)
+        .annotate(_facet_count=Count('id', distinct=True))
+    )
+
+    counters = {key: Counter() for key in facets}
+    for row in rows:
+        n = row['_facet_count']
+        for key, field in facets.items():
+            value = row[field]
+            if value not in (None, ''):
+                counters[key][value] += n
+
+    return {key: sorted(counter.items(), key=lambda kv: str(kv[0])) for key, counter in counters.items()}
@@ -1,6 +1,12 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.forms.models import ModelChoiceIterator
+from .evidence_files import evidence_file_choices, evidence_file_name, find_evidence_file
 from .models import OperationalPlanItems, Staff, EvidenceFile, EvidenceDocument
+from .roles import get_user_roles
+from .vault import visible_documents
 
 class PlanItemForm(forms.ModelForm):
     class Meta:
@@ -14,6 +20,89 @@ class PlanItemForm(forms.ModelForm):
             'evaluation_notes': forms.Textarea(attrs={'rows':2}),
         }
 
+class EvidenceFileChoiceIterator(ModelChoiceIterator):
+    """Yields the cached (pk, name) list instead of iterating the field's queryset."""
+
+    def _files(self):
+        files = evidence_file_choices()
+        if self.field.limit_to is not None:
+            files = [f for f in files if f[0] in self.field.limit_to]
+        return files
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from self._files()
+
+    def __len__(self):
+        return len(self._files()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self._files())
+
+
+class EvidenceFileChoiceField(forms.ModelChoiceField):
+    """
+    Evidence file select served from the process-level list in evidence_files.py.
+    Cleans to the file *name*, which is what OperationalPlanItems.evidence_source_file stores.
+    """
+    iterator = EvidenceFileChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=EvidenceFile.objects.all(), **kwargs)
+        self.limit_to = None  # None = every file, else a set of allowed pks
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            pk = None
+        name = evidence_file_name(pk)
+        if name is None or (self.limit_to is not None and pk not in self.limit_to):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return name
+
+    def validate(self, value):
+        forms.Field.validate(self, value)
+
+
+class SelectedDocumentIterator(ModelChoiceIterator):
+    """Only the selected vault document is rendered; other choices are fetched by the autocomplete."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        if self.field.selected_pk is not None:
+            yield from self.queryset.filter(pk=self.field.selected_pk).values_list('pk', 'title')
+
+    def __len__(self):
+        return (self.field.empty_label is not None) + (self.field.selected_pk is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or self.field.selected_pk is not None
+
+
+class EvidenceDocumentAutocompleteField(forms.ModelChoiceField):
+    """
+    Vault document select whose options come from the plan_evidence_autocomplete endpoint,
+    so the modal does not ship the whole vault. Validation still uses the field's queryset.
+    """
+    iterator = SelectedDocumentIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=EvidenceDocument.objects.none(), **kwargs)
+        self.selected = None
+
+    @property
+    def selected_pk(self):
+        """The selected document pk; None when nothing (or a tampered, non-numeric value) is selected."""
+        if self.selected is None or not str(self.selected).isdigit():
+            return None
+        return int(self.selected)
+
+
 class PlanItemExecutionForm(forms.ModelForm):
     """
     نموذج مخصص لتحديث بيانات التنفيذ.
@@ -63,16 +152,14 @@ class PlanItemExecutionForm(forms.ModelForm):
     )
 
     # نستخدم ModelChoiceField لربطه بجدول الملفات
-    evidence_document = forms.ModelChoiceField(
-        queryset=EvidenceDocument.objects.none(), # Will be filtered in __init__
+    evidence_document = EvidenceDocumentAutocompleteField(  # Filtered in __init__
         required=False,
         label="ارفاق دليل من المستودع (خزنة ملفاتي)",
         widget=forms.Select(attrs={'class': 'form-control select-gold'}),
         empty_label="--- اختر ملفاً من مستودع الأدلة ---"
     )
 
-    evidence_source_file = forms.ModelChoiceField(
-        queryset=EvidenceFile.objects.all(), # Start with all, then filter
+    evidence_source_file = EvidenceFileChoiceField(
         required=False,
         label="موقع الدليل (الملف)",
         widget=forms.Select(attrs={'class': 'form-control'}),
@@ -97,57 +184,27 @@ class PlanItemExecutionForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super(PlanItemExecutionForm, self).__init__(*args, **kwargs)
 
-        # --- DEBUG PRINT FOR THE AGENT ---
-        # print(f"DEBUG: PlanItemExecutionForm initialized for user: {self.user}")
+        # --- 1. Evidence file choices ---
+        # Authenticated users see every file (the FilePermission table has been removed);
+        # the list comes from the process-level cache, so no query is made here.
+        saved_file = find_evidence_file(self.instance.evidence_source_file)
+        field = self.fields['evidence_source_file']
+        if not (self.user and self.user.is_authenticated):
+            # Only the saved file (if any) stays selectable
+            field.limit_to = {saved_file[0]} if saved_file else set()
+            field.queryset = EvidenceFile.objects.filter(pk__in=field.limit_to)
 
-        # --- 1. Get User's Allowed Files ---
-        allowed_files_names = []
-        staff_member = None
-        
-        # Determine current item area (Rank Name)
-        
-        # Default behavior: If user is authenticated, show all files for now
-        # because the specific FilePermission table has been removed.
-        if self.user and self.user.is_authenticated:
-            allowed_files_qs = EvidenceFile.objects.all()
+        # --- 2. Filter EvidenceDocument (Vault) for the current user ---
+        document = self.fields['evidence_document']
+        document.queryset = visible_documents(self.user)
+        if self.is_bound:
+            document.selected = self.data.get(self.add_prefix('evidence_document')) or None
         else:
-            allowed_files_qs = EvidenceFile.objects.none()
-
-        # --- LAST RESORT FALLBACK ---
-        # If still empty, it's possible the user's staff profile is not linked or permissions are missing.
-        # As a safety measure to prevent "Empty Dropdown", if the user is authenticated, 
-        # let's show all evidence files for now, but ONLY if the strict filtering failed.
-        if not allowed_files_qs.exists() and self.user and self.user.is_authenticated:
-            allowed_files_qs = EvidenceFile.objects.all()
-
-        # --- 2. Get the Saved File (if it exists) ---
-        saved_file_qs = EvidenceFile.objects.none()
-        saved_file_name = self.instance.evidence_source_file
-        if saved_file_name:
-            saved_file_qs = EvidenceFile.objects.filter(name__iexact=saved_file_name.strip())
-
-        # --- 3. Combine them and set the queryset ---
-        # IMPORTANT: Use .distinct() and ensure we handle the case where allowed_files_qs might be empty
-        final_qs = (allowed_files_qs | saved_file_qs).distinct()
-        
-        # If final_qs is empty and the user is a superuser, show all files
-        if not final_qs.exists() and self.user and self.user.is_superuser:
-            final_qs = EvidenceFile.objects.all()
-
-        self.fields['evidence_source_file'].queryset = final_qs
+            document.selected = self.instance.evidence_document_id
 
-        # --- 5. Filter EvidenceDocument (Vault) for the current user ---
-        if self.user:
-            if self.user.is_superuser:
-                self.fields['evidence_document'].queryset = EvidenceDocument.objects.all()
-            else:
-                self.fields['evidence_document'].queryset = EvidenceDocument.objects.filter(user=self.user)
-
-        # --- 6. Set Initial Values ---
-        if saved_file_name:
-            initial_obj = self.fields['evidence_source_file'].queryset.filter(name__iexact=saved_file_name.strip()).first()
-            if initial_obj:
-                self.fields['evidence_source_file'].initial = initial_obj
+        # --- 3. Set Initial Values (matched in memory, case-insensitively) ---
+        if saved_file:
+            self.initial['evidence_source_file'] = saved_file[0]
 
     def clean_comments(self):
         """
@@ -164,10 +221,6 @@ class PlanItemExecutionForm(forms.ModelForm):
                 return f"{comments.strip()} ({timestamp})"
         return comments
 
-    def clean_evidence_source_file(self):
-        file_obj = self.cleaned_data.get('evidence_source_file')
-        return file_obj.name if file_obj else None
-
 
 class EvidenceUploadForm(forms.ModelForm):
     """
@@ -238,4 +291,40 @@ class PlanItemEvaluationForm(forms.ModelForm):
             'evidence_source_employee': forms.TextInput(attrs={'class': 'form-control gold-border', 'placeholder': 'اسم المقيّم'}),
             'evidence_request_note': forms.Textarea(attrs={'rows': 2, 'class': 'form-control gold-border', 'placeholder': 'سبب طلب الدليل...'}),
             'evidence_requested': forms.CheckboxInput(attrs={'class': 'checkbox-gold'}),
-        }
\ No newline at end of file
+        }
+
+
+class PlanBulkEvaluationForm(forms.Form):
+    """
+    قرار تقييم واحد يطبق على مجموعة من البنود المحددة.
+    لا يقبل إلا البنود التي تقيمها لجان المستخدم.
+    """
+    items = forms.ModelMultipleChoiceField(queryset=OperationalPlanItems.objects.none())
+    status = forms.ChoiceField(choices=PlanItemEvaluationForm.STATUS_CHOICES, label="قرار اللجنة")
+    # Left empty: the items keep their current value
+    evaluation = forms.ChoiceField(choices=PlanItemEvaluationForm.EVALUATION_CHOICES, required=False, label="التقييم")
+    evaluation_notes = forms.CharField(required=False, widget=forms.Textarea, label="ملاحظات التقييم")
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        items = OperationalPlanItems.objects.all()
+        if not user.is_superuser:
+            items = items.filter(evaluator_committee__in=get_user_roles(user).committee_ids)
+        self.fields['items'].queryset = items
+
+
+
+class EvidenceUploadInitForm(forms.Form):
+    """
+    بدء رفع دليل على دفعات (قابل للاستئناف): بيانات الدليل واسم الملف وحجمه.
+    """
+    title = forms.CharField(max_length=255, label="عنوان الدليل")
+    description = forms.CharField(required=False, widget=forms.Textarea, label="وصف الدليل")
+    filename = forms.CharField(max_length=255, label="اسم الملف")
+    size = forms.IntegerField(min_value=1, label="حجم الملف (بايت)")
+
+    def clean_size(self):
+        size = self.cleaned_data['size']
+        if size > settings.EVIDENCE_UPLOAD_MAX_SIZE:
+            raise forms.ValidationError("حجم الملف يتجاوز الحد المسموح.")
+        return size
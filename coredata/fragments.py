@@ -0,0 +1,108 @@
+import hashlib
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template import RequestContext
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .text import normalize_arabic
+
+ROW_TEMPLATE = 'plan/_row.html'
+
+# Part of every row key; replaced when something a row shows changes without touching
+# the plan item's updated_at (e.g. its evidence document is edited or deleted)
+ROW_VERSION_KEY = 'plan:rows:version'
+ROW_HITS_KEY = 'plan:rows:hits'
+ROW_MISSES_KEY = 'plan:rows:misses'
+
+
+def _cache():
+    return caches[settings.PLAN_ROW_CACHE]
+
+
+def rows_version():
+    cache = _cache()
+    version = cache.get(ROW_VERSION_KEY)
+    if version is None:
+        cache.add(ROW_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(ROW_VERSION_KEY)
+    return version
+
+
+def invalidate_row_cache():
+    """Drops every cached row (called from the signal handlers)."""
+    _cache().set(ROW_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def row_cache_key(item, view_role, q='', version=None):
+    """
+    Key of a rendered row: item id + updated_at, the view role, the user's flags on the row
+    and the search terms (highlighting). None when the row cannot be cached (no updated_at).
+    """
+    if item.updated_at is None:
+        return None
+    flags = f'{int(item.can_execute)}{int(item.can_evaluate)}'
+    terms = hashlib.md5(normalize_arabic(q).encode()).hexdigest()[:12] if q else '-'
+    stamp = int(item.updated_at.timestamp() * 1_000_000)
+    return f'plan:row:{version or rows_version()}:{item.pk}:{stamp}:{view_role or "-"}:{flags}:{terms}'
+
+
+def _bump(key, n):
+    if not n:
+        return
+    cache = _cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, n)
+    except ValueError:  # Evicted between add() and incr()
+        cache.set(key, n, None)
+
+
+def render_rows(request, items, view_role=None, q=''):
+    """
+    Returns the HTML of each row (items need can_execute/can_evaluate, see set_row_permissions).
+    Cached rows are read with one get_many; only the misses are rendered, then stored with one set_many.
+    """
+    cache = _cache()
+    version = rows_version()
+    keys = [row_cache_key(item, view_role, q, version) for item in items]
+    cached = cache.get_many([k for k in keys if k])
+
+    html, missed = [], {}
+    template = context = None
+    with ExitStack() as stack:
+        for item, key in zip(items, keys):
+            fragment = cached.get(key) if key else None
+            if fragment is None:
+                if template is None:
+                    # Bound once: context processors run once per batch, not once per row
+                    template = get_template(ROW_TEMPLATE).template
+                    context = RequestContext(request, {'view_role': view_role, 'q': q})
+                    stack.enter_context(context.bind_template(template))
+                with context.push(it=item):
+                    fragment = template.render(context)
+                if key:
+                    missed[key] = fragment
+            html.append(mark_safe(fragment))
+
+    if missed:
+        cache.set_many(missed, settings.PLAN_ROW_CACHE_TIMEOUT)
+    hits = sum(1 for key in keys if key in cached)
+    _bump(ROW_HITS_KEY, hits)
+    _bump(ROW_MISSES_KEY, len(items) - hits)
+    return html
+
+
+def row_cache_stats():
+    cache = _cache()
+    hits = cache.get(ROW_HITS_KEY) or 0
+    misses = cache.get(ROW_MISSES_KEY) or 0
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_row_cache_stats():
+    _cache().delete_many([ROW_HITS_KEY, ROW_MISSES_KEY])
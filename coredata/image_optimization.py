@@ -0,0 +1,82 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# PIL format used to re-encode each optimizable extension (the extension is kept)
+OPTIMIZABLE_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+# Image.info keys of embedded metadata that re-encoding drops
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp')
+
+_pool = None
+
+
+def _executor():
+    """
+    Shared worker pool: bounds how many images are encoded at once across request threads
+    (PIL releases the GIL while resizing/encoding, so they do run in parallel).
+    """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=settings.EVIDENCE_IMAGE_WORKERS, thread_name_prefix='evidence-image')
+    return _pool
+
+
+def optimize_image_bytes(data, ext):
+    """
+    Downscales to EVIDENCE_IMAGE_MAX_DIMENSION, drops EXIF/XMP (after applying the EXIF rotation)
+    and re-encodes with EVIDENCE_IMAGE_QUALITY. Returns the new bytes, or None if they are not
+    smaller and the original carried no metadata: metadata (GPS position...) is always removed.
+    """
+    image_format = OPTIMIZABLE_FORMATS.get(ext.lower())
+    if image_format is None:
+        return None
+    with Image.open(io.BytesIO(data)) as image:
+        has_metadata = bool(image.getexif()) or any(key in image.info for key in METADATA_KEYS)
+        image = ImageOps.exif_transpose(image)
+        max_side = settings.EVIDENCE_IMAGE_MAX_DIMENSION
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        out = io.BytesIO()
+        if image_format == 'PNG':
+            image.save(out, format='PNG', optimize=True)
+        else:
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')  # JPEG has no alpha channel
+            elif image_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+                has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            image.save(out, format=image_format, quality=settings.EVIDENCE_IMAGE_QUALITY, optimize=True, progressive=True)
+    optimized = out.getvalue()
+    return optimized if len(optimized) < len(data) or has_metadata else None
+
+
+def optimize_upload(doc):
+    """
+    Optimization stage of EvidenceDocument.save() for a new image upload: swaps doc.file for the
+    optimized version (keeping the original in doc.original_file if EVIDENCE_IMAGE_KEEP_ORIGINAL)
+    and records the bytes saved. Decodable images always lose their metadata; anything else is
+    left untouched.
+    """
+    if not settings.EVIDENCE_IMAGE_OPTIMIZATION:
+        return
+    name = os.path.basename(doc.file.name)
+    ext = os.path.splitext(name)[1]
+    size = doc.file.size
+    if ext.lower() not in OPTIMIZABLE_FORMATS or not size or size > settings.EVIDENCE_IMAGE_MAX_INPUT_SIZE:
+        return
+    doc.file.seek(0)
+    data = doc.file.read()
+    doc.file.seek(0)
+    try:
+        optimized = _executor().submit(optimize_image_bytes, data, ext).result()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return  # Not an image PIL can read: stored as uploaded
+    if optimized is None:
+        return
+    if settings.EVIDENCE_IMAGE_KEEP_ORIGINAL:
+        doc.original_file = ContentFile(data, name=name)
+    doc.file = ContentFile(optimized, name=name)
+    doc.bytes_saved = max(len(data) - len(optimized), 0)
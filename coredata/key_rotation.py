@@ -0,0 +1,165 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import InvalidToken
+from django.apps import apps
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, TextField, Value
+
+from .encryption import KeyRing, is_token
+
+_worker_ring = None
+
+
+def encrypted_fields(model):
+    from .models import EncryptedCharField
+
+    return [f for f in model._meta.concrete_fields if isinstance(f, EncryptedCharField)]
+
+
+def encrypted_models():
+    """Every installed model with encrypted columns, the simple_history copies included."""
+    return [model for model in apps.get_models() if encrypted_fields(model)]
+
+
+def reencrypt_tokens(tokens, ring):
+    """
+    Re-encrypts stored tokens under the primary key and backend of `ring`.
+    Returns (new tokens, unreadable count): None where a value is empty or already current,
+    or where it is a token no configured key opens (counted as unreadable).
+    Values that are not tokens at all were never encrypted and get encrypted now.
+    """
+    results, unreadable = [], 0
+    for token in tokens:
+        new = None
+        if token is not None and not ring.is_current(token):
+            try:
+                plain = ring.decrypt(token)
+            except InvalidToken:
+                plain = None if is_token(token) else token
+            if plain is None:
+                unreadable += 1
+            else:
+                new = ring.encrypt(plain)
+        results.append(new)
+    return results, unreadable
+
+
+def _init_worker(secrets, backend):
+    global _worker_ring
+    _worker_ring = KeyRing(secrets, backend)
+
+
+def _reencrypt_chunk(tokens):
+    return reencrypt_tokens(tokens, _worker_ring)
+
+
+class KeyRotation:
+    """
+    Re-encrypts the EncryptedCharField columns of models under the primary field-encryption key
+    and `backend`.
+    Rows are walked in pk order, one locked batch at a time, written back with bulk_update;
+    the crypto of a batch is split across a process pool when workers > 1. The last pk done per
+    model is checkpointed to `checkpoint` (a JSON file) so an interrupted run resumes there.
+    """
+
+    def __init__(self, secrets, backend='fernet', workers=1, batch_size=1000, checkpoint=None):
+        self.secrets = list(secrets)
+        self.ring = KeyRing(self.secrets, backend)
+        self.target = f'{backend}/{self.ring.primary_id}'
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.state = self._load_checkpoint()
+        self.pool = None
+
+    def _load_checkpoint(self):
+        state = {'key': self.target, 'models': {}}
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as fh:
+                saved = json.load(fh)
+            # A checkpoint written for another key or backend says nothing about this rotation
+            if saved.get('key') == self.target:
+                state = saved
+        return state
+
+    def _save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        partial = self.checkpoint + '.tmp'
+        with open(partial, 'w') as fh:
+            json.dump(self.state, fh)
+        os.replace(partial, self.checkpoint)
+
+    def clear_checkpoint(self):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(self.secrets, self.ring.backend.name),
+            )
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _reencrypt(self, tokens):
+        if not self.pool:
+            return reencrypt_tokens(tokens, self.ring)
+        size = -(-len(tokens) // self.workers)
+        results, unreadable = [], 0
+        for chunk_results, chunk_unreadable in self.pool.map(
+            _reencrypt_chunk, [tokens[i:i + size] for i in range(0, len(tokens), size)]
+        ):
+            results.extend(chunk_results)
+            unreadable += chunk_unreadable
+        return results, unreadable
+
+    def rotate_batch(self, model, after_pk):
+        """Rotates the next batch of `model` rows after `after_pk`; returns (rows, updated, unreadable, last pk)."""
+        names = [f.attname for f in encrypted_fields(model)]
+        raw = [ExpressionWrapper(F(name), output_field=TextField()) for name in names]
+        with transaction.atomic():
+            rows = list(
+                model._base_manager.select_for_update().filter(pk__gt=after_pk)
+                .order_by('pk').values_list('pk', *raw)[:self.batch_size]
+            )
+            if not rows:
+                return 0, 0, 0, after_pk
+            tokens = [token for row in rows for token in row[1:]]
+            results, unreadable = self._reencrypt(tokens)
+
+            changed = []
+            for i, row in enumerate(rows):
+                new = results[i * len(names):(i + 1) * len(names)]
+                if not any(new):
+                    continue
+                obj = model(pk=row[0])
+                for name, token in zip(names, new):
+                    # Expressions go into the UPDATE as they are (no second encryption by the field)
+                    setattr(obj, name, F(name) if token is None else Value(token, output_field=TextField()))
+                changed.append(obj)
+            if changed:
+                model._base_manager.bulk_update(changed, names)
+        return len(rows), len(changed), unreadable, rows[-1][0]
+
+    def rotate(self, model, on_batch=None):
+        """Rotates all of `model` from its checkpoint on; returns (rows, updated, unreadable)."""
+        label = model._meta.label_lower
+        after_pk = self.state['models'].get(label, 0)
+        totals = [0, 0, 0]
+        while True:
+            rows, updated, unreadable, after_pk = self.rotate_batch(model, after_pk)
+            if not rows:
+                break
+            totals = [totals[0] + rows, totals[1] + updated, totals[2] + unreadable]
+            self.state['models'][label] = after_pk
+            self._save_checkpoint()
+            if on_batch:
+                on_batch(model, *totals)
+        return tuple(totals)
@@ -0,0 +1,45 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from coredata.encryption import BACKENDS, KeyRing, decrypted_values
+from coredata.models import Student
+
+ENCRYPTED_FIELDS = ('national_no', 'parent_national_no', 'parent_phone')
+
+def sample_values(limit):
+    """Plain values of the encrypted Student columns (synthetic ones shaped like them when the table is empty)."""
+    rows = decrypted_values(Student.objects.order_by('pk')[:limit], *ENCRYPTED_FIELDS)
+    values = [row[name] for row in rows for name in ENCRYPTED_FIELDS if row[name]]
+    if values:
+        return values
+    rng = random.Random(0)
+    for _ in range(limit):
+        values += [f"2{rng.randrange(10 ** 10):010d}", f"2{rng.randrange(10 ** 10):010d}", f"{rng.choice('3567')}{rng.randrange(10 ** 7):07d}"]
+    return values
+
+class Command(BaseCommand):
+    help = 'Compares the field-encryption backends on Student values: stored size and encrypt / decrypt throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        values = sample_values(options['rows'])
+        plain_size = sum(len(v.encode()) for v in values) / len(values)
+        self.stdout.write(f'{len(values)} values, {plain_size:.1f} bytes plain on average')
+        self.stdout.write(f'{"backend":<20}{"stored bytes":>14}{"encrypt/s":>12}{"decrypt/s":>12}')
+        for name in BACKENDS:
+            ring = KeyRing(['benchmark'], name)
+            start = time.perf_counter()
+            tokens = [ring.encrypt(v) for v in values]
+            encrypt_time = time.perf_counter() - start
+            start = time.perf_counter()
+            plain = ring.decrypt_many(tokens)
+            decrypt_time = time.perf_counter() - start
+            assert plain == values
+            stored = sum(len(t) for t in tokens) / len(tokens)
+            self.stdout.write(
+                f'{name:<20}{stored:>14.1f}{len(values) / encrypt_time:>12.0f}{len(values) / decrypt_time:>12.0f}'
+            )
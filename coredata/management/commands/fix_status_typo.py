@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from coredata.models import OperationalPlanItems
+from coredata.models import OperationalPlanItems, PlanRollup
+from coredata.rollups import rebuild_rollups
 
 class Command(BaseCommand):
     help = 'Fixes typos in status fields (adds Hamza to "لم يتم الانجاز")'
@@ -11,5 +12,8 @@ class Command(BaseCommand):
         # Fix evaluation field (just in case)
         updated_count_evaluation = OperationalPlanItems.objects.filter(evaluation='لم يتم الانجاز').update(evaluation='لم يتم الإنجاز')
 
+        # update() bypasses the save signals, so recount the rollups
+        rebuild_rollups(OperationalPlanItems, PlanRollup)
+
         self.stdout.write(self.style.SUCCESS(f'Successfully updated {updated_count_follow_up} records in follow_up field.'))
         self.stdout.write(self.style.SUCCESS(f'Successfully updated {updated_count_evaluation} records in evaluation field.'))
\ No newline at end of file
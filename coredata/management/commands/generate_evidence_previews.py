@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from coredata.models import EvidenceDocument
+from coredata.previews import PREVIEW_READY, generate_preview
+
+
+class Command(BaseCommand):
+    help = 'Generates the missing thumbnails / first-page previews of the evidence vault documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate previews that already exist too')
+
+    def handle(self, *args, **options):
+        docs = EvidenceDocument.objects.exclude(file='')
+        if not options['all']:
+            docs = docs.exclude(preview_status=PREVIEW_READY)
+        count = 0
+        for pk in docs.values_list('pk', flat=True).iterator():
+            generate_preview(pk)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Previews processed for {count} documents.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from coredata.fragments import reset_row_cache_stats, row_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows the hit/miss counters of the plan table row cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = row_cache_stats()
+        self.stdout.write(
+            f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.1%}"
+        )
+        if options['reset']:
+            reset_row_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
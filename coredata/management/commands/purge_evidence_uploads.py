@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from coredata.chunked_uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes chunked evidence uploads (and their staged files) abandoned for more than --days days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2)
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} abandoned uploads.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from coredata.models import OperationalPlanItems, PlanRollup
+from coredata.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the plan rollup counts (charts and stat cards) from the plan items'
+
+    def handle(self, *args, **options):
+        rebuild_rollups(OperationalPlanItems, PlanRollup)
+        self.stdout.write(self.style.SUCCESS(f'Rollups rebuilt: {PlanRollup.objects.count()} rows.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from coredata.models import OperationalPlanItems
+from coredata.search import install_search_index, refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the normalized search text of all plan items and (re)creates the full-text index'
+
+    def handle(self, *args, **options):
+        refresh_search_documents(OperationalPlanItems)
+        # Idempotent: also restores the SQLite FTS triggers if a table rebuild dropped them
+        with connection.schema_editor() as schema_editor:
+            install_search_index(schema_editor)
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt ({connection.vendor}).'))
@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from coredata.blind_index import refresh_blind_indexes
+from coredata.key_rotation import KeyRotation, encrypted_models
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-encrypts the encrypted columns of every model (Staff, Student and their history) under the first '
+        'FIELD_ENCRYPTION_KEYS key '
+        'and FIELD_ENCRYPTION_BACKEND. '
+        'Resumes from its checkpoint after an interruption.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--old-key', action='append', default=[],
+                            help='A retired key or old SECRET_KEY the current rows may be encrypted with (repeatable)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / 'key_rotation.checkpoint.json'))
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first row')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Recompute the blind indexes afterwards (needed when SECRET_KEY changed without BLIND_INDEX_KEY)')
+
+    def handle(self, *args, **options):
+        secrets = [*settings.FIELD_ENCRYPTION_KEYS, settings.SECRET_KEY, *options['old_key']]
+        rotation = KeyRotation(secrets, settings.FIELD_ENCRYPTION_BACKEND, workers=options['workers'],
+                               batch_size=options['batch_size'], checkpoint=options['checkpoint'])
+        if options['restart']:
+            rotation.clear_checkpoint()
+            rotation.state['models'] = {}
+        self.stdout.write(f'Target {rotation.target}, {options["workers"]} workers.')
+
+        unreadable = 0
+        with rotation:
+            for model in encrypted_models():
+                start = time.perf_counter()
+
+                def progress(model, rows, updated, skipped, start=start):
+                    rate = rows / max(time.perf_counter() - start, 1e-9)
+                    self.stdout.write(f'  {model.__name__}: {rows} rows ({updated} re-encrypted), {rate:.0f} rows/s')
+
+                rows, updated, skipped = rotation.rotate(model, on_batch=progress)
+                elapsed = time.perf_counter() - start
+                rate = rows / elapsed if elapsed else 0
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model.__name__}: {rows} rows, {updated} re-encrypted in {elapsed:.1f}s ({rate:.0f} rows/s).'
+                ))
+                unreadable += skipped
+
+        if unreadable:
+            # The checkpoint is kept: rerun with the missing --old-key and --restart
+            self.stdout.write(self.style.WARNING(
+                f'{unreadable} values are encrypted with a key that was not given; pass it with --old-key.'
+            ))
+        else:
+            rotation.clear_checkpoint()
+
+        if options['reindex']:
+            for model in encrypted_models():
+                duplicates = refresh_blind_indexes(model)
+                self.stdout.write(f'{model.__name__}: blind indexes rebuilt ({duplicates} duplicates left unindexed).')
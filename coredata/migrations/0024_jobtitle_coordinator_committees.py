@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    from coredata.coordinators import rebuild_coordinator_index
+    rebuild_coordinator_index(apps.get_model('coredata', 'JobTitle'), apps.get_model('coredata', 'Committee'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0023_fix_evidencefile_table_name'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='jobtitle',
+            name='coordinator_committees',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='coordinated_job_titles', to='coredata.committee', verbose_name='لجان التنسيق المرتبطة'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    )
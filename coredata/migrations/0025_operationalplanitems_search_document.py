@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def backfill_documents(apps, schema_editor):
+    from coredata.search import refresh_search_documents
+    refresh_search_documents(apps.get_model('coredata', 'OperationalPlanItems'))
+
+
+def install_index(apps, schema_editor):
+    from coredata.search import install_search_index
+    install_search_index(schema_editor)
+
+
+def uninstall_index(apps, schema_editor):
+    from coredata.search import uninstall_search_index
+    uninstall_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0024_jobtitle_coordinator_committees'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='operationalplanitems',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='نص البحث'),
+        ),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    )
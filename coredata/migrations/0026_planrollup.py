@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    from coredata.rollups import rebuild_rollups
+    rebuild_rollups(apps.get_model('coredata', 'OperationalPlanItems'), apps.get_model('coredata', 'PlanRollup'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0025_operationalplanitems_search_document'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='PlanRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank_name', models.CharField(max_length=255, null=True, verbose_name='المجال')),
+                ('status', models.CharField(max_length=50, null=True, verbose_name='حالة البند')),
+                ('follow_up', models.CharField(max_length=255, null=True, verbose_name='حالة المتابعة')),
+                ('evaluation', models.CharField(max_length=255, null=True, verbose_name='التقييم')),
+                ('count', models.IntegerField(default=0, verbose_name='عدد البنود')),
+                ('academic_year', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='coredata.academicyear')),
+                ('evaluator_committee', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='coredata.committee')),
+                ('executor_committee', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='coredata.committee')),
+            ],
+            options={
+                'verbose_name': 'ملخص بنود الخطة',
+                'verbose_name_plural': 'ملخصات بنود الخطة',
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    )
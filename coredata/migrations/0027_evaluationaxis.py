@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+AXIS_COUNT = 6
+
+
+def copy_axes(apps, schema_editor):
+    """axisN_name / axisN_evaluators columns -> one EvaluationAxis row per named axis."""
+    GroupExtension = apps.get_model('coredata', 'GroupExtension')
+    EvaluationAxis = apps.get_model('coredata', 'EvaluationAxis')
+    for ext in GroupExtension.objects.all():
+        for i in range(1, AXIS_COUNT + 1):
+            name = (getattr(ext, f'axis{i}_name') or '').strip()
+            if not name:
+                continue
+            # Two columns with the same name end up as one axis with both evaluator sets
+            axis, _ = EvaluationAxis.objects.get_or_create(group_id=ext.group_id, name=name, defaults={'ordinal': i})
+            axis.evaluators.add(*getattr(ext, f'axis{i}_evaluators').all())
+
+
+def copy_axes_back(apps, schema_editor):
+    GroupExtension = apps.get_model('coredata', 'GroupExtension')
+    EvaluationAxis = apps.get_model('coredata', 'EvaluationAxis')
+    for ext in GroupExtension.objects.all():
+        axes = EvaluationAxis.objects.filter(group_id=ext.group_id).order_by('ordinal')[:AXIS_COUNT]
+        for i, axis in enumerate(axes, start=1):
+            setattr(ext, f'axis{i}_name', axis.name)
+            getattr(ext, f'axis{i}_evaluators').set(axis.evaluators.all())
+        ext.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('coredata', '0026_planrollup'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='EvaluationAxis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255, verbose_name='اسم المحور')),
+                ('ordinal', models.PositiveSmallIntegerField(default=0, verbose_name='الترتيب')),
+                ('evaluators', models.ManyToManyField(blank=True, related_name='evaluation_axes', to=settings.AUTH_USER_MODEL, verbose_name='المقيّمون')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_axes', to='auth.group', verbose_name='المجموعة')),
+            ],
+            options={
+                'verbose_name': 'محور تقييم',
+                'verbose_name_plural': 'محاور التقييم',
+                'ordering': ('group', 'ordinal'),
+                'constraints': (models.UniqueConstraint(fields=('group', 'name'), name='unique_axis_name_per_group'),),
+            },
+        ),
+        migrations.RunPython(copy_axes, copy_axes_back),
+        *(
+            migrations.RemoveField(model_name='groupextension', name=f'axis{i}_{suffix}')
+            for i in range(1, AXIS_COUNT + 1)
+            for suffix in ('name', 'evaluators')
+        ),
+    )
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def backfill_documents(apps, schema_editor):
+    from coredata.vault import refresh_vault_documents
+    refresh_vault_documents(apps.get_model('coredata', 'EvidenceDocument').objects.all())
+
+
+def install_index(apps, schema_editor):
+    from coredata.vault import install_vault_index
+    install_vault_index(schema_editor)
+
+
+def uninstall_index(apps, schema_editor):
+    from coredata.vault import uninstall_vault_index
+    uninstall_vault_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0027_evaluationaxis'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='evidencedocument',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='نص البحث'),
+        ),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    )
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0028_evidencedocument_search_document'),
+    )
+
+    operations = (
+        migrations.AlterField(
+            model_name='evidencedocument',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True, verbose_name='بصمة الملف (SHA-256)'),
+        ),
+    )
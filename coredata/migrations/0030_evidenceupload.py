@@ -0,0 +1,35 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('coredata', '0029_evidencedocument_file_hash_index'),
+    )
+
+    operations = (
+        migrations.CreateModel(
+            name='EvidenceUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255, verbose_name='عنوان الملف')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='وصف الملف')),
+                ('filename', models.CharField(max_length=255, verbose_name='اسم الملف الأصلي')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='الحجم الكلي (بايت)')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='المستلم (بايت)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ البدء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')),
+                ('plan_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='coredata.operationalplanitems')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'رفع دليل جارٍ',
+                'verbose_name_plural': 'عمليات رفع الأدلة الجارية',
+            },
+        ),
+    )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0030_evidenceupload'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='evidencedocument',
+            name='preview',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='evidence_vault/previews/', verbose_name='المعاينة'),
+        ),
+        migrations.AddField(
+            model_name='evidencedocument',
+            name='preview_status',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='حالة المعاينة'),
+        ),
+    )
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+import coredata.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0031_evidencedocument_preview'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='evidencedocument',
+            name='original_file',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to=coredata.models.get_evidence_upload_path, verbose_name='الملف الأصلي'),
+        ),
+        migrations.AddField(
+            model_name='evidencedocument',
+            name='bytes_saved',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='الحجم الموفر (بايت)'),
+        ),
+    )
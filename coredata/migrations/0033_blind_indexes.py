@@ -0,0 +1,91 @@
+from django.db import migrations
+
+import coredata.blind_index
+import coredata.models
+
+# (model, index field, source field, unique)
+BLIND_INDEXES = [
+    ('staff', 'national_no_index', 'national_no', True),
+    ('staff', 'phone_no_index', 'phone_no', False),
+    ('staff', 'account_no_index', 'account_no', False),
+    ('student', 'national_no_index', 'national_no', True),
+    ('student', 'parent_national_no_index', 'parent_national_no', False),
+    ('student', 'parent_phone_index', 'parent_phone', False),
+]
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Stops before any change when a value meant to be unique is stored twice (earlier imports
+    created such rows: the encrypted unique=True never matched). Indexing only one copy would
+    leave the others unreachable by filter()/update_or_create(), so they are merged first.
+    """
+    from coredata.blind_index import duplicate_values
+    problems = []
+    for model_name in ('Staff', 'Student'):
+        sources = [source for model, name, source, unique in BLIND_INDEXES if model == model_name.lower() and unique]
+        for source, groups in duplicate_values(apps.get_model('coredata', model_name), sources).items():
+            problems += [f"{model_name}.{source}: pk {', '.join(map(str, pks))}" for pks in groups]
+    if problems:
+        raise RuntimeError(
+            "Duplicated values block the unique blind indexes. Merge each group into one row "
+            "(or delete the extra copies), then run migrate again:\n  " + "\n  ".join(problems)
+        )
+
+
+def backfill_indexes(apps, schema_editor):
+    from coredata.blind_index import refresh_blind_indexes
+    for model_name in ('Staff', 'Student'):
+        # Not unique yet at this point of the migration: name the indexes that will be
+        unique = [name for model, name, source, is_unique in BLIND_INDEXES if model == model_name.lower() and is_unique]
+        refresh_blind_indexes(apps.get_model('coredata', model_name), unique=unique)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('coredata', '0032_evidencedocument_image_optimization'),
+    )
+
+    operations = (
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        # Uniqueness moves from the (non-deterministic) ciphertext to the blind index
+        migrations.AlterField(
+            model_name='staff',
+            name='national_no',
+            field=coredata.models.EncryptedCharField(blank=True, null=True, verbose_name='الرقم الوطني'),
+        ),
+        migrations.AlterField(
+            model_name='historicalstaff',
+            name='national_no',
+            field=coredata.models.EncryptedCharField(blank=True, null=True, verbose_name='الرقم الوطني'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='national_no',
+            field=coredata.models.EncryptedCharField(verbose_name='الرقم الشخصي (QID)'),
+        ),
+        migrations.AlterField(
+            model_name='historicalstudent',
+            name='national_no',
+            field=coredata.models.EncryptedCharField(verbose_name='الرقم الشخصي (QID)'),
+        ),
+        *[
+            migrations.AddField(
+                model_name=prefix + model_name,
+                name=name,
+                field=coredata.blind_index.BlindIndexField(db_index=True, source=source),
+            )
+            for prefix in ('', 'historical')
+            for model_name, name, source, unique in BLIND_INDEXES
+        ],
+        migrations.RunPython(backfill_indexes, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name=name,
+                field=coredata.blind_index.BlindIndexField(source=source, unique=True),
+            )
+            for model_name, name, source, unique in BLIND_INDEXES if unique
+        ],
+    )
@@ -1,48 +1,71 @@
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.db.models import Max
+from simple_history.manager import HistoricalQuerySet
 from simple_history.models import HistoricalRecords
 import datetime
-import hashlib
-import base64
 import os
 import uuid
 import io
 from PIL import Image
 from django.core.files.base import ContentFile
-from cryptography.fernet import Fernet
 from django.contrib.auth.models import Group
-
-# --- LAZY KEY LOADING ---
-# This function will only be called when the Fernet key is needed,
-# not when the models.py file is first loaded.
-def get_fernet():
-    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-    return Fernet(base64.urlsafe_b64encode(key))
+from .encryption import Ciphertext, EncryptedAttribute, PlainValuesMixin, decrypt, encrypt
+from .blind_index import BlindIndexExact, BlindIndexField, BlindIndexIExact, BlindIndexIn, BlindIndexUniqueMixin
+from .search import SEARCH_FIELDS, build_search_document
+from .image_optimization import optimize_upload
+from .previews import PREVIEW_PENDING, schedule_preview
+from .uploads import capture_upload
+from .vault import VAULT_SEARCH_FIELDS, build_vault_document
 
 class EncryptedCharField(models.TextField):
     """
     An encrypted text field.
-    The encryption key is derived from settings.SECRET_KEY and loaded lazily.
+    Ciphers come from the process-level key ring (see encryption.py), built once per key.
+    Values load still encrypted and are decrypted only when read (EncryptedAttribute);
+    a value that was never read is written back as the same ciphertext on save.
     """
+    descriptor_class = EncryptedAttribute
+
     def from_db_value(self, value, expression, connection):
         if value is None:
             return value
-        try:
-            return get_fernet().decrypt(value.encode()).decode()
-        except Exception:
-            return value  # Fallback if not encrypted or key changed
+        return Ciphertext(value)
 
     def to_python(self, value):
         if value is None or isinstance(value, str):
             return value
-        return get_fernet().decrypt(value.encode()).decode()
+        if isinstance(value, Ciphertext):
+            return value.plain
+        return decrypt(value)
+
+    def pre_save(self, model_instance, add):
+        # Read __dict__ directly: going through the attribute would decrypt an untouched value
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, Ciphertext):
+            return value
+        return super().pre_save(model_instance, add)
 
     def get_prep_value(self, value):
         if value is None:
             return value
-        return get_fernet().encrypt(str(value).encode()).decode()
+        if isinstance(value, Ciphertext):
+            return value.token
+        return encrypt(str(value))
+
+# Exact / in filters on an encrypted field are answered from its BlindIndexField (see blind_index.py)
+EncryptedCharField.register_lookup(BlindIndexExact)
+EncryptedCharField.register_lookup(BlindIndexIExact)
+EncryptedCharField.register_lookup(BlindIndexIn)
+
+
+class EncryptedQuerySet(PlainValuesMixin, models.QuerySet):
+    """QuerySet of a model with encrypted fields: values()/values_list() return decrypted str."""
+
+
+class EncryptedHistoricalQuerySet(PlainValuesMixin, HistoricalQuerySet):
+    """The same for the simple_history copies."""
 
 
 # --- MODELS ---
@@ -53,6 +76,8 @@ class JobTitle(models.Model):
     description = models.TextField("الوصف", blank=True, null=True)
     groups = models.ManyToManyField(Group, blank=True, related_name="job_titles", verbose_name="مجموعات الصلاحيات")
     is_canonical = models.BooleanField("مسمى معتمد/رئيسي", default=False)
+    # Precomputed index (see coordinators.py): the "منسق <subject>" committees matching this title
+    coordinator_committees = models.ManyToManyField("Committee", blank=True, editable=False, related_name="coordinated_job_titles", verbose_name="لجان التنسيق المرتبطة")
     created_at = models.DateTimeField("تاريخ الإنشاء", auto_now_add=True, null=True)
     updated_at = models.DateTimeField("آخر تحديث", auto_now=True, null=True)
     history = HistoricalRecords()
@@ -78,7 +103,7 @@ class EvidenceFile(models.Model):
         verbose_name = "تصنيف دليل"
         verbose_name_plural = "تصنيفات الأدلة"
 
-class Staff(models.Model):
+class Staff(BlindIndexUniqueMixin, models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="staff_profile")
     job_title = models.ForeignKey(JobTitle, on_delete=models.SET_NULL, null=True, blank=True, related_name="staff_members")
     name = models.CharField("الاسم", max_length=255, db_index=True)
@@ -86,12 +111,18 @@ class Staff(models.Model):
     nationality = models.CharField("الجنسية", max_length=10, choices=[('QA', 'قطري'), ('EXP', 'مقيم')], default='EXP', db_index=True)
     job_number = models.CharField("الرقم الوظيفي", max_length=50, blank=True, null=True, unique=True, db_index=True)
     email = models.EmailField("البريد الإلكتروني", max_length=254, blank=True, null=True, unique=True, db_index=True)
-    national_no = EncryptedCharField("الرقم الوطني", blank=True, null=True, unique=True)
+    national_no = EncryptedCharField("الرقم الوطني", blank=True, null=True)
     phone_no = EncryptedCharField("رقم الجوال", blank=True, null=True)
     account_no = EncryptedCharField("رقم الحساب", blank=True, null=True)
+    # Blind indexes of the encrypted fields: equality lookups and uniqueness (see blind_index.py)
+    national_no_index = BlindIndexField(source='national_no', unique=True)
+    phone_no_index = BlindIndexField(source='phone_no', db_index=True)
+    account_no_index = BlindIndexField(source='account_no', db_index=True)
     created_at = models.DateTimeField("تاريخ الإنشاء", auto_now_add=True, null=True)
     updated_at = models.DateTimeField("آخر تحديث", auto_now=True, null=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(historical_queryset=EncryptedHistoricalQuerySet)
+
+    objects = EncryptedQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -170,15 +201,46 @@ class EvidenceDocument(models.Model):
     file = models.FileField("الملف", upload_to=get_evidence_upload_path)
     original_filename = models.CharField("اسم الملف الأصلي", max_length=255, blank=True, null=True, editable=False)
     file_size = models.PositiveIntegerField("حجم الملف (بايت)", blank=True, null=True, editable=False)
-    file_hash = models.CharField("بصمة الملف (SHA-256)", max_length=64, blank=True, null=True, editable=False)
+    file_hash = models.CharField("بصمة الملف (SHA-256)", max_length=64, blank=True, null=True, editable=False, db_index=True)
     tags = models.CharField("الوسوم (Tags)", max_length=255, blank=True, null=True)
     description = models.TextField("وصف الملف", blank=True, null=True)
+    # Photo uploads are optimized on save (see image_optimization.py); the original is kept only if configured
+    original_file = models.FileField("الملف الأصلي", upload_to=get_evidence_upload_path, blank=True, null=True, editable=False)
+    bytes_saved = models.PositiveIntegerField("الحجم الموفر (بايت)", blank=True, null=True, editable=False)
+    # Thumbnail / first-page raster stored next to the file (see previews.py)
+    preview = models.FileField("المعاينة", upload_to='evidence_vault/previews/', blank=True, null=True, editable=False)
+    preview_status = models.CharField("حالة المعاينة", max_length=20, blank=True, default="", editable=False)
+    # Normalized title/tags/file name/owner, matched by the vault autocomplete (see vault.py)
+    search_document = models.TextField("نص البحث", blank=True, default="", editable=False)
     created_at = models.DateTimeField("تاريخ الرفع", auto_now_add=True)
     updated_at = models.DateTimeField("آخر تحديث", auto_now=True)
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        new_upload = bool(self.file) and not self.file._committed
+        if new_upload:
+            optimize_upload(self)
+            # New upload: size/hash in one pass, reusing the stored blob of identical content
+            capture_upload(self)
+            self.preview, self.preview_status = None, PREVIEW_PENDING
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'file', 'original_file', 'bytes_saved',
+                    'original_filename', 'file_size', 'file_hash', 'preview', 'preview_status',
+                }
+        self.search_document = build_vault_document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & {*VAULT_SEARCH_FIELDS, 'user'}:
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
+        if new_upload:
+            schedule_preview(self.pk)
+
     class Meta:
+        db_table = 'evidence_documents'
         verbose_name = "وثيقة دليل"
         verbose_name_plural = "مستودع الأدلة"
 
@@ -207,19 +269,62 @@ class OperationalPlanItems(models.Model):
     status = models.CharField("حالة البند", max_length=50, choices=[("Draft", "مسودة"), ("In Progress", "جاري التنفيذ"), ("Pending Review", "بانتظار المراجعة"), ("Completed", "مكتمل"), ("Returned", "مرفوض")], default="In Progress", blank=True, null=True, db_index=True)
     executor_committee = models.ForeignKey(Committee, on_delete=models.SET_NULL, verbose_name="اللجنة المنفذة", related_name="executed_plan_items", blank=True, null=True)
     evaluator_committee = models.ForeignKey(Committee, on_delete=models.SET_NULL, verbose_name="اللجنة المقيمة", related_name="evaluated_plan_items", blank=True, null=True)
+    # Arabic-normalized text of SEARCH_FIELDS, indexed by the full-text search (see search.py)
+    search_document = models.TextField("نص البحث", blank=True, default="", editable=False)
     created_at = models.DateTimeField("تاريخ الإنشاء", auto_now_add=True, null=True)
     updated_at = models.DateTimeField("آخر تحديث", auto_now=True, null=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=['search_document'])
 
     def __str__(self):
         return self.code or f"بند {self.id}"
+
+    def save(self, *args, **kwargs):
+        self.search_document = build_search_document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(SEARCH_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        # The post_save handlers (rollup counts) run inside the same transaction as the row write
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     class Meta:
         db_table = 'coredata_operationalplanitems'
         verbose_name = "بند خطة تشغيلية"
         verbose_name_plural = "بنود الخطة التشغيلية"
 
-class Student(models.Model):
-    national_no = EncryptedCharField("الرقم الشخصي (QID)", unique=True)
+class EvidenceUpload(models.Model):
+    """A chunked (resumable) evidence upload in progress; chunks are staged on disk (see chunked_uploads.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    plan_item = models.ForeignKey(OperationalPlanItems, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    title = models.CharField("عنوان الملف", max_length=255)
+    description = models.TextField("وصف الملف", blank=True, null=True)
+    filename = models.CharField("اسم الملف الأصلي", max_length=255)
+    total_size = models.PositiveBigIntegerField("الحجم الكلي (بايت)")
+    received = models.PositiveBigIntegerField("المستلم (بايت)", default=0)
+    created_at = models.DateTimeField("تاريخ البدء", auto_now_add=True)
+    updated_at = models.DateTimeField("آخر تحديث", auto_now=True)
+
+    class Meta:
+        verbose_name = "رفع دليل جارٍ"
+        verbose_name_plural = "عمليات رفع الأدلة الجارية"
+
+class PlanRollup(models.Model):
+    """Plan item counts per combination of the reporting dimensions, kept current on save (see rollups.py)."""
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, null=True, related_name="+")
+    executor_committee = models.ForeignKey(Committee, on_delete=models.SET_NULL, null=True, related_name="+")
+    evaluator_committee = models.ForeignKey(Committee, on_delete=models.SET_NULL, null=True, related_name="+")
+    rank_name = models.CharField("المجال", max_length=255, null=True)
+    status = models.CharField("حالة البند", max_length=50, null=True)
+    follow_up = models.CharField("حالة المتابعة", max_length=255, null=True)
+    evaluation = models.CharField("التقييم", max_length=255, null=True)
+    count = models.IntegerField("عدد البنود", default=0)
+
+    class Meta:
+        verbose_name = "ملخص بنود الخطة"
+        verbose_name_plural = "ملخصات بنود الخطة"
+
+class Student(BlindIndexUniqueMixin, models.Model):
+    national_no = EncryptedCharField("الرقم الشخصي (QID)")
     name_ar = models.CharField("اسم الطالب (عربي)", max_length=255)
     name_en = models.CharField("اسم الطالب (إنجليزي)", max_length=255, blank=True, null=True)
     date_of_birth = models.DateField("تاريخ الميلاد", blank=True, null=True)
@@ -231,9 +336,15 @@ class Student(models.Model):
     parent_relation = models.CharField("صلة القرابة", max_length=50, blank=True, null=True)
     parent_phone = EncryptedCharField("رقم هاتف ولي الأمر", blank=True, null=True)
     parent_email = models.EmailField("بريد ولي الأمر", blank=True, null=True)
+    # Blind indexes of the encrypted fields: equality lookups and uniqueness (see blind_index.py)
+    national_no_index = BlindIndexField(source='national_no', unique=True)
+    parent_national_no_index = BlindIndexField(source='parent_national_no', db_index=True)
+    parent_phone_index = BlindIndexField(source='parent_phone', db_index=True)
     created_at = models.DateTimeField("تاريخ الإضافة", auto_now_add=True)
     updated_at = models.DateTimeField("آخر تحديث", auto_now=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(historical_queryset=EncryptedHistoricalQuerySet)
+
+    objects = EncryptedQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name_ar} ({self.grade}/{self.section})"
@@ -245,18 +356,21 @@ class Student(models.Model):
 
 class GroupExtension(models.Model):
     group = models.OneToOneField(Group, on_delete=models.CASCADE, related_name='extension')
-    axis1_name = models.CharField("اسم المحور 1", max_length=255, blank=True, default="المحور الأول")
-    axis1_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis1_groups', verbose_name="مقيّمين محور 1", blank=True)
-    axis2_name = models.CharField("اسم المحور 2", max_length=255, blank=True, default="المحور الثاني")
-    axis2_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis2_groups', verbose_name="مقيّمين محور 2", blank=True)
-    axis3_name = models.CharField("اسم المحور 3", max_length=255, blank=True, default="المحور الثالث")
-    axis3_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis3_groups', verbose_name="مقيّمين محور 3", blank=True)
-    axis4_name = models.CharField("اسم المحور 4", max_length=255, blank=True, default="المحور الرابع")
-    axis4_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis4_groups', verbose_name="مقيّمين محور 4", blank=True)
-    axis5_name = models.CharField("اسم المحور 5", max_length=255, blank=True, default="المحور الخامس")
-    axis5_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis5_groups', verbose_name="مقيّمين محور 5", blank=True)
-    axis6_name = models.CharField("اسم المحور 6", max_length=255, blank=True, default="المحور السادس")
-    axis6_evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='axis6_groups', verbose_name="مقيّمين محور 6", blank=True)
 
     def __str__(self):
-        return f"Extension for {self.group.name}"
\ No newline at end of file
+        return f"Extension for {self.group.name}"
+
+class EvaluationAxis(models.Model):
+    """An evaluation axis of a committee group; plan items belong to it through rank_name == name."""
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='evaluation_axes', verbose_name="المجموعة")
+    name = models.CharField("اسم المحور", max_length=255, db_index=True)
+    ordinal = models.PositiveSmallIntegerField("الترتيب", default=0)
+    evaluators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='evaluation_axes', verbose_name="المقيّمون", blank=True)
+
+    def __str__(self):
+        return self.name
+    class Meta:
+        ordering = ('group', 'ordinal')
+        constraints = (models.UniqueConstraint(fields=['group', 'name'], name='unique_axis_name_per_group'),)
+        verbose_name = "محور تقييم"
+        verbose_name_plural = "محاور التقييم"
\ No newline at end of file
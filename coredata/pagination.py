@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import F, Q
+
+# Off PostgreSQL the results counter is an exact count, reused for this long
+ESTIMATE_CACHE_TIMEOUT = 60
+
+
+def encode_cursor(field, value, pk, direction):
+    """Builds an opaque, URL-safe cursor token for a (sort value, id) position."""
+    raw = json.dumps({'f': field, 'v': value, 'pk': pk, 'd': direction}, ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns the cursor dict, or None if the token is missing or malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if data.get('d') not in ('next', 'prev') or not isinstance(data.get('pk'), int):
+            return None
+        return data
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def estimate_count(queryset):
+    """
+    Cheap row-count estimate for large result sets.
+    On PostgreSQL we read the planner estimate (EXPLAIN, no execution); elsewhere the exact COUNT(*)
+    is cached per query for ESTIMATE_CACHE_TIMEOUT seconds, so paging does not recount every page.
+    """
+    try:
+        sql, params = queryset.order_by().values('id').query.sql_with_params()
+    except EmptyResultSet:
+        return 0  # A filter that can match nothing (e.g. pk__in=[]) compiles to no SQL at all
+    if connection.vendor != 'postgresql':
+        key = 'plan:count:' + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, ESTIMATE_CACHE_TIMEOUT)
+    with connection.cursor() as cur:
+        cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _ordering(field, descending):
+    # (field ASC NULLS FIRST, id ASC) and its exact reverse, so cursors work in both directions
+    if descending:
+        return [F(field).desc(nulls_last=True), '-id']
+    return [F(field).asc(nulls_first=True), 'id']
+
+
+def _after(field, value, pk, descending):
+    """Q matching rows strictly after (value, pk) in the ordering returned by _ordering()."""
+    if not descending:
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'id__gt': pk}) | Q(**{f'{field}__isnull': False})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})
+    if value is None:
+        return Q(**{f'{field}__isnull': True, 'id__lt': pk})
+    return Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}) | Q(**{f'{field}__isnull': True})
+
+
+def _value(row, name):
+    # Pages may hold model instances or values() dicts
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+class KeysetPage:
+    """
+    A page of results addressed by cursors instead of page numbers.
+    Iterable like a Paginator page so the table template can loop over it.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, field, has_next, has_previous, estimated_count=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.estimated_count = estimated_count
+        self.next_cursor = None
+        self.previous_cursor = None
+        if object_list:
+            first, last = object_list[0], object_list[-1]
+            if has_next:
+                self.next_cursor = encode_cursor(field, _value(last, field), _value(last, 'id'), 'next')
+            if has_previous:
+                self.previous_cursor = encode_cursor(field, _value(first, field), _value(first, 'id'), 'prev')
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, field, descending=False, cursor=None, per_page=25, with_estimate=True):
+    """
+    Returns a KeysetPage of `per_page` rows ordered by (field, id).
+
+    Each page is a single indexed range query (`WHERE (field, id) > cursor LIMIT n+1`),
+    so its cost does not depend on how deep the user has paged; there is no OFFSET scan
+    and no exact COUNT(*) (an optional estimate is used for the results counter).
+    """
+    data = decode_cursor(cursor)
+    if data and data.get('f') != field:
+        data = None  # Sort changed since the cursor was issued: restart from the top
+
+    backwards = bool(data and data['d'] == 'prev')
+    qs = queryset.order_by(*_ordering(field, descending != backwards))
+    if data:
+        qs = qs.filter(_after(field, data['v'], data['pk'], descending != backwards))
+
+    rows = list(qs[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, data is not None
+
+    estimated = estimate_count(queryset) if with_estimate else None
+    return KeysetPage(rows, field, has_next, has_previous, estimated)
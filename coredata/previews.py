@@ -0,0 +1,107 @@
+import io
+import logging
+import os
+
+import pymupdf
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (480, 480)
+PREVIEW_QUALITY = 80
+# The pending fragment re-polls every 2s; after this many polls (no worker picked the job up) it gives up
+PREVIEW_MAX_POLLS = 30
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+
+PREVIEW_PENDING = 'pending'
+PREVIEW_READY = 'ready'
+PREVIEW_UNAVAILABLE = 'unavailable'
+
+
+def preview_name(file_name):
+    """Previews are stored next to the file: evidence_vault/.../abc123.pdf -> .../abc123.preview.jpg"""
+    return f'{os.path.splitext(file_name)[0]}.preview.jpg'
+
+
+def _first_page(fh):
+    doc = pymupdf.open(stream=fh.read(), filetype='pdf')
+    try:
+        if not doc.page_count:
+            return None
+        # Rendered at a scale that is just large enough for the preview box
+        page = doc[0]
+        scale = max(PREVIEW_SIZE) / max(page.rect.width, page.rect.height, 1)
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(scale, scale), alpha=False)
+        return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    finally:
+        doc.close()
+
+
+def render_preview(fh, file_name):
+    """JPEG bytes of the preview of an open file, or None when the type has no preview."""
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        image = ImageOps.exif_transpose(Image.open(fh))
+    elif ext == '.pdf':
+        image = _first_page(fh)
+    else:
+        return None
+    if image is None:
+        return None
+    image = image.convert('RGB')
+    image.thumbnail(PREVIEW_SIZE)
+    out = io.BytesIO()
+    image.save(out, format='JPEG', quality=PREVIEW_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def generate_preview(document_id):
+    """Builds the preview of one evidence document (run by the Celery task or inline)."""
+    from .models import EvidenceDocument
+
+    doc = EvidenceDocument.objects.filter(pk=document_id).only('id', 'file').first()
+    if doc is None or not doc.file:
+        return
+    documents = EvidenceDocument.objects.filter(pk=doc.pk)
+
+    # Deduplicated documents share the blob, and so its preview
+    shared = (
+        EvidenceDocument.objects.filter(file=doc.file.name, preview_status=PREVIEW_READY)
+        .exclude(pk=doc.pk).values_list('preview', flat=True).first()
+    )
+    if shared:
+        documents.update(preview=shared, preview_status=PREVIEW_READY)
+        return
+
+    try:
+        with doc.file.open('rb') as fh:
+            data = render_preview(fh, doc.file.name)
+    except Exception:
+        logger.exception("Preview generation failed for evidence document %s", doc.pk)
+        data = None
+    if data is None:
+        documents.update(preview_status=PREVIEW_UNAVAILABLE)
+        return
+
+    storage = EvidenceDocument._meta.get_field('preview').storage
+    name = preview_name(doc.file.name)
+    if storage.exists(name):
+        storage.delete(name)
+    name = storage.save(name, ContentFile(data))
+    documents.update(preview=name, preview_status=PREVIEW_READY)
+
+
+def schedule_preview(document_id):
+    """
+    Queues the preview once the current transaction commits: as a Celery task when a broker
+    is configured (CELERY_BROKER_URL), otherwise inline in this process.
+    """
+    if settings.CELERY_BROKER_URL:
+        from .tasks import generate_evidence_preview
+
+        transaction.on_commit(lambda: generate_evidence_preview.delay(document_id))
+    else:
+        transaction.on_commit(lambda: generate_preview(document_id))
@@ -0,0 +1,73 @@
+from django.db.models import F
+from django.db.models.functions import Substr
+
+from .models import EvidenceDocument, OperationalPlanItems
+
+# Short columns shown (or sorted on) in the plan table
+PLAN_ROW_FIELDS = (
+    'id', 'code', 'rank_name', 'executor', 'date_range', 'follow_up', 'evaluation', 'status',
+    'evidence_source_employee', 'evidence_source_file', 'evidence_requested',
+    'executor_committee_id', 'evaluator_committee_id', 'evidence_document_id', 'updated_at',
+)
+
+# Long text columns: only a prefix is read, cut in SQL (one extra char tells us the text was longer)
+PLAN_ROW_PREVIEWS = {
+    'procedure': 300,
+    'evaluation_notes': 50,
+}
+
+_STATUS_LABELS = dict(OperationalPlanItems._meta.get_field('status').choices)
+
+
+class PlanRow:
+    """
+    A plan table row: only the displayed columns, no model instance.
+    Exposes the same attribute names the row template uses on OperationalPlanItems.
+    """
+    __slots__ = (*PLAN_ROW_FIELDS, *PLAN_ROW_PREVIEWS, 'evidence_file', 'can_execute', 'can_evaluate')
+
+    def __init__(self, values):
+        for name in PLAN_ROW_FIELDS:
+            setattr(self, name, values.get(name))
+        for name, length in PLAN_ROW_PREVIEWS.items():
+            text = values.get(f'{name}_preview')
+            if text and len(text) > length:
+                text = text[:length] + '…'
+            setattr(self, name, text)
+        self.evidence_file = values.get('evidence_file')
+        self.can_execute = self.can_evaluate = False
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_status_display(self):
+        return _STATUS_LABELS.get(self.status, self.status)
+
+    @property
+    def evidence_url(self):
+        if not self.evidence_file:
+            return ''
+        return EvidenceDocument._meta.get_field('file').storage.url(self.evidence_file)
+
+
+def project_plan_rows(queryset):
+    """
+    Narrows a plan item queryset to the table columns: a values() queryset of plain dicts.
+    Filtering, ordering and slicing still work on it; wrap the fetched dicts with PlanRow.
+    """
+    return queryset.values(
+        *PLAN_ROW_FIELDS,
+        evidence_file=F('evidence_document__file'),
+        **{f'{name}_preview': Substr(name, 1, length + 1) for name, length in PLAN_ROW_PREVIEWS.items()},
+    )
+
+
+def plan_rows(values):
+    """Wraps a page of fetched values() dicts as PlanRow objects."""
+    return [PlanRow(v) for v in values]
+
+
+def get_plan_row(pk):
+    """Single projected row, e.g. to redraw one table row after an HTMX save."""
+    return PlanRow(project_plan_rows(OperationalPlanItems.objects.filter(pk=pk)).get())
@@ -0,0 +1,78 @@
+import uuid
+
+from django.core.cache import cache
+
+# Bumped (replaced) whenever committee membership or plan-item committee assignments change.
+# Every worker builds its keys from the shared version, so one bump invalidates all of them.
+ROLES_VERSION_KEY = 'plan:roles:version'
+ROLES_TIMEOUT = 60 * 60
+
+
+class UserRoles:
+    """Committee membership, plan role flags and job-title coordinator committees of one user."""
+    __slots__ = ('committee_ids', 'coordinator_committee_ids', 'is_evaluator_role', 'is_executor_role')
+
+    def __init__(self, committee_ids=(), is_executor_role=False, is_evaluator_role=False, coordinator_committee_ids=()):
+        self.committee_ids = frozenset(committee_ids)
+        self.is_executor_role = is_executor_role
+        self.is_evaluator_role = is_evaluator_role
+        self.coordinator_committee_ids = frozenset(coordinator_committee_ids)
+
+
+def roles_version():
+    version = cache.get(ROLES_VERSION_KEY)
+    if version is None:
+        cache.add(ROLES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(ROLES_VERSION_KEY)
+    return version
+
+
+def invalidate_roles():
+    """Drops every cached UserRoles (called from the signal handlers)."""
+    cache.set(ROLES_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_user_roles(user):
+    """
+    Returns the UserRoles of `user`, served from the cache when possible.
+    The result is also memoized on the user object, so a request pays at most one cache hit.
+    """
+    if not user.is_authenticated:
+        return UserRoles()
+    roles = getattr(user, '_plan_roles', None)
+    if roles is not None:
+        return roles
+
+    key = f'plan:roles:{roles_version()}:{user.pk}'
+    cached = cache.get(key)
+    if cached is None:
+        from .models import JobTitle, OperationalPlanItems
+
+        committee_ids = tuple(user.committees.values_list('id', flat=True))
+        is_executor_role = is_evaluator_role = False
+        if committee_ids:
+            is_executor_role = OperationalPlanItems.objects.filter(executor_committee__in=committee_ids).exists()
+            is_evaluator_role = OperationalPlanItems.objects.filter(evaluator_committee__in=committee_ids).exists()
+        # Coordinator committees of the user's job title, from the precomputed index
+        coordinator_committee_ids = tuple(
+            JobTitle.coordinator_committees.through.objects
+            .filter(jobtitle__staff_members__user=user)
+            .values_list('committee_id', flat=True)
+        )
+        cached = (committee_ids, is_executor_role, is_evaluator_role, coordinator_committee_ids)
+        cache.set(key, cached, ROLES_TIMEOUT)
+
+    user._plan_roles = roles = UserRoles(*cached)
+    return roles
+
+
+def set_row_permissions(items, user):
+    """
+    Sets `can_execute` / `can_evaluate` on each plan item for the row template.
+    Works on ids only, so no committee is loaded per row; returns the items for chaining.
+    """
+    roles = get_user_roles(user)
+    for item in items:
+        item.can_execute = user.is_superuser or item.executor_committee_id in roles.committee_ids
+        item.can_evaluate = user.is_superuser or item.evaluator_committee_id in roles.committee_ids
+    return items
@@ -0,0 +1,101 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+# Plan item columns (attnames) the rollup counts are grouped by
+ROLLUP_FIELDS = (
+    'academic_year_id', 'executor_committee_id', 'evaluator_committee_id',
+    'rank_name', 'status', 'follow_up', 'evaluation',
+)
+
+
+def rollup_key(item):
+    """The rollup dimensions of a plan item as loaded, or None if any of them is deferred."""
+    values = item.__dict__
+    if any(f not in values for f in ROLLUP_FIELDS):
+        return None
+    return tuple(values[f] for f in ROLLUP_FIELDS)
+
+
+def apply_rollup_change(old_key, new_key):
+    """
+    Moves one item from the `old_key` bucket to the `new_key` bucket.
+    old_key=None means the item was created, new_key=None that it was deleted.
+    """
+    apply_rollup_changes([(old_key, new_key)])
+
+
+def apply_rollup_changes(changes):
+    """Applies many (old_key, new_key) moves with one UPDATE (or INSERT) per affected bucket."""
+    from .models import PlanRollup
+
+    deltas = Counter()
+    for old_key, new_key in changes:
+        if old_key == new_key:
+            continue
+        if old_key is not None:
+            deltas[old_key] -= 1
+        if new_key is not None:
+            deltas[new_key] += 1
+
+    with transaction.atomic():
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            bucket = dict(zip(ROLLUP_FIELDS, key))
+            rows = PlanRollup.objects.filter(**bucket)
+            if delta > 0:
+                pk = rows.values_list('pk', flat=True).first()
+                if pk is not None:
+                    PlanRollup.objects.filter(pk=pk).update(count=F('count') + delta)
+                else:
+                    # A concurrent insert may add a twin row; harmless, readers sum the counts
+                    PlanRollup.objects.create(count=delta, **bucket)
+                continue
+            # Take the decrement from the bucket's rows (twins included) without going below zero
+            remaining = -delta
+            for pk, count in rows.filter(count__gt=0).select_for_update().values_list('pk', 'count'):
+                take = min(count, remaining)
+                PlanRollup.objects.filter(pk=pk).update(count=F('count') - take)
+                remaining -= take
+                if not remaining:
+                    break
+            if remaining:
+                recount_bucket(bucket)  # The counts had drifted: rebuild this bucket from the items
+
+
+def recount_bucket(bucket):
+    """Replaces the rollup rows of one bucket with a single row counted from the plan items."""
+    from .models import OperationalPlanItems, PlanRollup
+
+    with transaction.atomic():
+        PlanRollup.objects.filter(**bucket).delete()
+        count = OperationalPlanItems.objects.filter(**bucket).count()
+        if count:
+            PlanRollup.objects.create(count=count, **bucket)
+
+
+def rebuild_rollups(OperationalPlanItems, PlanRollup):
+    """Recomputes every rollup row from the plan items (models passed in so migrations can use it)."""
+    rows = OperationalPlanItems.objects.order_by().values(*ROLLUP_FIELDS).annotate(_count=Count('id'))
+    with transaction.atomic():
+        PlanRollup.objects.all().delete()
+        PlanRollup.objects.bulk_create([PlanRollup(count=row.pop('_count'), **row) for row in rows])
+
+
+def rollup_counts(field, **filters):
+    """[(value, count), ...] of one dimension, largest first, over the rollup rows matching `filters`."""
+    from .models import PlanRollup
+
+    rows = (
+        PlanRollup.objects.filter(**filters)
+        .values(field).annotate(total=Sum('count')).filter(total__gt=0).order_by('-total', field)
+    )
+    return [(row[field], row['total']) for row in rows]
+
+
+def rollup_total(**filters):
+    from .models import PlanRollup
+
+    return PlanRollup.objects.filter(**filters).aggregate(total=Sum('count'))['total'] or 0
@@ -0,0 +1,156 @@
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .text import normalize_arabic
+
+# Plan item fields covered by the `q` search box
+SEARCH_FIELDS = (
+    'code', 'rank_name', 'procedure', 'executor',
+    'comments', 'evaluation_notes', 'evidence_source_employee',
+)
+
+PLAN_TABLE = 'coredata_operationalplanitems'
+FTS_TABLE = 'coredata_plan_search'
+
+_TOKEN = re.compile(r'\w+')
+
+
+def build_search_document(item):
+    """Normalized text indexed for a plan item (kept in OperationalPlanItems.search_document)."""
+    return normalize_arabic(' '.join(str(getattr(item, f) or '') for f in SEARCH_FIELDS))
+
+
+def search_terms(q):
+    """Splits a query into normalized word tokens (punctuation dropped, so it is safe for tsquery/FTS5)."""
+    return _TOKEN.findall(normalize_arabic(q))
+
+
+_fts_available = None
+
+def _sqlite_fts_available():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def _backend():
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        return 'fts5'
+    return None
+
+
+def search_plan_items(queryset, q):
+    """
+    Filters `queryset` to the plan items matching every term of `q` (prefix match).
+
+    PostgreSQL: GIN-indexed `search_vector` tsvector column (generated from search_document).
+    SQLite: the FTS5 table kept in sync by triggers (dev).
+    Anything else: substring match on the normalized document.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return queryset
+    backend = _backend()
+    if backend == 'postgresql':
+        tsquery = ' & '.join(f'{t}:*' for t in terms)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM {PLAN_TABLE} WHERE search_vector @@ to_tsquery('simple', %s)", [tsquery]
+        ))
+    if backend == 'fts5':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        ))
+    condition = Q()
+    for t in terms:
+        condition &= Q(search_document__contains=t)
+    return queryset.filter(condition)
+
+
+def order_by_relevance(queryset, q):
+    """Orders search results best match first (higher `search_rank` is better)."""
+    terms = search_terms(q)
+    backend = _backend() if terms else None
+    if backend == 'postgresql':
+        tsquery = ' & '.join(f'{t}:*' for t in terms)
+        rank = RawSQL(f"ts_rank({PLAN_TABLE}.search_vector, to_tsquery('simple', %s))", [tsquery])
+    elif backend == 'fts5':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        # bm25() is lower-is-better, so negate it
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {PLAN_TABLE}.id)",
+            [match],
+        )
+    else:
+        return queryset.order_by('id')
+    return queryset.annotate(search_rank=rank).order_by(F('search_rank').desc(nulls_last=True), 'id')
+
+
+# --- Schema (used by migration 0025 and the rebuild_search_index command) ---
+
+POSTGRES_SQL = [
+    (f"ALTER TABLE {PLAN_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+     f"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(search_document, ''))) STORED"),
+    f"CREATE INDEX IF NOT EXISTS coredata_plan_search_gin ON {PLAN_TABLE} USING GIN (search_vector)",
+]
+
+SQLITE_SQL = [
+    (f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+     f"search_document, content='{PLAN_TABLE}', content_rowid='id')"),
+    (f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {PLAN_TABLE} BEGIN "
+     f"INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END"),
+    (f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {PLAN_TABLE} BEGIN "
+     f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document); END"),
+    (f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {PLAN_TABLE} BEGIN "
+     f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+     f"INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END"),
+]
+
+
+def install_search_index(schema_editor):
+    """Creates the vendor-specific index structures (no-op on other databases)."""
+    global _fts_available
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        try:
+            for sql in SQLITE_SQL:
+                schema_editor.execute(sql)
+        except OperationalError:
+            return  # SQLite built without FTS5: search falls back to icontains
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_available = None
+
+
+def uninstall_search_index(schema_editor):
+    global _fts_available
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS coredata_plan_search_gin")
+        schema_editor.execute(f"ALTER TABLE {PLAN_TABLE} DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    _fts_available = None
+
+
+def refresh_search_documents(model, batch_size=500):
+    """Recomputes search_document for every row (used after bulk imports and by the migration)."""
+    batch = []
+    for item in model.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+        item.search_document = build_search_document(item)
+        batch.append(item)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['search_document'])
@@ -0,0 +1,138 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .axes import invalidate_axis_evaluators
+from .coordinators import rebuild_coordinator_index
+from .evidence_files import invalidate_evidence_files
+from .fragments import invalidate_row_cache
+from .models import (
+    Committee,
+    EvaluationAxis,
+    EvidenceDocument,
+    EvidenceFile,
+    JobTitle,
+    OperationalPlanItems,
+    Staff,
+)
+from .roles import invalidate_roles
+from .rollups import ROLLUP_FIELDS, apply_rollup_change, rollup_key
+from .vault import refresh_vault_documents
+
+
+@receiver(m2m_changed, sender=Committee.members.through)
+def committee_members_changed(sender, action, **kwargs):
+    """Adding/removing committee members changes the cached roles of those users."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_roles()
+
+
+@receiver(post_save, sender=Committee)
+def committee_saved(sender, instance, **kwargs):
+    """A new or renamed committee may be the coordinator committee of any job title."""
+    rebuild_coordinator_index(JobTitle, Committee)
+    invalidate_roles()
+
+
+@receiver(post_delete, sender=Committee)
+def committee_deleted(sender, instance, **kwargs):
+    invalidate_roles()
+
+
+@receiver(post_save, sender=JobTitle)
+def job_title_saved(sender, instance, **kwargs):
+    rebuild_coordinator_index(JobTitle, Committee, job_title_ids=[instance.pk])
+    invalidate_roles()
+
+
+@receiver(post_delete, sender=JobTitle)
+@receiver(post_save, sender=Staff)
+@receiver(post_delete, sender=Staff)
+def staff_job_title_changed(sender, instance, **kwargs):
+    # The staff <-> job title link decides which coordinator committees a user sees
+    invalidate_roles()
+
+
+def _stored_rollup_key(instance):
+    key = rollup_key(instance)
+    if key is None:
+        # Deferred fields (only()/defer()): read them from the row rather than one query per field
+        key = OperationalPlanItems.objects.filter(pk=instance.pk).values_list(*ROLLUP_FIELDS).first()
+    return key
+
+
+@receiver(post_init, sender=OperationalPlanItems)
+def plan_item_loaded(sender, instance, **kwargs):
+    # Remember the committee assignment and rollup bucket so post_save can tell what changed.
+    # Read from __dict__: touching a deferred field here would cost a query per loaded item.
+    values = instance.__dict__
+    instance._committees_snapshot = (values.get('executor_committee_id'), values.get('evaluator_committee_id'))
+    instance._rollup_snapshot = rollup_key(instance)
+
+
+@receiver(pre_save, sender=OperationalPlanItems)
+def plan_item_saving(sender, instance, **kwargs):
+    if instance._rollup_snapshot is None and not instance._state.adding:
+        instance._rollup_snapshot = _stored_rollup_key(instance)
+
+
+@receiver(post_save, sender=OperationalPlanItems)
+def plan_item_saved(sender, instance, created, **kwargs):
+    """
+    Only a changed executor/evaluator committee affects the role flags.
+    The rollup counts move the item from its old bucket to its new one.
+    """
+    values = instance.__dict__
+    current = (values.get('executor_committee_id'), values.get('evaluator_committee_id'))
+    if created or current != getattr(instance, '_committees_snapshot', None):
+        invalidate_roles()
+    instance._committees_snapshot = current
+
+    # Runs inside OperationalPlanItems.save()'s transaction
+    new_key = _stored_rollup_key(instance)
+    apply_rollup_change(None if created else instance._rollup_snapshot, new_key)
+    instance._rollup_snapshot = new_key
+
+
+@receiver(post_delete, sender=OperationalPlanItems)
+def plan_item_deleted(sender, instance, **kwargs):
+    invalidate_roles()
+    apply_rollup_change(instance._rollup_snapshot or rollup_key(instance), None)
+
+
+@receiver(post_save, sender=EvidenceDocument)
+@receiver(post_delete, sender=EvidenceDocument)
+def evidence_document_changed(sender, instance, **kwargs):
+    # Rows link to the document's file; unlinking on delete does not touch the items' updated_at
+    invalidate_row_cache()
+
+
+@receiver(post_save, sender=Staff)
+def staff_renamed(sender, instance, **kwargs):
+    # The owner's staff name is part of their vault documents' autocomplete text
+    if instance.user_id:
+        refresh_vault_documents(EvidenceDocument.objects.filter(user_id=instance.user_id))
+
+
+@receiver(post_save, sender=EvidenceFile)
+@receiver(post_delete, sender=EvidenceFile)
+def evidence_file_changed(sender, instance, **kwargs):
+    invalidate_evidence_files()
+
+
+def axis_evaluators_changed(sender, action=None, **kwargs):
+    """Axes, axis evaluators or evaluator staff names changed: drop the cached map."""
+    if action is None or action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_axis_evaluators()
+
+
+m2m_changed.connect(axis_evaluators_changed, sender=EvaluationAxis.evaluators.through, dispatch_uid='axis_evaluators_changed')
+for model in (EvaluationAxis, Group, Staff):
+    post_save.connect(axis_evaluators_changed, sender=model, dispatch_uid=f'axis_{model.__name__}_saved')
+    post_delete.connect(axis_evaluators_changed, sender=model, dispatch_uid=f'axis_{model.__name__}_deleted')
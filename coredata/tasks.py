@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .previews import generate_preview
+
+
+@shared_task(ignore_result=True)
+def generate_evidence_preview(document_id):
+    generate_preview(document_id)
@@ -0,0 +1,51 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from ..search import search_terms
+from ..text import normalize_arabic
+
+register = template.Library()
+
+
+@register.filter
+def highlight(text, q):
+    """
+    Wraps the parts of `text` matching the search terms of `q` in <mark>.
+    Matching is done on the normalized text, so "الانجليزيه" highlights "الإنجليزية".
+    """
+    text = '' if text is None else str(text)
+    terms = search_terms(q) if q else []
+    if not text or not terms:
+        return escape(text)
+
+    # Normalize char by char, remembering which original char each normalized char came from
+    normalized, origin = [], []
+    for i, ch in enumerate(text):
+        for n in (' ' if ch.isspace() else normalize_arabic(ch)):
+            normalized.append(n)
+            origin.append(i)
+    haystack = ''.join(normalized)
+
+    spans = []
+    for term in terms:
+        start = haystack.find(term)
+        while start != -1:
+            end = start + len(term)
+            spans.append((origin[start], origin[end - 1] + 1))
+            start = haystack.find(term, end)
+    if not spans:
+        return escape(text)
+
+    out, pos, hit_start = [], 0, 0
+    for start, end in sorted(spans):
+        if start < pos:  # Overlaps the previous hit: extend it
+            if end > pos:
+                out[-1] = f'<mark class="search-hit">{escape(text[hit_start:end])}</mark>'
+                pos = end
+            continue
+        out.append(escape(text[pos:start]))
+        out.append(f'<mark class="search-hit">{escape(text[start:end])}</mark>')
+        hit_start, pos = start, end
+    out.append(escape(text[pos:]))
+    return mark_safe(''.join(out))
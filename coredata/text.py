@@ -0,0 +1,21 @@
+import re
+
+# Harakat, tanween, shadda, sukun, superscript alef + tatweel
+_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u0640]')
+_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+})
+
+
+def normalize_arabic(text):
+    """
+    Folds common Arabic spelling variants so "الإنجليزية" and "الانجليزيه" compare equal:
+    alef/hamza forms -> ا, taa marbuta -> ه, alef maqsura -> ي, diacritics and tatweel removed.
+    """
+    if not text:
+        return ''
+    text = _DIACRITICS.sub('', str(text)).translate(_LETTERS)
+    return ' '.join(text.lower().split())
@@ -0,0 +1,61 @@
+import hashlib
+import os
+
+from django.core.files import File
+
+
+class HashedFile(File):
+    """A file whose SHA-256 and size are already known (e.g. computed while chunks were assembled)."""
+
+    def __init__(self, file, name, sha256, size):
+        super().__init__(file, name)
+        self.sha256 = sha256
+        self.size = size
+
+
+def hash_upload(file):
+    """(sha256 hex digest, size in bytes) of an uploaded file, in one pass over its chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)  # Storage reads the file again if it has to be written
+    return digest.hexdigest(), size
+
+
+def find_stored_blob(model, file_hash, exclude_pk=None):
+    """Name of an already stored file with this content, or None (content-addressed dedup)."""
+    names = (
+        model.objects.filter(file_hash=file_hash).exclude(pk=exclude_pk)
+        .exclude(file='').values_list('file', flat=True).distinct()
+    )
+    storage = model._meta.get_field('file').storage
+    for name in names:
+        if storage.exists(name):
+            return name
+    return None
+
+
+def capture_upload(doc):
+    """
+    Fills original_filename / file_size / file_hash of a document whose file is a new upload.
+    If the same content is already stored, the document is pointed at that blob, so nothing is
+    written to storage on save.
+    """
+    upload = doc.file
+    known = upload.file
+    if isinstance(known, HashedFile):
+        file_hash, size = known.sha256, known.size
+    else:
+        file_hash, size = hash_upload(upload)
+    doc.original_filename = os.path.basename(upload.name)
+    doc.file_size = size
+    doc.file_hash = file_hash
+    existing = find_stored_blob(type(doc), file_hash, exclude_pk=doc.pk)
+    if existing:
+        doc.file.name = existing
+        doc.file._committed = True
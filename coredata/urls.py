@@ -9,12 +9,19 @@ urlpatterns = [
     # Operational Plan
     path('plan/', include([
         path('', plan_views.plan_list, name='plan_list'),
-        path('item/<int:pk>/execute/', plan_views.plan_edit_modal, name='execute_item'),
-        path('item/<int:pk>/execute/save/', plan_views.plan_edit_save, name='execute_item_save'),
-        path('item/<int:pk>/evaluate/', plan_views.plan_evaluate_modal, name='evaluate_item'),
-        path('item/<int:pk>/evaluate/save/', plan_views.plan_evaluate_save, name='evaluate_item_save'),
-        path('item/<int:pk>/evidence/', plan_views.plan_upload_evidence_modal, name='upload_evidence'),
-        path('item/<int:pk>/evidence/save/', plan_views.plan_upload_evidence_save, name='upload_evidence_save'),
+        path('bulk-evaluate/', plan_views.plan_bulk_evaluate, name='plan_bulk_evaluate'),
+        path('evidence/autocomplete/', plan_views.plan_evidence_autocomplete, name='plan_evidence_autocomplete'),
+        path('item/<int:pk>/execute/', plan_views.plan_edit_modal, name='plan_edit_modal'),
+        path('item/<int:pk>/execute/save/', plan_views.plan_edit_save, name='plan_edit_save'),
+        path('item/<int:pk>/evaluate/', plan_views.plan_evaluate_modal, name='plan_evaluate_modal'),
+        path('item/<int:pk>/evaluate/save/', plan_views.plan_evaluate_save, name='plan_evaluate_save'),
+        path('item/<int:pk>/evidence/', plan_views.plan_upload_evidence_modal, name='plan_upload_evidence_modal'),
+        path('item/<int:pk>/evidence/save/', plan_views.plan_upload_evidence_save, name='plan_upload_evidence_save'),
+        path('item/<int:pk>/evidence/upload/', plan_views.plan_evidence_upload_init, name='plan_evidence_upload_init'),
+        path('evidence/<int:doc_pk>/preview/', plan_views.plan_evidence_preview, name='plan_evidence_preview'),
+        path('uploads/<uuid:upload_id>/', plan_views.plan_evidence_upload_chunk, name='plan_evidence_upload_chunk'),
+        path('uploads/<uuid:upload_id>/finalize/', plan_views.plan_evidence_upload_finalize, name='plan_evidence_upload_finalize'),
+        path('item/<int:pk>/evidence/request/', plan_views.plan_toggle_evidence_request, name='plan_toggle_evidence_request'),
     ])),
     
     # Authentication
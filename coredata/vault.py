@@ -0,0 +1,107 @@
+from django.db.models import Q
+
+from .roles import get_user_roles
+from .search import search_terms
+from .text import normalize_arabic
+
+# Evidence document fields covered by the vault autocomplete (plus the owner's names)
+VAULT_SEARCH_FIELDS = ('title', 'tags', 'original_filename')
+
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+VAULT_TABLE = 'evidence_documents'
+VAULT_TRGM_INDEX = 'evidence_documents_search_trgm'
+
+
+def build_vault_document(doc):
+    """Normalized text matched by the autocomplete (kept in EvidenceDocument.search_document)."""
+    parts = [getattr(doc, f) or '' for f in VAULT_SEARCH_FIELDS]
+    user = doc.user if doc.user_id else None
+    if user is not None:
+        parts.append(user.username)
+        staff = getattr(user, 'staff_profile', None)
+        if staff is not None:
+            parts.append(staff.name or '')
+    return normalize_arabic(' '.join(parts))
+
+
+def visible_documents(user, queryset=None):
+    """The vault documents `user` may link: all of them for superusers, otherwise their own."""
+    from .models import EvidenceDocument
+
+    queryset = EvidenceDocument.objects.all() if queryset is None else queryset
+    if user is None or not user.is_authenticated:
+        return queryset.none()
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(user=user)
+
+
+def viewable_documents(user, queryset=None):
+    """
+    The vault documents `user` may view: the ones visible to them, plus the evidence linked to
+    plan items of their committees (evaluators review the executors' documents).
+    """
+    from .models import EvidenceDocument
+
+    queryset = EvidenceDocument.objects.all() if queryset is None else queryset
+    visible = visible_documents(user, queryset)
+    if user is None or not user.is_authenticated or user.is_superuser:
+        return visible
+    committee_ids = get_user_roles(user).committee_ids
+    linked = queryset.filter(
+        Q(linked_plan_items__executor_committee_id__in=committee_ids)
+        | Q(linked_plan_items__evaluator_committee_id__in=committee_ids)
+    )
+    return queryset.filter(Q(pk__in=visible.values('pk')) | Q(pk__in=linked.values('pk')))
+
+
+def autocomplete_documents(user, q='', page=1):
+    """
+    One page of (pk, title) pairs of the documents visible to `user` matching every term of `q`,
+    newest first, and whether a further page exists.
+    """
+    qs = visible_documents(user)
+    condition = Q()
+    for term in search_terms(q):
+        condition &= Q(search_document__contains=term)
+    start = (max(page, 1) - 1) * AUTOCOMPLETE_PAGE_SIZE
+    rows = list(
+        qs.filter(condition).order_by('-created_at', '-id')
+        .values_list('pk', 'title')[start:start + AUTOCOMPLETE_PAGE_SIZE + 1]
+    )
+    return rows[:AUTOCOMPLETE_PAGE_SIZE], len(rows) > AUTOCOMPLETE_PAGE_SIZE
+
+
+def refresh_vault_documents(queryset, batch_size=500):
+    """Recomputes search_document for the documents of `queryset` (migration, owner renames)."""
+    model = queryset.model
+    batch = []
+    for doc in queryset.select_related('user__staff_profile').iterator(chunk_size=batch_size):
+        doc.search_document = build_vault_document(doc)
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['search_document'])
+
+
+# --- Schema (used by migration 0028) ---
+
+def install_vault_index(schema_editor):
+    """
+    PostgreSQL: trigram GIN index, so the substring filters of the autocomplete use an index.
+    Other databases keep the plain column (the vault is small in dev).
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {VAULT_TRGM_INDEX} ON {VAULT_TABLE} "
+            f"USING GIN (search_document gin_trgm_ops)"
+        )
+
+
+def uninstall_vault_index(schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {VAULT_TRGM_INDEX}")
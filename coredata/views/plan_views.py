@@ -1,28 +1,44 @@
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q, Count
-from django.http import HttpResponse, HttpResponseForbidden
+from django.template.loader import get_template, render_to_string
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.db import transaction
+from simple_history.utils import bulk_update_with_history
 import json
-from django.contrib.auth.models import Group
 
-from ..models import OperationalPlanItems, Committee, Staff
-from ..forms import PlanItemExecutionForm, PlanItemEvaluationForm, EvidenceUploadForm
+from ..models import AcademicYear, EvidenceDocument, EvidenceUpload, OperationalPlanItems, Staff
+from ..axes import evaluator_names
+from ..chunked_uploads import UploadIncompleteError, UploadOffsetError, discard_upload, finalize_upload, write_chunk
+from ..etags import plan_list_validators, set_validators
+from ..facets import compute_facets
+from ..fragments import render_rows
+from ..pagination import keyset_paginate
+from ..previews import PREVIEW_MAX_POLLS, PREVIEW_PENDING, PREVIEW_READY
+from ..projection import PlanRow, get_plan_row, plan_rows, project_plan_rows
+from ..roles import get_user_roles, set_row_permissions
+from ..rollups import apply_rollup_changes, rollup_counts, rollup_key
+from ..search import build_search_document, order_by_relevance, search_plan_items
+from ..vault import autocomplete_documents, viewable_documents, visible_documents
+from ..forms import PlanItemExecutionForm, PlanItemEvaluationForm, EvidenceUploadForm, EvidenceUploadInitForm, PlanBulkEvaluationForm
 
 # The data loading block has been completely removed.
 
-def get_chart_data(queryset, field):
-    """Helper function to prepare data for Chart.js."""
+def get_chart_data(field, **filters):
+    """Helper function to prepare data for Chart.js (counts read from the rollup table, see rollups.py)."""
     color_maps = {
         'follow_up': {"تم الإنجاز": "#10b981", "مكتمل": "#10b981", "لم يتم الإنجاز": "#ef4444", "مؤجل": "#f59e0b", "قيد الإنجاز": "#3b82f6", "جزئي": "#f59e0b"},
         'evaluation': {"مطابق": "#10b981", "مطابق جزئي": "#f59e0b", "غير مطابق": "#ef4444", "مرتفع": "#10b981", "متوسط": "#f59e0b", "منخفض": "#ef4444"}
     }
     color_map = color_maps.get(field, {})
     default_color = "#e5e7eb"
-    stats_raw = queryset.values(field).annotate(count=Count('id')).order_by('-count')
-    labels = [item.get(field) or 'غير مصنف' for item in stats_raw]
-    data = [item['count'] for item in stats_raw]
+    stats = rollup_counts(field, **filters)
+    labels = [value or 'غير مصنف' for value, count in stats]
+    data = [count for value, count in stats]
     colors = [color_map.get(label, default_color) for label in labels]
     return {'labels': labels, 'datasets': [{'data': data, 'backgroundColor': colors, 'borderWidth': 2, 'borderColor': '#ffffff', 'hoverOffset': 4}]}
 
@@ -32,14 +48,15 @@ def plan_list(request):
     Displays the operational plan items. This view is now clean and stable.
     """
     qs = OperationalPlanItems.objects.all()
-    user_committees = request.user.committees.all()
+    roles = get_user_roles(request.user)
+    committee_ids = roles.committee_ids
 
     # --- Role-Based View Filtering ---
     view_role = request.GET.get('view_role')
     
-    # 1. Determine if the user has any items as executor or evaluator across the WHOLE plan
-    is_executor_role = OperationalPlanItems.objects.filter(executor_committee__in=user_committees).exists()
-    is_evaluator_role = OperationalPlanItems.objects.filter(evaluator_committee__in=user_committees).exists()
+    # 1. Determine if the user has any items as executor or evaluator across the WHOLE plan (cached per user)
+    is_executor_role = roles.is_executor_role
+    is_evaluator_role = roles.is_evaluator_role
 
     # Default logic for initial load:
     # If no view_role is provided, set it based on priority
@@ -54,52 +71,19 @@ def plan_list(request):
     if not request.user.is_superuser:
         if view_role == 'executor':
             # مهامي كمنفذ: البنود التي أنا عضو في لجنتها المنفذة
-            qs = qs.filter(executor_committee__in=user_committees)
+            qs = qs.filter(executor_committee__in=committee_ids)
         elif view_role == 'evaluator':
             # مهامي كمقيم: البنود التي أنا مكلف بتقييمها رسمياً (المحاور الستة)
-            qs = qs.filter(evaluator_committee__in=user_committees)
+            qs = qs.filter(evaluator_committee__in=committee_ids)
         else:
             # افتراضياً (للعرض فقط): يرى الموظف (المعلم) بنود قسمه التنفيذية
             # 1. Start with committees user belongs to directly
-            query = Q(executor_committee__in=user_committees) | Q(evaluator_committee__in=user_committees)
+            query = Q(executor_committee__in=committee_ids) | Q(evaluator_committee__in=committee_ids)
             
             # 2. Add Dept/Section logic based on JOB TITLE (Critical for Teachers)
-            try:
-                # IMPORTANT: We use the Staff record because some users might not be in Committees yet
-                staff_profile = Staff.objects.filter(user=request.user).first()
-                if staff_profile and staff_profile.job_title:
-                    job_title_text = staff_profile.job_title.title.strip()
-                    
-                    # Subjects mapping for broader coverage
-                    subjects_map = {
-                        "الرياضيات": ["رياضيات", "الرياضيات"],
-                        "العربية": ["العربية", "اللغة العربية"],
-                        "الانجليزية": ["الإنجليزية", "اللغة الانجليزية", "اللغة الإنجليزية"],
-                        "الاسلامية": ["الاسلامية", "الإسلامية", "التربية الإسلامية", "العلوم الشرعية"],
-                        "العلوم": ["العلوم", "الكيمياء", "الفيزياء", "الأحياء"],
-                        "الاجتماعية": ["الاجتماعية", "العلوم الاجتماعية", "الدراسات الاجتماعية"],
-                        "تكنولوجيا": ["تكنولوجيا", "الحاسوب"],
-                        "البدنية": ["البدنية", "الرياضة"],
-                        "النفسي": ["النفسي", "الأخصائي النفسي"],
-                        "الاجتماعي": ["الاجتماعي", "الأخصائي الاجتماعي"],
-                    }
-                    
-                    target_subject = None
-                    for key, keywords in subjects_map.items():
-                        if any(kw in job_title_text for kw in keywords):
-                            target_subject = key
-                            # If we found a match, search for committees with similar keywords
-                            # and importantly include 'منسق'
-                            keywords + ["منسق"]
-                            coord_comms = Committee.objects.filter(
-                                Q(name__icontains="منسق") & 
-                                Q(name__icontains=target_subject)
-                            )
-                            if coord_comms.exists():
-                                query |= Q(executor_committee__in=coord_comms)
-                            break
-            except Exception:
-                pass
+            # The job title -> "منسق <subject>" committees mapping is precomputed (see coordinators.py)
+            if roles.coordinator_committee_ids:
+                query |= Q(executor_committee__in=roles.coordinator_committee_ids)
             
             qs = qs.filter(query).distinct()
 
@@ -133,25 +117,26 @@ def plan_list(request):
 
     q = request.GET.get('q', '').strip()
     if q:
-        qs = qs.filter(
-            Q(rank_name__icontains=q) | 
-            Q(target__icontains=q) | 
-            Q(indicator__icontains=q) | 
-            Q(procedure__icontains=q) |
-            Q(code__icontains=q) |
-            Q(executor__icontains=q) |
-            Q(comments__icontains=q) |
-            Q(evaluation_notes__icontains=q) |
-            Q(evidence_source_employee__icontains=q)
-        ).distinct()
+        # Indexed full-text search over the Arabic-normalized item text (see search.py)
+        qs = search_plan_items(qs, q)
+
+    # HTMX Handling: return a partial only when the table container is the target.
+    # This keeps sidebar navigation swaps stable (content-area) while preserving fast table updates.
+    if request.headers.get('HX-Request') and request.headers.get('HX-Target') == 'plan-table-container':
+        template_name = 'plan/_table.html'
+    else:
+        template_name = 'plan/list.html'
+
+    # --- Conditional GET ---
+    # One aggregate over the filtered rows tells whether the client's copy is still current (304, nothing rendered)
+    etag, last_modified = plan_list_validators(request, qs, template_name)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return set_validators(not_modified, etag, last_modified)
     
     # --- Dropdown options (based on the filtered queryset 'qs') ---
-    all_years = qs.values_list('academic_year__name', flat=True).distinct().order_by('academic_year__name')
-    all_rank_names = qs.values_list('rank_name', flat=True).distinct().order_by('rank_name')
-    all_executors = qs.values_list('executor', flat=True).distinct().order_by('executor')
-    all_date_ranges = qs.values_list('date_range', flat=True).distinct().order_by('date_range')
-    all_follow_ups = qs.values_list('follow_up', flat=True).distinct().order_by('follow_up')
-    all_evaluations = qs.values_list('evaluation', flat=True).distinct().order_by('evaluation')
+    # All six dropdowns (with per-option counts) come from a single grouped query.
+    facets = compute_facets(qs)
     
     sort_by = request.GET.get('sort_by', 'rank_name')
     if sort_by == 'rank_name_exact':
@@ -166,24 +151,23 @@ def plan_list(request):
     if sort_by not in valid_sort_fields:
         sort_by = 'rank_name'
 
-    qs = qs.order_by(f'{"-" if request.GET.get("sort_order") == "desc" else ""}{sort_by}')
+    by_relevance = bool(q) and 'sort_by' not in request.GET
+    if by_relevance:
+        # Searching without an explicit sort column: best matches first
+        qs = order_by_relevance(qs, q)
+    else:
+        qs = qs.order_by(f'{"-" if request.GET.get("sort_order") == "desc" else ""}{sort_by}')
+
+    # Only the table columns are fetched (long texts as SQL-cut previews); the modals load the full item
+    qs = project_plan_rows(qs)
 
     # --- Pagination Logic ---
     per_page = request.GET.get('per_page', '25')
+    pagination_mode = request.GET.get('pagination') or settings.PLAN_LIST_PAGINATION
     
     if per_page == 'all':
-        # Show all items (no pagination)
-        page_obj = qs
-        # Mock paginator object for template compatibility
-        class MockPaginator:
-            count = qs.count()
-            num_pages = 1
-        page_obj.paginator = MockPaginator()
-        page_obj.start_index = 1
-        page_obj.end_index = qs.count()
-        page_obj.has_previous = False
-        page_obj.has_next = False
-        page_obj.number = 1
+        # Show all items (no pagination): rows are streamed from the DB cursor, see _stream_plan_table
+        page_obj = []
     else:
         try:
             per_page = int(per_page)
@@ -191,20 +175,31 @@ def plan_list(request):
         except ValueError:
             per_page = 25
 
-        paginator = Paginator(qs, per_page)
-        page_obj = paginator.get_page(request.GET.get('page'))
+        # Relevance-ranked search results page by offset: keyset cursors would reorder them by column
+        if pagination_mode == 'cursor' and not by_relevance:
+            # Keyset mode: (sort_by, id) cursors instead of COUNT(*) + OFFSET, so deep pages stay cheap
+            keyset_field = sort_by if sort_by in {f.name for f in OperationalPlanItems._meta.concrete_fields} else 'rank_name'
+            page_obj = keyset_paginate(
+                qs, keyset_field,
+                descending=request.GET.get('sort_order') == 'desc',
+                cursor=request.GET.get('cursor'),
+                per_page=per_page,
+            )
+        else:
+            paginator = Paginator(qs, per_page)
+            page_obj = paginator.get_page(request.GET.get('page'))
+        page_obj.object_list = plan_rows(page_obj.object_list)
+        # Per-row edit/evaluate flags from the committee id set (no committee lookups while rendering)
+        set_row_permissions(page_obj, request.user)
 
     # --- Prepare Pagination URL Params ---
-    # Safely remove 'page' from GET params to avoid 'cut' filter issues in template
+    # Safely remove 'page'/'cursor' from GET params to avoid 'cut' filter issues in template
     query_params = request.GET.copy()
-    if 'page' in query_params:
-        del query_params['page']
+    for param in ('page', 'cursor'):
+        if param in query_params:
+            del query_params[param]
     pagination_url_params = query_params.urlencode()
 
-    # Re-calculate roles based on WHOLE plan items
-    is_executor_role = OperationalPlanItems.objects.filter(executor_committee__in=user_committees).exists()
-    is_evaluator_role = OperationalPlanItems.objects.filter(evaluator_committee__in=user_committees).exists()
-
     # --- Role-Based Filter Redirection ---
     # If a user is only an evaluator but tries to view 'executor' tab (or lands there by default),
     # and they have 0 items in executor but many in evaluator, we should switch them.
@@ -216,7 +211,9 @@ def plan_list(request):
     
     context = {
         'page_obj': page_obj,
-        'user_committees': user_committees,
+        # Rendered rows, mostly served from the row fragment cache (see fragments.py)
+        'page_rows': render_rows(request, list(page_obj), view_role, q),
+        'committee_ids': committee_ids,
         'is_executor_role': is_executor_role,
         'is_evaluator_role': is_evaluator_role,
         
@@ -233,26 +230,67 @@ def plan_list(request):
         'sort_by': sort_by,
         'sort_order': request.GET.get('sort_order'),
         'per_page': str(per_page),
+        'pagination_mode': pagination_mode,
         'view_role': view_role,
         
         'pagination_url_params': pagination_url_params, # New clean params string
 
-        # Dropdown options
-        'all_years': all_years,
-        'all_rank_names': all_rank_names,
-        'all_executors': all_executors,
-        'all_date_ranges': all_date_ranges,
-        'all_follow_ups': all_follow_ups,
-        'all_evaluations': all_evaluations,
+        # Dropdown options: lists of (value, count)
+        **facets,
         'all_statuses': OperationalPlanItems._meta.get_field('status').choices,
     }
 
-    # HTMX Handling: return a partial only when the table container is the target.
-    # This keeps sidebar navigation swaps stable (content-area) while preserving fast table updates.
-    if request.headers.get('HX-Request') and request.headers.get('HX-Target') == 'plan-table-container':
-        return render(request, 'plan/_table.html', context)
+    if per_page == 'all':
+        response = _stream_plan_table(request, template_name, context, qs)
+    else:
+        response = render(request, template_name, context)
+    return set_validators(response, etag, last_modified)
+
 
-    return render(request, 'plan/list.html', context)
+STREAM_ROWS_MARKER = '<!--plan-rows-->'
+
+def _stream_plan_table(request, template_name, context, qs):
+    """
+    Streams the plan page for per_page=all.
+    The page is rendered once with a marker where the rows go; rows are then rendered
+    chunk by chunk from qs.iterator(), so the browser paints early and memory stays flat.
+    """
+    context['stream_rows'] = True
+    head, tail = render_to_string(template_name, context, request).split(STREAM_ROWS_MARKER, 1)
+
+    empty_template = get_template('plan/_empty_row.html')
+    chunk_size = settings.PLAN_STREAM_CHUNK_SIZE
+
+    def flush(chunk):
+        set_row_permissions(chunk, request.user)
+        return ''.join(render_rows(request, chunk, context['view_role'], context['q']))
+
+    def rows():
+        yield head
+        count = 0
+        chunk = []
+        for values in qs.iterator(chunk_size=chunk_size):
+            chunk.append(PlanRow(values))
+            count += 1
+            if len(chunk) >= chunk_size:
+                yield flush(chunk)
+                chunk = []
+        if chunk:
+            yield flush(chunk)
+        if not count:
+            yield empty_template.render({}, request)
+        yield tail
+        # The total is only known once the cursor is exhausted
+        yield f'<script>document.querySelectorAll(".plan-row-count").forEach(function(el){{ el.textContent = "{count}"; }});</script>'
+
+    return StreamingHttpResponse(rows(), content_type='text/html; charset=utf-8')
+
+
+def _render_row(request, item, view_role=None):
+    """Renders one table row after an HTMX save, with the same projection and flags the list view uses."""
+    item = get_plan_row(item.pk)
+    set_row_permissions((item,), request.user)
+    return HttpResponse(render_rows(request, [item], view_role)[0])
 
 @login_required
 def plan_edit_modal(request, pk:int):
@@ -261,31 +299,15 @@ def plan_edit_modal(request, pk:int):
     """
     item = get_object_or_404(OperationalPlanItems, pk=pk)
     
-    evaluators = []
-    try:
-        quality_committee = Group.objects.get(name='لجنة الجودة والتخطيط')
-        if hasattr(quality_committee, 'extension'):
-            ext = quality_committee.extension
-            axis_mapping = {
-                ext.axis1_name: ext.axis1_evaluators,
-                ext.axis2_name: ext.axis2_evaluators,
-                ext.axis3_name: ext.axis3_evaluators,
-                ext.axis4_name: ext.axis4_evaluators,
-                ext.axis5_name: ext.axis5_evaluators,
-                ext.axis6_name: ext.axis6_evaluators,
-            }
-            evaluator_users = axis_mapping.get(item.rank_name)
-            if evaluator_users:
-                evaluators = [user.staff_profile.name for user in evaluator_users.all() if hasattr(user, 'staff_profile')]
-    except (Group.DoesNotExist, AttributeError):
-        pass
+    # Cached axis -> evaluators map (see axes.py): no queries per modal
+    evaluator_name = evaluator_names(item.rank_name)
 
     # Pass the user to the form to filter evidence files
     form = PlanItemExecutionForm(instance=item, user=request.user)
     context = {
         'item': item,
         'form': form,
-        'evaluator_name': ", ".join(evaluators) if evaluators else "غير محدد"
+        'evaluator_name': evaluator_name
     }
     return render(request, 'plan/_modal_edit.html', context)
 
@@ -295,13 +317,12 @@ def plan_edit_save(request, pk:int):
     This view is now clean and no longer handles file lists.
     """
     item = get_object_or_404(OperationalPlanItems, pk=pk)
-    user_committees = request.user.committees.all()
     
     # Permission Check: Superusers can always edit
     if request.user.is_superuser:
         pass
     else:
-        is_executor = item.executor_committee in user_committees
+        is_executor = item.executor_committee_id in get_user_roles(request.user).committee_ids
         # Allow edit if not completed
         if not is_executor or item.status == 'Completed':
             return HttpResponseForbidden("ليس لديك الصلاحية لتعديل هذا البند في حالته الحالية.")
@@ -323,18 +344,8 @@ def plan_edit_save(request, pk:int):
             instance.save()
             form.save_m2m() # For ManyToMany fields, if any in this form
 
-            # IMPORTANT: Reload the instance to ensure all related objects and updated fields are fresh
-            # Use select_related and prefetch_related to optimize queries for the template
-            instance = OperationalPlanItems.objects.select_related(
-                'academic_year', 'strategic_goal_link', 'operational_goal_link',
-                'executor_committee', 'evaluator_committee', 'evidence_document'
-            ).get(pk=pk)
-            
-            resp = render(request, 'plan/_row.html', {
-                'it': instance,
-                'user_committees': user_committees, # Pass committees to redraw buttons correctly
-                'request': request
-            })
+            # The row is re-read (as a projected row) so it reflects the saved state
+            resp = _render_row(request, instance, view_role='executor')
             resp['HX-Trigger'] = json.dumps({'closeModal': True, 'showMessage': {'level': 'success', 'message': 'تم الحفظ بنجاح'}})
             return resp
         context = {'item': item, 'form': form}
@@ -346,46 +357,29 @@ def plan_edit_save(request, pk:int):
 def plan_evaluate_modal(request, pk:int):
     item = get_object_or_404(OperationalPlanItems, pk=pk)
     
-    evaluators = []
-    try:
-        quality_committee = Group.objects.get(name='لجنة الجودة والتخطيط')
-        if hasattr(quality_committee, 'extension'):
-            ext = quality_committee.extension
-            axis_mapping = {
-                ext.axis1_name: ext.axis1_evaluators,
-                ext.axis2_name: ext.axis2_evaluators,
-                ext.axis3_name: ext.axis3_evaluators,
-                ext.axis4_name: ext.axis4_evaluators,
-                ext.axis5_name: ext.axis5_evaluators,
-                ext.axis6_name: ext.axis6_evaluators,
-            }
-            evaluator_users = axis_mapping.get(item.rank_name)
-            if evaluator_users:
-                evaluators = [user.staff_profile.name for user in evaluator_users.all() if hasattr(user, 'staff_profile')]
-    except (Group.DoesNotExist, AttributeError):
-        pass
+    # Cached axis -> evaluators map (see axes.py): no queries per modal
+    evaluator_name = evaluator_names(item.rank_name)
 
     # Set the evaluator name automatically but allow override if needed (though user said read only name)
     form = PlanItemEvaluationForm(instance=item, initial={
         'evaluation_notes': "",
-        'evidence_source_employee': ", ".join(evaluators) if evaluators else "غير محدد"
+        'evidence_source_employee': evaluator_name
     })
     
     context = {
         'item': item, 
         'form': form, 
         'evaluation_options': ["مطابق", "غير مطابق", "مطابق جزئي"],
-        'evaluator_name': ", ".join(evaluators) if evaluators else "غير محدد"
+        'evaluator_name': evaluator_name
     }
     return render(request, 'plan/_modal_evaluate.html', context)
 
 @login_required
 def plan_evaluate_save(request, pk:int):
     item = get_object_or_404(OperationalPlanItems, pk=pk)
-    user_committees = request.user.committees.all()
     
     # Permission Check
-    is_evaluator = item.evaluator_committee in user_committees
+    is_evaluator = item.evaluator_committee_id in get_user_roles(request.user).committee_ids
     
     if not request.user.is_superuser and not is_evaluator:
         return HttpResponseForbidden("ليس لديك صلاحية تقييم هذا البند.")
@@ -401,11 +395,7 @@ def plan_evaluate_save(request, pk:int):
             item.evidence_request_note = form.cleaned_data.get('evidence_request_note', item.evidence_request_note)
             
             # Set the evaluator name from the current user
-            try:
-                staff_profile = Staff.objects.get(user=request.user)
-                item.evidence_source_employee = staff_profile.job_title.title if staff_profile.job_title else request.user.username
-            except Staff.DoesNotExist:
-                item.evidence_source_employee = request.user.username
+            item.evidence_source_employee = _evaluator_name(request.user)
 
             # Set the review date
             item.last_review_date = timezone.now()
@@ -413,17 +403,7 @@ def plan_evaluate_save(request, pk:int):
             # Save the instance to the database
             item.save()
             
-            # Re-fetch user committees for context
-            user_committees = request.user.committees.all()
-            
-            context = {
-                'it': item,
-                'user_committees': user_committees,
-                'view_role': 'evaluator',
-                'request': request
-            }
-            
-            resp = render(request, 'plan/_row.html', context)
+            resp = _render_row(request, item, view_role='evaluator')
             resp['HX-Trigger'] = json.dumps({
                 'closeModal': True, 
                 'showMessage': {'level': 'success', 'message': 'تم اعتماد التقييم بنجاح'}
@@ -440,16 +420,83 @@ def plan_evaluate_save(request, pk:int):
         return render(request, 'plan/_modal_evaluate.html', context, status=422)
     return HttpResponse(status=405)
 
+def _evaluator_name(user):
+    """Name recorded as the evaluator: the staff job title, else the username."""
+    try:
+        staff_profile = Staff.objects.select_related('job_title').get(user=user)
+        return staff_profile.job_title.title if staff_profile.job_title else user.username
+    except Staff.DoesNotExist:
+        return user.username
+
+
+@login_required
+def plan_bulk_evaluate(request):
+    """
+    Applies one evaluation decision to all the selected items.
+    One transaction: a single bulk_update, a bulk history insert and batched rollup counts.
+    Every affected row comes back as an out-of-band swap in the same response.
+    """
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    form = PlanBulkEvaluationForm(request.POST, user=request.user)
+    if not form.is_valid():
+        resp = HttpResponse(status=422)
+        resp['HX-Trigger'] = json.dumps({'showMessage': {'level': 'error', 'message': 'حدد بنوداً تملك صلاحية تقييمها وقرار اللجنة.'}})
+        return resp
+
+    data = form.cleaned_data
+    items = list(data['items'])
+    evaluator = _evaluator_name(request.user)
+    now = timezone.now()
+
+    fields = ['status', 'evidence_source_employee', 'last_review_date', 'updated_at', 'search_document']
+    if data['evaluation']:
+        fields.append('evaluation')
+    if data['evaluation_notes']:
+        fields.append('evaluation_notes')
+
+    changes = []
+    for item in items:
+        old_key = rollup_key(item)
+        item.status = data['status']
+        if data['evaluation']:
+            item.evaluation = data['evaluation']
+        if data['evaluation_notes']:
+            item.evaluation_notes = data['evaluation_notes']
+        item.evidence_source_employee = evaluator
+        item.last_review_date = now
+        # bulk_update skips save(): keep auto_now and the search text current by hand
+        item.updated_at = now
+        item.search_document = build_search_document(item)
+        changes.append((old_key, rollup_key(item)))
+
+    with transaction.atomic():
+        bulk_update_with_history(items, OperationalPlanItems, fields, default_user=request.user)
+        apply_rollup_changes(changes)
+
+    rows = set_row_permissions(plan_rows(project_plan_rows(
+        OperationalPlanItems.objects.filter(pk__in=[item.pk for item in items]).order_by('id')
+    )), request.user)
+    # Rows are swapped in place by id (hx-swap-oob); the form itself swaps nothing
+    html = ''.join(
+        row.replace('<tr id=', '<tr hx-swap-oob="true" id=', 1)
+        for row in render_rows(request, rows, 'evaluator')
+    )
+    resp = HttpResponse(html)
+    resp['HX-Trigger'] = json.dumps({'showMessage': {'level': 'success', 'message': f'تم اعتماد تقييم {len(items)} بند'}})
+    return resp
+
+
 @login_required
 def plan_toggle_evidence_request(request, pk:int):
     """
     Toggles the evidence_requested flag via AJAX/HTMX from the table row.
     """
     item = get_object_or_404(OperationalPlanItems, pk=pk)
-    user_committees = request.user.committees.all()
     
     # Permission Check
-    if not request.user.is_superuser and item.evaluator_committee not in user_committees:
+    if not request.user.is_superuser and item.evaluator_committee_id not in get_user_roles(request.user).committee_ids:
         return HttpResponseForbidden("ليس لديك صلاحية تعديل هذا البند.")
         
     if request.method == 'POST':
@@ -460,13 +507,7 @@ def plan_toggle_evidence_request(request, pk:int):
         item.save()
         
         # Return the updated row to reflect the state change
-        context = {
-            'it': item,
-            'user_committees': user_committees,
-            'view_role': 'evaluator',
-            'request': request
-        }
-        return render(request, 'plan/_row.html', context)
+        return _render_row(request, item, view_role='evaluator')
     
     return HttpResponse(status=405)
 
@@ -485,13 +526,31 @@ def plan_upload_evidence_modal(request, pk:int):
     }
     return render(request, 'plan/_modal_upload_evidence.html', context)
 
+def _evidence_academic_year(item):
+    # Use current year for academic year if item has none
+    if item.academic_year_id:
+        return item.academic_year
+    return AcademicYear.objects.filter(is_active=True).first()
+
+def _link_uploaded_evidence(request, item, doc):
+    """Links a freshly uploaded vault document to the plan item and returns the updated row."""
+    item.evidence_document = doc
+    item.status = 'Pending Review' # Update status to indicate something happened
+    # IMPORTANT: We do NOT clear evidence_requested here.
+    # This allows the Evaluator to see the "View Evidence" link in their column
+    # instead of the "Request Evidence" button reverting back.
+    item.save()
+
+    resp = _render_row(request, item, view_role='executor')
+    resp['HX-Trigger'] = json.dumps({'closeModal': True, 'showMessage': {'level': 'success', 'message': 'تم رفع الدليل بنجاح وتقديمه للمراجعة'}})
+    return resp
+
 @login_required
 def plan_upload_evidence_save(request, pk:int):
     """
     Saves the uploaded evidence, creates a document in the vault, and links it to the item.
     """
     item = get_object_or_404(OperationalPlanItems, pk=pk)
-    user_committees = request.user.committees.all()
     
     if request.method == 'POST':
         form = EvidenceUploadForm(request.POST, request.FILES)
@@ -499,32 +558,128 @@ def plan_upload_evidence_save(request, pk:int):
             # 1. Create the EvidenceDocument in the Vault
             doc = form.save(commit=False)
             doc.user = request.user
-            doc.academic_year = item.academic_year
-            
-            # Use current year for academic year if item has none
-            if not doc.academic_year:
-                from ..models import AcademicYear
-                doc.academic_year = AcademicYear.objects.filter(is_active=True).first()
-            
+            doc.academic_year = _evidence_academic_year(item)
             doc.save() # File is handled by ModelForm if 'file' field is in Meta.fields or handled manually
-            
-            # 2. Link it to the Plan Item
-            item.evidence_document = doc
-            item.status = 'Pending Review' # Update status to indicate something happened
-            # IMPORTANT: We do NOT clear evidence_requested here.
-            # This allows the Evaluator to see the "View Evidence" link in their column
-            # instead of the "Request Evidence" button reverting back.
-            item.save()
-            
-            # 3. Return updated row
-            resp = render(request, 'plan/_row.html', {
-                'it': item,
-                'user_committees': user_committees,
-                'request': request
-            })
-            resp['HX-Trigger'] = json.dumps({'closeModal': True, 'showMessage': {'level': 'success', 'message': 'تم رفع الدليل بنجاح وتقديمه للمراجعة'}})
-            return resp
+
+            # 2. Link it to the Plan Item and return the updated row
+            return _link_uploaded_evidence(request, item, doc)
             
         context = {'item': item, 'form': form}
         return render(request, 'plan/_modal_upload_evidence.html', context, status=422)
-    return HttpResponse(status=405)
\ No newline at end of file
+    return HttpResponse(status=405)
+
+@login_required
+def plan_evidence_autocomplete(request):
+    """
+    <option>s of the vault documents the user may link, matching `q` (one page, newest first).
+    Swapped into the execution modal's evidence select as the user types.
+    """
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 1
+    options, has_more = autocomplete_documents(request.user, request.GET.get('q', ''), page)
+
+    # Keep the current choice selectable even when it does not match the new terms
+    selected = request.GET.get('evidence_document') or None
+    if selected and selected.isdigit() and int(selected) not in {pk for pk, _ in options}:
+        options = [*visible_documents(request.user).filter(pk=selected).values_list('pk', 'title'), *options]
+
+    context = {
+        'options': options,
+        'selected': int(selected) if selected and selected.isdigit() else None,
+        'has_more': has_more,
+        'empty_label': PlanItemExecutionForm.base_fields['evidence_document'].empty_label,
+    }
+    return render(request, 'plan/_evidence_options.html', context)
+
+
+# --- Chunked (resumable) evidence uploads: init -> PUT chunks -> finalize ---
+
+@login_required
+def plan_evidence_upload_init(request, pk:int):
+    """Starts a chunked upload for a plan item's evidence and returns its id and the chunk size."""
+    item = get_object_or_404(OperationalPlanItems, pk=pk)
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+    form = EvidenceUploadInitForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=422)
+    upload = EvidenceUpload.objects.create(
+        user=request.user, plan_item=item,
+        title=form.cleaned_data['title'], description=form.cleaned_data['description'],
+        filename=form.cleaned_data['filename'], total_size=form.cleaned_data['size'],
+    )
+    return JsonResponse({
+        'upload_id': str(upload.pk), 'offset': 0, 'chunk_size': settings.EVIDENCE_UPLOAD_CHUNK_SIZE,
+    }, status=201)
+
+@login_required
+def plan_evidence_upload_chunk(request, upload_id):
+    """
+    GET: where the upload stands (to resume after a failure).
+    PUT ?offset=N: the raw bytes of the next chunk; 409 with the expected offset if N is not it.
+    DELETE: abandons the upload.
+    """
+    upload = get_object_or_404(EvidenceUpload, pk=upload_id, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse({
+            'offset': upload.received, 'size': upload.total_size, 'chunk_size': settings.EVIDENCE_UPLOAD_CHUNK_SIZE,
+        })
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return HttpResponse(status=204)
+    if request.method != 'PUT':
+        return HttpResponse(status=405)
+
+    try:
+        offset = int(request.GET['offset'])
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        # The body is streamed to the staging file, never loaded whole
+        received = write_chunk(upload, offset, request, length)
+    except UploadOffsetError as e:
+        return JsonResponse({'offset': e.offset}, status=409)
+    except (KeyError, ValueError):
+        return JsonResponse({'offset': upload.received}, status=400)
+    return JsonResponse({'offset': received, 'size': upload.total_size})
+
+@login_required
+def plan_evidence_upload_finalize(request, upload_id):
+    """Assembles a fully received upload into a vault document and links it like plan_upload_evidence_save."""
+    upload = get_object_or_404(EvidenceUpload.objects.select_related('plan_item'), pk=upload_id, user=request.user)
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+    item = upload.plan_item
+    if item is None:
+        return HttpResponse(status=410)
+    try:
+        with transaction.atomic():
+            doc = finalize_upload(upload, academic_year=_evidence_academic_year(item))
+    except UploadIncompleteError:
+        return JsonResponse({'offset': upload.received, 'size': upload.total_size}, status=409)
+    return _link_uploaded_evidence(request, item, doc)
+
+@login_required
+def plan_evidence_preview(request, doc_pk:int):
+    """
+    Lazily loaded thumbnail of a vault document for the evaluate modal.
+    While the preview is being generated the fragment polls itself, at most PREVIEW_MAX_POLLS
+    times (?poll=n counts them): a job no worker picks up must not be polled forever.
+    """
+    # Only documents the user may view (own / linked to their committees' items), 404 otherwise
+    docs = viewable_documents(request.user, EvidenceDocument.objects.only('id', 'title', 'file', 'preview', 'preview_status'))
+    doc = get_object_or_404(docs, pk=doc_pk)
+    try:
+        poll = max(int(request.GET.get('poll', 0)), 0)
+    except ValueError:
+        poll = 0
+    pending = doc.preview_status == PREVIEW_PENDING
+    context = {
+        'doc': doc,
+        'ready': doc.preview_status == PREVIEW_READY and bool(doc.preview),
+        'pending': pending and poll < PREVIEW_MAX_POLLS,
+        'timed_out': pending and poll >= PREVIEW_MAX_POLLS,
+        'next_poll': poll + 1,
+    }
+    return render(request, 'plan/_evidence_preview.html', context)
+
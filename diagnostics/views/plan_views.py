@@ -8,10 +8,14 @@ import json
 from django.contrib.auth.models import Group
 
 from ..models import OperationalPlanItems, Committee, Staff
+from coredata.facets import compute_facets, plan_facets
 from ..forms.plan_forms import PlanItemExecutionForm, PlanItemEvaluationForm, EvidenceUploadForm
 
 # The data loading block has been completely removed.
 
+# Plan filter dropdowns (shared with coredata); diagnostics' items keep the year in a plain `year` column
+DIAGNOSTICS_PLAN_FACETS = plan_facets(year_field='year')
+
 def get_chart_data(queryset, field):
     """Helper function to prepare data for Chart.js."""
     color_maps = {
@@ -146,12 +150,8 @@ def plan_list(request):
         ).distinct()
     
     # --- Dropdown options (based on the filtered queryset 'qs') ---
-    all_years = qs.values_list('year', flat=True).distinct().order_by('year')
-    all_rank_names = qs.values_list('rank_name', flat=True).distinct().order_by('rank_name')
-    all_executors = qs.values_list('executor', flat=True).distinct().order_by('executor')
-    all_date_ranges = qs.values_list('date_range', flat=True).distinct().order_by('date_range')
-    all_follow_ups = qs.values_list('follow_up', flat=True).distinct().order_by('follow_up')
-    all_evaluations = qs.values_list('evaluation', flat=True).distinct().order_by('evaluation')
+    # All six dropdowns (with per-option counts) come from a single grouped query.
+    facets = compute_facets(qs, DIAGNOSTICS_PLAN_FACETS)
     
     sort_by = request.GET.get('sort_by', 'rank_name')
     if sort_by == 'rank_name_exact':
@@ -237,13 +237,8 @@ def plan_list(request):
         
         'pagination_url_params': pagination_url_params, # New clean params string
 
-        # Dropdown options
-        'all_years': all_years,
-        'all_rank_names': all_rank_names,
-        'all_executors': all_executors,
-        'all_date_ranges': all_date_ranges,
-        'all_follow_ups': all_follow_ups,
-        'all_evaluations': all_evaluations,
+        # Dropdown options: lists of (value, count)
+        **facets,
         'all_statuses': OperationalPlanItems._meta.get_field('status').choices,
     }
 
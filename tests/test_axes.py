@@ -0,0 +1,47 @@
+import pytest
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.axes import QUALITY_GROUP_NAME, axis_evaluators, evaluator_names
+from coredata.models import EvaluationAxis, Staff
+
+
+@pytest.mark.django_db
+class TestAxisEvaluators:
+    def setup_method(self):
+        cache.clear()
+        self.group = Group.objects.create(name=QUALITY_GROUP_NAME)
+        self.axis = EvaluationAxis.objects.create(group=self.group, name="التعليم والتعلم", ordinal=1)
+        self.user = User.objects.create_user(username="eval1")
+        self.staff = Staff.objects.create(user=self.user, name="أحمد")
+        self.axis.evaluators.add(self.user)
+
+    def test_map_is_built_once_and_cached(self):
+        with CaptureQueriesContext(connection) as ctx:
+            assert evaluator_names("التعليم والتعلم") == "أحمد"
+        assert len(ctx) == 1
+        with CaptureQueriesContext(connection) as ctx:
+            assert evaluator_names("محور غير معروف") == "غير محدد"
+        assert len(ctx) == 0
+
+    def test_map_follows_changes(self):
+        axis_evaluators()
+        other = User.objects.create_user(username="eval2")
+        Staff.objects.create(user=other, name="سارة")
+        self.axis.evaluators.add(other)
+        assert evaluator_names("التعليم والتعلم") == "أحمد, سارة"
+
+        self.axis.name = "القيادة"
+        self.axis.save()
+        assert axis_evaluators()["القيادة"] == ["أحمد", "سارة"]
+
+        self.staff.name = "أحمد علي"
+        self.staff.save()
+        assert evaluator_names("القيادة") == "أحمد علي, سارة"
+
+    def test_axes_are_not_capped(self):
+        for i in range(2, 10):
+            EvaluationAxis.objects.create(group=self.group, name=f"محور {i}", ordinal=i)
+        assert len(axis_evaluators()) == 9
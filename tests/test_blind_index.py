@@ -0,0 +1,85 @@
+import importlib
+
+import pytest
+from django.apps import apps
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.forms import modelform_factory
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+
+from coredata.models import Staff, Student
+
+urlpatterns = [path('admin/', admin.site.urls)]
+
+@pytest.mark.django_db
+class TestBlindIndex:
+    def test_exact_lookups_use_the_blind_index(self):
+        student = Student.objects.create(national_no="29876543210", name_ar="طالب", grade="7", section="1")
+        with CaptureQueriesContext(connection) as ctx:
+            assert Student.objects.get(national_no=" 29876543210 ") == student
+        assert "national_no_index" in ctx.captured_queries[0]['sql']
+        assert list(Student.objects.filter(national_no__in=["1", "29876543210"])) == [student]
+        assert not Student.objects.filter(national_no="29876543211").exists()
+        assert Student.objects.filter(national_no__iexact="29876543210").exists()
+        assert Student.objects.get(pk=student.pk).national_no == "29876543210"
+
+    def test_update_or_create_matches_existing_rows(self):
+        Student.objects.create(national_no="29876543210", name_ar="قديم", grade="7", section="1")
+        student, created = Student.objects.update_or_create(
+            national_no="29876543210", defaults={'name_ar': "جديد", 'grade': "8", 'section': "2"},
+        )
+        assert not created and student.name_ar == "جديد"
+        assert Student.objects.count() == 1
+
+    def test_uniqueness_is_enforced(self):
+        Staff.objects.create(name="أ", national_no="27612345678")
+        Staff.objects.create(name="ب")  # Blank values have no index
+        Staff.objects.create(name="ج")
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Staff.objects.create(name="د", national_no="27612345678")
+
+    def test_index_follows_changes_and_is_field_scoped(self):
+        staff = Staff.objects.create(name="أ", national_no="27612345678", phone_no="27612345678")
+        assert staff.national_no_index != staff.phone_no_index
+        staff.national_no = "27600000000"
+        staff.save()
+        assert Staff.objects.filter(national_no="27600000000").exists()
+        assert not Staff.objects.filter(national_no="27612345678").exists()
+
+    def test_forms_report_duplicates(self):
+        existing = Staff.objects.create(name="أ", national_no="27612345678")
+        StaffForm = modelform_factory(Staff, fields=['name', 'national_no'])
+        form = StaffForm({'name': "ب", 'national_no': "27612345678"})
+        assert not form.is_valid()
+        assert 'national_no' in form.errors
+
+        # Saving the row itself again is not a duplicate
+        assert StaffForm({'name': "أ", 'national_no': "27612345678"}, instance=existing).is_valid()
+        student = Student(national_no="29876543210", name_ar="ط", grade="7", section="1")
+        student.full_clean()
+        student.save()
+        with pytest.raises(ValidationError) as excinfo:
+            Student(national_no="29876543210", name_ar="ط", grade="7", section="1").full_clean()
+        assert 'national_no' in excinfo.value.message_dict
+
+    @pytest.mark.urls(__name__)
+    def test_admin_shows_form_error(self, admin_client):
+        Staff.objects.create(name="أ", national_no="27612345678")
+        response = admin_client.post('/admin/coredata/staff/add/', {'name': "ب", 'national_no': "27612345678", 'nationality': 'EXP'})
+        assert response.status_code == 200
+        assert 'national_no' in response.context['adminform'].form.errors
+        assert Staff.objects.count() == 1
+
+    def test_migration_refuses_duplicated_values(self):
+        migration = importlib.import_module('coredata.migrations.0033_blind_indexes')
+        first = Student.objects.create(national_no="29876543210", name_ar="أ", grade="7", section="1")
+        second = Student.objects.create(national_no="29800000000", name_ar="ب", grade="7", section="1")
+        migration.check_duplicates(apps, None)
+
+        # A copy from before the blind index (update() rewrites the ciphertext only)
+        Student.objects.filter(pk=second.pk).update(national_no=" 29876543210")
+        with pytest.raises(RuntimeError) as excinfo:
+            migration.check_duplicates(apps, None)
+        assert f"Student.national_no: pk {first.pk}, {second.pk}" in str(excinfo.value)
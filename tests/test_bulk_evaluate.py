@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from coredata.models import Committee, OperationalPlanItems
+from coredata.rollups import rollup_total
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestBulkEvaluate:
+    def setup_method(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reviewer")
+        self.comm = Committee.objects.create(name="لجنة الجودة", code="Q")
+        self.comm.members.add(self.user)
+        self.items = [
+            OperationalPlanItems.objects.create(procedure=f"إجراء {i}", evaluator_committee=self.comm, status="Pending Review")
+            for i in range(3)
+        ]
+        self.other = OperationalPlanItems.objects.create(procedure="بند آخر", status="Pending Review")
+
+    def post(self, client, items, **data):
+        client.force_login(self.user)
+        return client.post('/plan/bulk-evaluate/', {
+            'items': [item.pk for item in items], 'status': 'Completed', 'evaluation': 'متحقق', **data,
+        })
+
+    def test_applies_decision_to_all_selected_items(self, client):
+        response = self.post(client, self.items, evaluation_notes="معتمد")
+        assert response.status_code == 200
+
+        body = response.content.decode()
+        for item in self.items:
+            assert f'<tr hx-swap-oob="true" id="row-{item.pk}"' in body
+            item.refresh_from_db()
+            assert (item.status, item.evaluation, item.evaluation_notes) == ("Completed", "متحقق", "معتمد")
+            assert item.evidence_source_employee == "reviewer"
+            assert item.history.count() == 2
+            assert "معتمد" in item.search_document
+        assert rollup_total(status="Completed") == 3
+
+    def test_blank_evaluation_keeps_current_value(self, client):
+        self.items[0].evaluation = "غير متحقق"
+        self.items[0].save()
+        self.post(client, self.items[:1], evaluation="")
+        self.items[0].refresh_from_db()
+        assert self.items[0].evaluation == "غير متحقق"
+
+    def test_items_outside_user_committees_are_rejected(self, client):
+        response = self.post(client, [self.items[0], self.other])
+        assert response.status_code == 422
+        self.other.refresh_from_db()
+        assert self.other.status == "Pending Review"
@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+import pytest
+from django.contrib.auth.models import User
+
+from coredata.chunked_uploads import staging_dir
+from coredata.models import EvidenceDocument, EvidenceUpload, OperationalPlanItems
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestChunkedUpload:
+    def setup_method(self):
+        self.user = User.objects.create_user(username="scanner")
+        self.item = OperationalPlanItems.objects.create(procedure="إجراء", status="In Progress")
+        self.content = os.urandom(10_000)
+
+    def init(self, client):
+        client.force_login(self.user)
+        response = client.post(f'/plan/item/{self.item.pk}/evidence/upload/', {
+            'title': "مسح ضوئي", 'filename': "scan.pdf", 'size': len(self.content),
+        })
+        assert response.status_code == 201
+        return response.json()['upload_id']
+
+    def put(self, client, upload_id, offset, data):
+        return client.put(f'/plan/uploads/{upload_id}/?offset={offset}', data, content_type='application/octet-stream')
+
+    def test_upload_resumes_and_finalizes(self, client, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.EVIDENCE_UPLOAD_STAGING_DIR = str(tmp_path)
+        upload_id = self.init(client)
+        assert self.put(client, upload_id, 0, self.content[:4000]).json()['offset'] == 4000
+
+        # A retried chunk and a skipped one are both answered with the offset to resume from
+        assert self.put(client, upload_id, 0, self.content[:4000]).status_code == 409
+        response = self.put(client, upload_id, 8000, self.content[8000:])
+        assert (response.status_code, response.json()['offset']) == (409, 4000)
+        assert client.post(f'/plan/uploads/{upload_id}/finalize/').status_code == 409
+
+        assert client.get(f'/plan/uploads/{upload_id}/').json()['offset'] == 4000
+        self.put(client, upload_id, 4000, self.content[4000:])
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(f'/plan/uploads/{upload_id}/finalize/')
+        assert response.status_code == 200
+
+        self.item.refresh_from_db()
+        doc = self.item.evidence_document
+        assert self.item.status == "Pending Review"
+        assert (doc.title, doc.original_filename, doc.file_size) == ("مسح ضوئي", "scan.pdf", len(self.content))
+        assert doc.file_hash == hashlib.sha256(self.content).hexdigest()
+        assert doc.file.read() == self.content
+        assert not EvidenceUpload.objects.exists()
+        assert not os.path.exists(os.path.join(str(tmp_path), upload_id))
+
+    def test_uploads_are_private_to_their_owner(self, client, settings, tmp_path):
+        settings.EVIDENCE_UPLOAD_STAGING_DIR = str(tmp_path)
+        upload_id = self.init(client)
+        client.force_login(User.objects.create_user(username="intruder"))
+        assert self.put(client, upload_id, 0, self.content).status_code == 404
+        assert not EvidenceDocument.objects.exists()
+
+    def test_oversized_chunk_is_rejected(self, client, settings, tmp_path):
+        settings.EVIDENCE_UPLOAD_STAGING_DIR = str(tmp_path)
+        settings.EVIDENCE_UPLOAD_CHUNK_SIZE = 1000
+        upload_id = self.init(client)
+        assert self.put(client, upload_id, 0, self.content[:2000]).status_code == 400
+        upload = EvidenceUpload.objects.get()
+        assert upload.received == 0 and not os.path.exists(staging_dir(upload))
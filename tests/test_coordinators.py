@@ -0,0 +1,40 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from coredata.coordinators import match_subject
+from coredata.models import Committee, JobTitle, Staff
+from coredata.roles import get_user_roles
+
+
+@pytest.mark.django_db
+class TestCoordinatorIndex:
+    def setup_method(self):
+        cache.clear()
+        self.jt = JobTitle.objects.create(title="معلم اللغة الإنجليزية", code="TCH-EN")
+        self.user = User.objects.create_user(username="teacher_en")
+        Staff.objects.create(user=self.user, name="Teacher EN", job_title=self.jt)
+
+    def test_subject_matching_is_normalized(self):
+        assert match_subject("معلم اللغه الانجليزيه") == match_subject("معلم اللغة الإنجليزية")
+        assert match_subject("سكرتير") is None
+
+    def test_index_follows_committee_changes(self):
+        """
+        Verify that creating/renaming a coordinator committee updates the job-title index and the user's roles.
+        """
+        coord = Committee.objects.create(name="منسق اللغة الإنجليزية", code="C-EN")
+        Committee.objects.create(name="منسق الرياضيات", code="C-MA")
+        assert list(self.jt.coordinator_committees.all()) == [coord]
+        assert get_user_roles(User.objects.get(pk=self.user.pk)).coordinator_committee_ids == {coord.id}
+
+        coord.name = "لجنة الأنشطة"
+        coord.save()
+        assert not self.jt.coordinator_committees.exists()
+        assert not get_user_roles(User.objects.get(pk=self.user.pk)).coordinator_committee_ids
+
+    def test_index_follows_job_title_changes(self):
+        math = Committee.objects.create(name="منسق الرياضيات", code="C-MA")
+        self.jt.title = "معلم رياضيات"
+        self.jt.save()
+        assert list(self.jt.coordinator_committees.all()) == [math]
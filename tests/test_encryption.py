@@ -0,0 +1,142 @@
+import json
+import time
+from io import StringIO
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db.models import ExpressionWrapper, F, TextField
+
+from coredata.encryption import BACKENDS, KeyRing, decrypted_values, keyring
+from coredata.models import Student
+
+ROWS = 1000
+
+@pytest.mark.django_db
+class TestKeyRing:
+    def test_ciphers_are_built_once(self):
+        assert keyring() is keyring()
+        assert keyring().decrypt(keyring().encrypt("29876543210")) == "29876543210"
+
+    def test_old_ciphertexts_read_after_rotation(self, settings):
+        old = Student.objects.create(national_no="111", parent_phone="5555", name_ar="أ", grade="7", section="1")
+        settings.FIELD_ENCRYPTION_KEYS = [Fernet.generate_key().decode()]
+        new = Student.objects.create(national_no="222", name_ar="ب", grade="7", section="1")
+        assert len(keyring().ciphers) == 2
+        assert Student.objects.get(pk=old.pk).parent_phone == "5555"
+        assert Student.objects.get(pk=new.pk).national_no == "222"
+
+        settings.FIELD_ENCRYPTION_KEYS = []  # The new key is gone: its rows no longer decrypt
+        assert Student.objects.get(pk=new.pk).national_no != "222"
+
+    def test_batched_values(self):
+        Student.objects.create(national_no="111", parent_phone="5555", name_ar="أ", grade="7", section="1")
+        Student.objects.create(national_no="222", name_ar="ب", grade="7", section="1")
+        rows = decrypted_values(Student.objects.order_by('national_no_index'), 'national_no', 'parent_phone', others=('name_ar',))
+        assert sorted((r['name_ar'], r['national_no'], r['parent_phone']) for r in rows) == [("أ", "111", "5555"), ("ب", "222", None)]
+
+    def test_per_row_cost(self):
+        """Micro-benchmark: encrypt / decrypt / batched decrypt cost per row with the cached key ring."""
+        ring = keyring()
+        values = [f"2980000{i:04d}" for i in range(ROWS)]
+
+        start = time.perf_counter()
+        tokens = [ring.encrypt(v) for v in values]
+        encrypt_cost = (time.perf_counter() - start) / ROWS
+
+        start = time.perf_counter()
+        assert [ring.decrypt(t) for t in tokens] == values
+        decrypt_cost = (time.perf_counter() - start) / ROWS
+
+        start = time.perf_counter()
+        assert ring.decrypt_many(tokens) == values
+        batch_cost = (time.perf_counter() - start) / ROWS
+
+        # Generous bounds: a key derivation + Fernet construction per call would be far slower
+        assert encrypt_cost < 0.001 and decrypt_cost < 0.001 and batch_cost < 0.001
+
+@pytest.mark.django_db
+class TestLazyDecryption:
+    def setup_method(self):
+        self.student = Student.objects.create(national_no="111", parent_phone="5555", name_ar="أ", grade="7", section="1")
+
+    def count_decrypts(self, monkeypatch):
+        calls = []
+        ring = keyring()
+        original = ring.decrypt
+        monkeypatch.setattr(ring, 'decrypt', lambda token: calls.append(token) or original(token))
+        return calls
+
+    def test_listing_does_not_decrypt(self, monkeypatch):
+        calls = self.count_decrypts(monkeypatch)
+        names = [s.name_ar for s in Student.objects.all()]
+        assert names == ["أ"] and calls == []
+
+        student = Student.objects.get(pk=self.student.pk)
+        assert student.national_no == "111" and type(student.national_no) is str
+        assert student.national_no == "111"
+        assert len(calls) == 1  # Decrypted once, then cached on the instance
+
+    def test_untouched_values_are_saved_as_stored(self):
+        raw = Student.objects.values_list(ExpressionWrapper(F('national_no'), TextField()), flat=True).get()
+        student = Student.objects.get(pk=self.student.pk)
+        student.name_ar = "ب"
+        student.save()  # (The history row still reads the values to copy them)
+        assert Student.objects.values_list(ExpressionWrapper(F('national_no'), TextField()), flat=True).get() == raw
+        assert Student.objects.get(national_no="111").parent_phone == "5555"
+
+    def test_changed_values_are_reencrypted_and_reindexed(self):
+        student = Student.objects.get(pk=self.student.pk)
+        student.national_no = "999"
+        student.save()
+        assert Student.objects.get(national_no="999").pk == student.pk
+
+    def test_values_rows_hold_plain_strings(self):
+        Student.objects.create(national_no="000", parent_phone="4444", name_ar="ب", grade="7", section="1")
+        row = Student.objects.values('national_no', 'parent_national_no').get(pk=self.student.pk)
+        assert row == {'national_no': "111", 'parent_national_no': None}
+        assert type(row['national_no']) is str
+        assert json.dumps(row) == '{"national_no": "111", "parent_national_no": null}'
+
+        numbers = Student.objects.values_list('national_no', flat=True)
+        assert sorted(numbers) == ["000", "111"]
+        assert all(isinstance(value, str) for value in numbers)
+        assert [n + "x" for n in numbers.order_by('pk')] == ["111x", "000x"]
+        assert list(Student.objects.values_list('pk', 'parent_phone').order_by('pk'))[1][1] == "4444"
+        assert Student.objects.values_list('national_no', named=True).get(pk=self.student.pk).national_no == "111"
+        # The simple_history copies too
+        assert set(Student.history.values_list('national_no', flat=True)) == {"000", "111"}
+
+@pytest.mark.django_db
+class TestBackends:
+    @pytest.mark.parametrize('backend', ['aes-gcm', 'chacha20-poly1305'])
+    def test_aead_tokens_are_smaller_and_mixed_data_reads(self, settings, backend):
+        fernet = Student.objects.create(national_no="111", parent_phone="55501234", name_ar="أ", grade="7", section="1")
+        settings.FIELD_ENCRYPTION_BACKEND = backend
+        aead = Student.objects.create(national_no="222", parent_phone="55505678", name_ar="ب", grade="7", section="1")
+
+        tokens = dict(Student.objects.values_list('pk', ExpressionWrapper(F('parent_phone'), output_field=TextField())))
+        assert tokens[aead.pk].startswith(BACKENDS[backend].tag + '$')
+        assert len(tokens[aead.pk]) <= len(tokens[fernet.pk]) * 0.6  # 60 vs 100 characters for 8 digits
+        assert Student.objects.get(pk=fernet.pk).parent_phone == "55501234"
+        assert Student.objects.get(national_no="222").parent_phone == "55505678"
+        assert keyring().decrypt_many(list(tokens.values())) == list(Student.objects.values_list('parent_phone', flat=True))
+
+    def test_tampered_or_unknown_key_tokens_do_not_open(self):
+        ring = KeyRing(['key-1'], 'aes-gcm')
+        token = ring.encrypt("55501234")
+        with pytest.raises(InvalidToken):
+            ring.decrypt(token[:-2] + ('A' if token[-2] != 'A' else 'B') + token[-1])
+        with pytest.raises(InvalidToken):
+            KeyRing(['key-2'], 'aes-gcm').decrypt(token)
+        assert KeyRing(['key-2', 'key-1']).decrypt(token) == "55501234"
+
+    def test_unknown_backend(self):
+        with pytest.raises(ImproperlyConfigured):
+            KeyRing(['key-1'], 'rot13')
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_field_encryption', rows=50, stdout=out)
+        assert all(name in out.getvalue() for name in BACKENDS)
@@ -0,0 +1,48 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.forms import PlanItemExecutionForm
+from coredata.models import EvidenceFile, OperationalPlanItems
+
+
+@pytest.mark.django_db
+class TestEvidenceFileChoices:
+    def setup_method(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="exec")
+        self.reg = EvidenceFile.objects.create(name="سجل حضور", code="REG")
+        self.plan = EvidenceFile.objects.create(name="Plan", code="PLAN")
+        self.item = OperationalPlanItems.objects.create(procedure="إجراء", evidence_source_file=" plan ")
+
+    def test_form_is_built_without_queries(self):
+        PlanItemExecutionForm(instance=self.item, user=self.user)  # Warms the process-level list
+        with CaptureQueriesContext(connection) as ctx:
+            form = PlanItemExecutionForm(instance=self.item, user=self.user)
+            choices = list(form.fields['evidence_source_file'].choices)
+        assert len(ctx) == 0
+        assert [c[1] for c in choices[1:]] == ["Plan", "سجل حضور"]
+        assert form.initial['evidence_source_file'] == self.plan.pk
+
+    def test_choices_follow_changes(self):
+        PlanItemExecutionForm(instance=self.item, user=self.user)
+        EvidenceFile.objects.create(name="خطة علاجية", code="REM")
+        self.plan.delete()
+        form = PlanItemExecutionForm(instance=self.item, user=self.user)
+        assert [c[1] for c in form.fields['evidence_source_file'].choices][1:] == ["خطة علاجية", "سجل حضور"]
+        assert form.initial['evidence_source_file'] == " plan "  # No longer matches a file
+
+    def test_cleans_to_file_name(self):
+        data = {'status': 'In Progress', 'evidence_source_file': str(self.reg.pk)}
+        form = PlanItemExecutionForm(data, instance=self.item, user=self.user)
+        assert form.is_valid(), form.errors
+        assert form.cleaned_data['evidence_source_file'] == "سجل حضور"
+
+        form = PlanItemExecutionForm({**data, 'evidence_source_file': '999999'}, instance=self.item, user=self.user)
+        assert not form.is_valid()
+
+    def test_without_user_only_keeps_saved_file(self):
+        form = PlanItemExecutionForm(instance=self.item, user=None)
+        assert [c[0] for c in form.fields['evidence_source_file'].choices][1:] == [self.plan.pk]
@@ -0,0 +1,36 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.facets import compute_facets
+from coredata.models import AcademicYear, OperationalPlanItems
+
+
+@pytest.mark.django_db
+class TestPlanFacets:
+    def setup_method(self):
+        self.y1 = AcademicYear.objects.create(name="2024-2025", code="2425")
+        self.y2 = AcademicYear.objects.create(name="2025-2026", code="2526")
+        OperationalPlanItems.objects.create(academic_year=self.y1, rank_name="الرياضيات", follow_up="تم الإنجاز", code="F-1")
+        OperationalPlanItems.objects.create(academic_year=self.y2, rank_name="الرياضيات", follow_up="مؤجل", code="F-2")
+        OperationalPlanItems.objects.create(academic_year=self.y2, rank_name="العلوم", code="F-3")
+
+    def test_single_query_with_counts(self):
+        """
+        Verify that all dropdowns are computed in one query, with per-option counts.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            facets = compute_facets(OperationalPlanItems.objects.all())
+
+        assert len(ctx.captured_queries) == 1
+        assert facets['all_years'] == [("2024-2025", 1), ("2025-2026", 2)]
+        assert dict(facets['all_rank_names']) == {"الرياضيات": 2, "العلوم": 1}
+        # Empty values are dropped from the options
+        assert dict(facets['all_follow_ups']) == {"تم الإنجاز": 1, "مؤجل": 1}
+        assert facets['all_evaluations'] == []
+
+    def test_facets_follow_filtered_queryset(self):
+        qs = OperationalPlanItems.objects.filter(academic_year=self.y2).distinct()
+        facets = compute_facets(qs)
+        assert facets['all_years'] == [("2025-2026", 2)]
+        assert dict(facets['all_rank_names']) == {"الرياضيات": 1, "العلوم": 1}
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from coredata.models import EvidenceDocument
+
+
+def photo(size=(4000, 3000)):
+    # Noise-free gradient photo with an EXIF orientation tag (rotate 90°)
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=98, exif=exif)
+    return buffer.getvalue()
+
+@pytest.mark.django_db
+class TestImageOptimization:
+    def setup_method(self):
+        self.user = User.objects.create_user(username="teacher")
+
+    def upload(self, content, name):
+        return EvidenceDocument.objects.create(user=self.user, title="صورة", file=ContentFile(content, name=name))
+
+    def test_photo_is_downscaled_and_stripped(self, settings):
+        settings.EVIDENCE_IMAGE_MAX_DIMENSION = 1024
+        original = photo()
+        doc = self.upload(original, "IMG_0001.jpg")
+        assert doc.file.name.endswith('.jpg') and not doc.original_file
+        assert doc.bytes_saved == len(original) - doc.file_size > 0
+        with Image.open(doc.file) as stored:
+            assert stored.size == (768, 1024)  # Rotated per EXIF, then fit into 1024
+            assert not stored.getexif()
+
+    def test_original_can_be_kept(self, settings):
+        settings.EVIDENCE_IMAGE_KEEP_ORIGINAL = True
+        original = photo()
+        doc = self.upload(original, "IMG_0002.jpg")
+        assert doc.original_file.read() == original
+        assert doc.file_size < len(original)
+
+    def test_other_files_are_stored_verbatim(self, settings):
+        doc = self.upload(b"not really a jpeg", "broken.jpg")
+        assert doc.bytes_saved is None and doc.file.read() == b"not really a jpeg"
+
+        settings.EVIDENCE_IMAGE_OPTIMIZATION = False
+        original = photo((800, 600))
+        assert self.upload(original, "IMG_0003.jpg").file_size == len(original)
+
+    def test_metadata_is_stripped_even_without_savings(self):
+        # A small, already heavily compressed phone photo with its GPS position
+        image = Image.effect_noise((64, 64), 60).convert('RGB')
+        exif = Image.Exif()
+        exif[0x010F] = "PhoneMaker"
+        exif.get_ifd(0x8825)[2] = (25.0, 17.0, 0.0)  # GPSLatitude
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=20, exif=exif)
+        doc = self.upload(buffer.getvalue(), "IMG_0004.jpg")
+        with Image.open(doc.file) as stored:
+            assert not stored.getexif()
+        assert doc.bytes_saved is not None
+
+    def test_webp_keeps_transparency(self):
+        image = Image.effect_noise((300, 300), 40).convert('RGBA')
+        image.putalpha(Image.linear_gradient('L').resize((300, 300)))  # Transparent top row
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', lossless=True)
+        doc = self.upload(buffer.getvalue(), "logo.webp")
+        assert doc.bytes_saved > 0
+        with Image.open(doc.file) as stored:
+            assert stored.mode == 'RGBA' and stored.getpixel((0, 0))[3] == 0
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from cryptography.fernet import Fernet
+from django.core.management import call_command
+from django.db.models import ExpressionWrapper, F, TextField
+
+from coredata.encryption import KeyRing
+from coredata.key_rotation import KeyRotation
+from coredata.models import Staff, Student
+
+
+def raw_tokens(model, field):
+    return list(model.objects.order_by('pk').values_list(ExpressionWrapper(F(field), output_field=TextField()), flat=True))
+
+@pytest.mark.django_db
+class TestKeyRotation:
+    def setup_method(self):
+        self.students = [
+            Student.objects.create(national_no=f"2980000{i:04d}", parent_phone="5555", name_ar=f"طالب {i}", grade="7", section="1")
+            for i in range(5)
+        ]
+        Staff.objects.create(name="أ", national_no="27612345678", phone_no="3333")
+
+    def test_rows_move_to_the_new_key(self, settings, tmp_path):
+        new_key = Fernet.generate_key().decode()
+        settings.FIELD_ENCRYPTION_KEYS = [new_key]
+        call_command('rotate_encryption_keys', workers=1, batch_size=2, checkpoint=str(tmp_path / 'cp.json'))
+
+        only_new = Fernet(new_key.encode())
+        for token in raw_tokens(Student, 'national_no') + raw_tokens(Staff, 'phone_no'):
+            only_new.decrypt(token.encode())
+        assert Student.objects.get(national_no="29800000003").parent_phone == "5555"
+        assert not (tmp_path / 'cp.json').exists()
+
+    def test_history_rows_are_rotated(self, settings, tmp_path):
+        new_key = Fernet.generate_key().decode()
+        settings.FIELD_ENCRYPTION_KEYS = [new_key]
+        call_command('rotate_encryption_keys', workers=1, checkpoint=str(tmp_path / 'cp.json'))
+
+        settings.SECRET_KEY = "the-old-key-is-gone"  # Only the new key is left
+        for token in raw_tokens(Student.history.model, 'national_no') + raw_tokens(Staff.history.model, 'phone_no'):
+            Fernet(new_key.encode()).decrypt(token.encode())
+        assert sorted(h.national_no for h in Student.history.all())[3] == "29800000003"
+        assert {h.parent_phone for h in Student.history.all()} == {"5555"}
+        assert Staff.history.get().phone_no == "3333"
+
+    def test_resumes_from_checkpoint(self, settings, tmp_path):
+        settings.FIELD_ENCRYPTION_KEYS = [Fernet.generate_key().decode()]
+        checkpoint = str(tmp_path / 'cp.json')
+        rotation = KeyRotation([*settings.FIELD_ENCRYPTION_KEYS, settings.SECRET_KEY], batch_size=2, checkpoint=checkpoint)
+        rotation.rotate_batch(Student, 0)
+        before = raw_tokens(Student, 'national_no')
+        with open(checkpoint, 'w') as fh:
+            json.dump({'key': rotation.target, 'models': {'coredata.student': self.students[1].pk}}, fh)
+
+        rows, updated, unreadable = KeyRotation(rotation.secrets, batch_size=2, checkpoint=checkpoint).rotate(Student)
+        assert (rows, updated, unreadable) == (3, 3, 0)
+        assert raw_tokens(Student, 'national_no')[:2] == before[:2]  # Done rows are not touched again
+
+    def test_old_secret_key_and_plain_values(self, settings, tmp_path):
+        old_secret = settings.SECRET_KEY
+        # A value stored before encryption existed, and an empty one
+        Student.objects.filter(pk=self.students[0].pk).update(
+            parent_national_no=ExpressionWrapper(F('name_ar'), output_field=TextField()), parent_phone=None,
+        )
+        settings.SECRET_KEY = "a-new-secret"
+        ring = KeyRing([settings.SECRET_KEY])
+
+        rotation = KeyRotation([settings.SECRET_KEY], checkpoint=str(tmp_path / 'cp.json'))
+        assert rotation.rotate(Student)[2] == 9  # national_no / parent_phone tokens unreadable without the old key
+
+        rotation = KeyRotation([settings.SECRET_KEY, old_secret], workers=2, checkpoint=str(tmp_path / 'other.json'))
+        with rotation:
+            assert rotation.rotate(Student) == (5, 5, 0)
+        assert {ring.decrypt(t) for t in raw_tokens(Student, 'parent_national_no') if t} == {"طالب 0"}
+        assert ring.decrypt(raw_tokens(Student, 'national_no')[4]) == "29800000004"
@@ -0,0 +1,82 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.models import OperationalPlanItems
+from coredata.pagination import decode_cursor, estimate_count, keyset_paginate
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def setup_method(self):
+        cache.clear()
+        ranks = ["ب", None, "أ", "ب", None, "ج", "أ"]
+        for i, rank in enumerate(ranks):
+            OperationalPlanItems.objects.create(rank_name=rank, code=f"K-{i}")
+
+    def walk(self, descending):
+        qs = OperationalPlanItems.objects.all()
+        seen, cursor, pages = [], None, []
+        while True:
+            page = keyset_paginate(qs, 'rank_name', descending=descending, cursor=cursor, per_page=3)
+            pages.append(page)
+            seen += [it.pk for it in page]
+            if not page.has_next:
+                return seen, pages
+            cursor = page.next_cursor
+
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_forward_walk_matches_ordering(self, descending):
+        """
+        Verify that following next cursors visits every row once, in (rank_name, id) order, nulls included.
+        """
+        seen, pages = self.walk(descending)
+        expected = sorted(
+            OperationalPlanItems.objects.all(),
+            key=lambda it: (it.rank_name is not None, it.rank_name or "", it.pk),
+            reverse=descending,
+        )
+        assert seen == [it.pk for it in expected]
+        assert [len(p) for p in pages] == [3, 3, 1]
+        assert not pages[0].has_previous and pages[1].has_previous
+
+    def test_previous_cursor_returns_previous_page(self):
+        _, pages = self.walk(False)
+        qs = OperationalPlanItems.objects.all()
+        back = keyset_paginate(qs, 'rank_name', cursor=pages[2].previous_cursor, per_page=3)
+        assert [it.pk for it in back] == [it.pk for it in pages[1]]
+        assert back.has_next and back.has_previous
+
+    def test_invalid_or_stale_cursor_restarts(self):
+        assert decode_cursor("not-a-cursor") is None
+        qs = OperationalPlanItems.objects.all()
+        first = keyset_paginate(qs, 'rank_name', per_page=3)
+        # A cursor issued for another sort column is ignored
+        other = keyset_paginate(qs, 'code', per_page=3, cursor=first.next_cursor)
+        assert not other.has_previous
+        assert other.estimated_count == 7
+
+    def test_count_is_not_rerun_for_every_page(self):
+        qs = OperationalPlanItems.objects.all()
+        assert estimate_count(qs) == 7
+        with CaptureQueriesContext(connection) as ctx:
+            assert estimate_count(qs) == 7
+        assert len(ctx) == 0
+
+    def test_count_of_a_filter_that_matches_nothing(self):
+        assert estimate_count(OperationalPlanItems.objects.filter(pk__in=[])) == 0
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestCursorModeSearch:
+    def test_search_keeps_relevance_order(self, client):
+        cache.clear()
+        OperationalPlanItems.objects.create(rank_name="أ", procedure="ورشة الرياضيات")
+        best = OperationalPlanItems.objects.create(rank_name="ب", procedure="الرياضيات الرياضيات الرياضيات")
+        client.force_login(User.objects.create_superuser(username="admin"))
+        response = client.get('/plan/', {'pagination': 'cursor', 'q': "الرياضيات"})
+        page = response.context['page_obj']
+        assert not getattr(page, 'is_keyset', False)
+        assert next(iter(page)).pk == best.pk
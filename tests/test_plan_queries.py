@@ -0,0 +1,96 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.models import Committee, EvidenceDocument, OperationalPlanItems
+
+HTMX = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'plan-table-container'}
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestPlanTableQueryBudget:
+    def setup_method(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="executor")
+        self.executor = Committee.objects.create(name="لجنة التنفيذ", code="EX")
+        self.evaluator = Committee.objects.create(name="لجنة التقييم", code="EV")
+        self.executor.members.add(self.user)
+        doc = EvidenceDocument.objects.create(user=self.user, title="دليل", file=ContentFile(b"x", name="e.pdf"))
+        for i in range(40):
+            OperationalPlanItems.objects.create(
+                rank_name="المجال", procedure=f"إجراء {i}", executor_committee=self.executor,
+                evaluator_committee=self.evaluator, evidence_document=doc, evidence_requested=True,
+            )
+
+    def count_queries(self, client, per_page):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/plan/', {'per_page': per_page, 'view_role': 'executor'}, **HTMX)
+        assert response.status_code == 200
+        return len(ctx)
+
+    def test_query_count_does_not_grow_with_page_size(self, client):
+        client.force_login(self.user)
+        self.count_queries(client, 5)  # Warm the roles cache
+        small = self.count_queries(client, 5)
+        large = self.count_queries(client, 40)
+        assert small == large
+        assert large <= 8
+
+    def test_row_flags_follow_committee_membership(self, client):
+        client.force_login(self.user)
+        response = client.get('/plan/', {'per_page': 5, 'view_role': 'executor'}, **HTMX)
+        rows = response.context['page_obj']
+        assert all(it.can_execute and not it.can_evaluate for it in rows)
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestPlanTableConditionalGet:
+    def setup_method(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="executor")
+        self.comm = Committee.objects.create(name="لجنة التنفيذ", code="EX")
+        self.comm.members.add(self.user)
+        self.item = OperationalPlanItems.objects.create(procedure="إجراء", executor_committee=self.comm)
+
+    def get(self, client, **headers):
+        return client.get('/plan/', {'view_role': 'executor'}, **HTMX, **headers)
+
+    def test_unchanged_table_answers_304(self, client):
+        client.force_login(self.user)
+        etag = self.get(client)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(client, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(ctx) <= 3  # session, user, the validator aggregate
+
+    def test_changes_produce_a_new_etag(self, client):
+        client.force_login(self.user)
+        etag = self.get(client)['ETag']
+
+        self.item.follow_up = "تم الإنجاز"
+        self.item.save()
+        response = self.get(client, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag
+
+        OperationalPlanItems.objects.create(procedure="جديد", executor_committee=self.comm)
+        assert self.get(client, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
+
+    def test_full_page_is_not_replayed_across_logins(self, client):
+        client.force_login(self.user)
+        response = client.get('/plan/', {'view_role': 'executor'})
+        etag = response['ETag']
+        assert client.get('/plan/', {'view_role': 'executor'}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        # A new session (and CSRF token): the cached page holds the old token
+        client.logout()
+        client.force_login(self.user)
+        response = client.get('/plan/', {'view_role': 'executor'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag
+
+        client.cookies['csrftoken'] = 'x' * 32
+        assert client.get('/plan/', {'view_role': 'executor'}, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
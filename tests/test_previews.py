@@ -0,0 +1,93 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from coredata.models import Committee, EvidenceDocument, OperationalPlanItems
+from coredata.previews import (
+    PREVIEW_MAX_POLLS,
+    PREVIEW_PENDING,
+    PREVIEW_READY,
+    PREVIEW_SIZE,
+    PREVIEW_UNAVAILABLE,
+)
+
+
+def png(size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color='navy').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def pdf(size=(1240, 1754), pages=2):
+    buffer = io.BytesIO()
+    first, *rest = [Image.new('RGB', size, color=color) for color in ('darkred', 'white')[:pages]]
+    first.save(buffer, format='PDF', save_all=True, append_images=rest)
+    return buffer.getvalue()
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestEvidencePreviews:
+    def setup_method(self):
+        self.user = User.objects.create_user(username="reviewer")
+
+    def upload(self, content, name, callbacks):
+        with callbacks(execute=True):
+            doc = EvidenceDocument.objects.create(user=self.user, title="دليل", file=ContentFile(content, name=name))
+        doc.refresh_from_db()
+        return doc
+
+    def test_image_thumbnail_is_generated_after_commit(self, django_capture_on_commit_callbacks, settings):
+        settings.CELERY_BROKER_URL = ''  # Inline fallback
+        doc = self.upload(png(), "scan.png", django_capture_on_commit_callbacks)
+        assert doc.preview_status == PREVIEW_READY
+        assert doc.preview.name.endswith('.preview.jpg')
+        with Image.open(doc.preview) as preview:
+            assert preview.format == 'JPEG'
+            assert max(preview.size) <= max(PREVIEW_SIZE)
+
+        # A deduplicated copy reuses the stored preview
+        copy = self.upload(png(), "copy.png", django_capture_on_commit_callbacks)
+        assert copy.preview.name == doc.preview.name
+
+    def test_pdf_first_page_is_rendered(self, django_capture_on_commit_callbacks, settings):
+        settings.CELERY_BROKER_URL = ''
+        doc = self.upload(pdf(), "report.pdf", django_capture_on_commit_callbacks)
+        assert doc.preview_status == PREVIEW_READY
+        with Image.open(doc.preview) as preview:
+            assert preview.format == 'JPEG'
+            # Portrait A4 page scaled into the preview box
+            assert preview.height == max(PREVIEW_SIZE) and preview.width < preview.height
+            red, green, blue = preview.convert('RGB').getpixel((preview.width // 2, preview.height // 2))
+            assert red > 100 and green < 50 and blue < 50  # The first (dark red) page, not the second
+
+    def test_unsupported_types_are_marked_unavailable(self, django_capture_on_commit_callbacks):
+        doc = self.upload(b"plain text", "notes.txt", django_capture_on_commit_callbacks)
+        assert doc.preview_status == PREVIEW_UNAVAILABLE
+
+    def test_preview_fragment_polls_until_ready(self, client):
+        doc = EvidenceDocument.objects.create(user=self.user, title="دليل", file=ContentFile(png(), name="a.png"))
+        assert doc.preview_status == PREVIEW_PENDING  # Not generated until the transaction commits
+        client.force_login(self.user)
+        body = client.get(f'/plan/evidence/{doc.pk}/preview/').content.decode()
+        assert 'hx-trigger="load delay:2s"' in body
+        assert f'/plan/evidence/{doc.pk}/preview/?poll=1' in body
+
+        # With no worker running the polling stops with a final fragment
+        body = client.get(f'/plan/evidence/{doc.pk}/preview/', {'poll': PREVIEW_MAX_POLLS}).content.decode()
+        assert 'hx-trigger' not in body
+        assert 'المعاينة غير متاحة حالياً' in body
+
+    def test_other_users_documents_are_not_served(self, client):
+        doc = EvidenceDocument.objects.create(user=self.user, title="دليل", file=ContentFile(png(), name="a.png"))
+        other = User.objects.create_user(username="other")
+        client.force_login(other)
+        assert client.get(f'/plan/evidence/{doc.pk}/preview/').status_code == 404
+
+        # Evaluators of an item the document is linked to may view it
+        committee = Committee.objects.create(name="لجنة التقييم", code="EV")
+        committee.members.add(other)
+        OperationalPlanItems.objects.create(procedure="إجراء", evaluator_committee=committee, evidence_document=doc)
+        assert client.get(f'/plan/evidence/{doc.pk}/preview/').status_code == 200
@@ -0,0 +1,44 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.models import OperationalPlanItems
+from coredata.projection import PlanRow, get_plan_row, plan_rows, project_plan_rows
+
+
+@pytest.mark.django_db
+class TestPlanRowProjection:
+    def setup_method(self):
+        cache.clear()
+        self.item = OperationalPlanItems.objects.create(
+            rank_name="المجال", procedure="أ" * 400, comments="ملاحظات طويلة " * 500,
+            evaluation_notes="قصيرة", status="Pending Review",
+        )
+
+    def test_only_table_columns_are_fetched(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = plan_rows(project_plan_rows(OperationalPlanItems.objects.order_by('id')))
+        sql = ctx.captured_queries[0]['sql']
+        assert '"comments"' not in sql and '"evidence_request_note"' not in sql
+
+        row = rows[0]
+        assert isinstance(row, PlanRow) and row.pk == self.item.pk
+        assert row.procedure == "أ" * 300 + "…"
+        assert row.evaluation_notes == "قصيرة"
+        assert row.get_status_display() == "بانتظار المراجعة"
+        assert row.evidence_url == ""
+
+    def test_rows_have_no_instance_dict(self):
+        row = get_plan_row(self.item.pk)
+        with pytest.raises(AttributeError):
+            row.comments = "x"
+
+    def test_list_view_renders_projected_rows(self, client, settings):
+        settings.ROOT_URLCONF = 'coredata.urls'
+        user = User.objects.create_superuser(username="admin", password="x")
+        client.force_login(user)
+        response = client.get('/plan/', {'per_page': 10}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='plan-table-container')
+        assert response.status_code == 200
+        assert all(isinstance(row, PlanRow) for row in response.context['page_obj'])
@@ -0,0 +1,56 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from coredata.models import Committee, OperationalPlanItems
+from coredata.roles import get_user_roles, roles_version
+
+
+@pytest.mark.django_db
+class TestRolesCache:
+    def setup_method(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="member")
+        self.comm = Committee.objects.create(name="لجنة الجودة", code="Q")
+        self.comm.members.add(self.user)
+        self.item = OperationalPlanItems.objects.create(code="R-1", executor_committee=self.comm)
+
+    def fresh_roles(self):
+        # A new user object per call, like a new request
+        return get_user_roles(User.objects.get(pk=self.user.pk))
+
+    def test_roles_are_served_from_cache(self):
+        roles = self.fresh_roles()
+        assert roles.committee_ids == {self.comm.id}
+        assert roles.is_executor_role and not roles.is_evaluator_role
+
+        user = User.objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            get_user_roles(user)
+            get_user_roles(user)
+        assert len(ctx.captured_queries) == 0
+
+    def test_membership_change_invalidates(self):
+        self.fresh_roles()
+        other = Committee.objects.create(name="لجنة التقييم", code="E")
+        OperationalPlanItems.objects.create(code="R-2", evaluator_committee=other)
+        other.members.add(self.user)
+        roles = self.fresh_roles()
+        assert roles.committee_ids == {self.comm.id, other.id}
+        assert roles.is_evaluator_role
+
+    def test_only_committee_changes_on_items_invalidate(self):
+        self.fresh_roles()
+        version = roles_version()
+
+        item = OperationalPlanItems.objects.get(pk=self.item.pk)
+        item.comments = "تحديث"
+        item.save()
+        assert roles_version() == version
+
+        item.executor_committee = None
+        item.save()
+        assert roles_version() != version
+        assert not self.fresh_roles().is_executor_role
@@ -0,0 +1,103 @@
+import pytest
+from django.contrib import admin
+from django.core.cache import cache
+from django.urls import path
+
+from coredata.models import Committee, OperationalPlanItems, PlanRollup
+from coredata.rollups import (
+    ROLLUP_FIELDS,
+    apply_rollup_changes,
+    rebuild_rollups,
+    rollup_counts,
+    rollup_key,
+    rollup_total,
+)
+from coredata.views.plan_views import get_chart_data
+
+urlpatterns = [path('admin/', admin.site.urls)]
+
+def snapshot():
+    return sorted((
+        (tuple(r[f] for f in ('executor_committee_id', 'status', 'follow_up', 'evaluation')), r['count'])
+        for r in PlanRollup.objects.filter(count__gt=0).values()
+    ), key=repr)
+
+@pytest.mark.django_db
+class TestPlanRollups:
+    def setup_method(self):
+        cache.clear()
+        self.comm = Committee.objects.create(name="لجنة التنفيذ", code="EX")
+        self.items = [
+            OperationalPlanItems.objects.create(executor_committee=self.comm, follow_up="تم الإنجاز", status="Completed"),
+            OperationalPlanItems.objects.create(executor_committee=self.comm, follow_up="قيد الإنجاز"),
+            OperationalPlanItems.objects.create(follow_up="قيد الإنجاز"),
+        ]
+
+    def assert_matches_rebuild(self):
+        incremental = snapshot()
+        rebuild_rollups(OperationalPlanItems, PlanRollup)
+        assert incremental == snapshot()
+
+    def test_counts_follow_saves_and_deletes(self):
+        assert rollup_total() == 3
+        assert rollup_counts('follow_up') == [("قيد الإنجاز", 2), ("تم الإنجاز", 1)]
+
+        item = self.items[1]
+        item.follow_up = "تم الإنجاز"
+        item.evaluation = "مطابق"
+        item.save()
+        self.items[2].delete()
+        assert rollup_total(executor_committee_id=self.comm.id, follow_up="تم الإنجاز") == 2
+        self.assert_matches_rebuild()
+
+    def test_deferred_instances_are_counted_once(self):
+        item = OperationalPlanItems.objects.only('id', 'status').get(pk=self.items[1].pk)
+        item.status = "Completed"
+        item.save(update_fields=['status'])
+        assert rollup_total(status="Completed") == 2
+        self.assert_matches_rebuild()
+
+    def test_chart_data_reads_rollups(self):
+        data = get_chart_data('follow_up', executor_committee_id=self.comm.id)
+        assert data['labels'] == ["تم الإنجاز", "قيد الإنجاز"]
+        assert data['datasets'][0]['data'] == [1, 1]
+
+    def test_twin_rows_never_go_negative(self):
+        key = rollup_key(self.items[1])
+        moved = [OperationalPlanItems.objects.create(executor_committee=self.comm, follow_up="قيد الإنجاز") for _ in range(2)]
+        # A concurrent insert left the bucket of 3 items split over two rows
+        row = PlanRollup.objects.get(executor_committee_id=self.comm.id, follow_up="قيد الإنجاز")
+        row.count = 1
+        row.save()
+        PlanRollup.objects.create(count=2, **dict(zip(ROLLUP_FIELDS, key)))
+
+        # Two rows move in the same save
+        OperationalPlanItems.objects.filter(pk__in=[it.pk for it in moved]).update(follow_up="تم الإنجاز")
+        apply_rollup_changes([(key, rollup_key(it)) for it in OperationalPlanItems.objects.filter(pk__in=[it.pk for it in moved])])
+        assert not PlanRollup.objects.filter(count__lt=0).exists()
+        self.assert_matches_rebuild()
+
+    def test_drifted_bucket_is_recounted(self):
+        key = rollup_key(self.items[2])
+        apply_rollup_changes([(key, None), (key, None)])  # More removals than the bucket holds
+        assert not PlanRollup.objects.filter(count__lt=0).exists()
+        assert rollup_total(executor_committee_id=None) == 1
+
+@pytest.mark.django_db
+@pytest.mark.urls(__name__)
+class TestAdminStatCards:
+    def setup_method(self):
+        cache.clear()
+        comm = Committee.objects.create(name="لجنة التنفيذ", code="EX")
+        OperationalPlanItems.objects.create(executor_committee=comm, status="Completed", follow_up="لم يتم الإنجاز", code="A-1")
+        OperationalPlanItems.objects.create(status="Pending Review", code="B-1")
+
+    def stats(self, admin_client, **params):
+        response = admin_client.get('/admin/coredata/operationalplanitems/', params)
+        return response.context['plan_stats']
+
+    def test_cards_follow_the_changelist_filters(self, admin_client):
+        assert self.stats(admin_client)['total'] == 2
+        stats = self.stats(admin_client, status__exact="Completed")
+        assert (stats['total'], stats['completed'], stats['late'], stats['pending_review']) == (1, 1, 1, 0)
+        assert self.stats(admin_client, q="B-1")['total'] == 1
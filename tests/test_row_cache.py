@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from coredata.fragments import render_rows, reset_row_cache_stats, row_cache_stats
+from coredata.models import Committee, OperationalPlanItems
+from coredata.projection import get_plan_row
+from coredata.roles import set_row_permissions
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestRowFragmentCache:
+    def setup_method(self):
+        cache.clear()
+        reset_row_cache_stats()
+        self.user = User.objects.create_user(username="evaluator")
+        self.comm = Committee.objects.create(name="لجنة التقييم", code="EV")
+        self.comm.members.add(self.user)
+        self.item = OperationalPlanItems.objects.create(procedure="إجراء", evaluator_committee=self.comm)
+        self.request = RequestFactory().get('/plan/')
+        self.request.user = self.user
+
+    def render(self, view_role='evaluator', q=''):
+        row = set_row_permissions([get_plan_row(self.item.pk)], self.user)[0]
+        return render_rows(self.request, [row], view_role, q)[0]
+
+    def test_unchanged_rows_are_served_from_cache(self):
+        first = self.render()
+        assert self.render() == first
+        assert row_cache_stats()['hits'] == 1 and row_cache_stats()['misses'] == 1
+
+    def test_key_follows_item_role_and_search(self):
+        self.render()
+        self.render(view_role='executor')
+        self.render(q="إجراء")
+        assert row_cache_stats()['misses'] == 3
+
+        self.item.evidence_requested = True
+        self.item.save()
+        assert 'تم الطلب' in self.render()
+        assert row_cache_stats()['hits'] == 0
+
+    def test_list_view_reuses_cached_rows(self, client):
+        client.force_login(self.user)
+        params = {'view_role': 'evaluator'}
+        headers = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'plan-table-container'}
+        client.get('/plan/', params, **headers)
+        response = client.get('/plan/', params, **headers)
+        assert f'id="row-{self.item.pk}"' in response.content.decode()
+        assert row_cache_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
@@ -0,0 +1,45 @@
+import pytest
+
+from coredata.models import OperationalPlanItems
+from coredata.search import order_by_relevance, search_plan_items
+from coredata.templatetags.plan_extras import highlight
+
+
+@pytest.mark.django_db
+class TestPlanSearch:
+    def setup_method(self):
+        self.english = OperationalPlanItems.objects.create(
+            rank_name="التعليم والتعلم", procedure="تنفيذ مسابقة اللغة الإنجليزية", executor="قسم اللغة الإنجليزية"
+        )
+        self.math = OperationalPlanItems.objects.create(
+            rank_name="التعليم والتعلم", procedure="ورشة الرياضيات", executor="قسم الرياضيات"
+        )
+
+    def search(self, q):
+        return list(search_plan_items(OperationalPlanItems.objects.all(), q))
+
+    def test_normalized_and_prefix_match(self):
+        assert self.search("الانجليزيه") == [self.english]
+        assert self.search("مسابق") == [self.english]
+        assert self.search("ورشه الرياضيات") == [self.math]
+        assert self.search("كيمياء") == []
+
+    def test_index_follows_updates_and_deletes(self):
+        self.math.procedure = "مسابقة الرياضيات"
+        self.math.save(update_fields=["procedure"])
+        assert set(self.search("مسابقة")) == {self.english, self.math}
+
+        self.english.delete()
+        assert self.search("مسابقة") == [self.math]
+
+    def test_relevance_ordering(self):
+        qs = order_by_relevance(search_plan_items(OperationalPlanItems.objects.all(), "الرياضيات"), "الرياضيات")
+        assert list(qs) == [self.math]
+        OperationalPlanItems.objects.create(procedure="الرياضيات الرياضيات الرياضيات", executor="قسم الرياضيات")
+        best = order_by_relevance(search_plan_items(OperationalPlanItems.objects.all(), "الرياضيات"), "الرياضيات").first()
+        assert best.procedure == "الرياضيات الرياضيات الرياضيات"
+
+    def test_highlight_is_normalization_aware(self):
+        assert highlight("مسابقة الإنجليزية", "الانجليزيه") == 'مسابقة <mark class="search-hit">الإنجليزية</mark>'
+        assert highlight("<b>الإنجليزية</b>", "") == "&lt;b&gt;الإنجليزية&lt;/b&gt;"
+        assert highlight(None, "x") == ""
@@ -0,0 +1,68 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+
+from coredata.models import OperationalPlanItems
+from coredata.views.plan_views import STREAM_ROWS_MARKER
+
+HTMX = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'plan-table-container'}
+
+
+def stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestPlanTableStreaming:
+    def setup_method(self):
+        cache.clear()
+
+    def get_all(self, client, **extra):
+        client.force_login(User.objects.create_superuser(username="admin"))
+        return client.get('/plan/', {'per_page': 'all', 'sort_by': 'code'}, **extra)
+
+    def test_per_page_all_streams(self, client):
+        OperationalPlanItems.objects.create(rank_name="المجال", code="S-1")
+        response = self.get_all(client, **HTMX)
+        assert isinstance(response, StreamingHttpResponse)
+        assert response.status_code == 200
+
+    def test_rows_cross_chunk_boundaries(self, client, settings):
+        settings.PLAN_STREAM_CHUNK_SIZE = 2
+        for i in range(5):
+            OperationalPlanItems.objects.create(rank_name="المجال", code=f"S-{i}", procedure=f"إجراء البث {i}")
+        response = self.get_all(client, **HTMX)
+        chunks = list(response.streaming_content)
+        # head, three row chunks (2 + 2 + 1), tail, count script
+        assert len(chunks) == 6
+        body = b''.join(chunks).decode()
+        positions = [body.index(f"إجراء البث {i}") for i in range(5)]
+        assert positions == sorted(positions)
+
+    def test_empty_queryset(self, client):
+        body = stream(self.get_all(client, **HTMX))
+        assert body.index('<tbody>') < body.index("لا توجد نتائج تطابق بحثك") < body.index('</tbody>')
+        assert 'el.textContent = "0"' in body
+
+    def test_rows_replace_the_marker(self, client):
+        OperationalPlanItems.objects.create(rank_name="المجال", code="S-1", procedure="إجراء وحيد")
+        body = stream(self.get_all(client, **HTMX))
+        assert STREAM_ROWS_MARKER not in body
+        # The rows land inside the table body, between the rendered head and tail
+        assert body.index('<tbody>') < body.index("إجراء وحيد") < body.index('</tbody>')
+        assert body.count('</tbody>') == 1
+
+    def test_full_page_streams_too(self, client):
+        OperationalPlanItems.objects.create(rank_name="المجال", code="S-1", procedure="إجراء الصفحة")
+        body = stream(self.get_all(client))
+        assert STREAM_ROWS_MARKER not in body
+        assert body.index("إجراء الصفحة") < body.index('</html>')
+
+    def test_count_script_is_last(self, client):
+        for i in range(3):
+            OperationalPlanItems.objects.create(rank_name="المجال", code=f"S-{i}")
+        body = stream(self.get_all(client, **HTMX))
+        script = 'document.querySelectorAll(".plan-row-count").forEach(function(el){ el.textContent = "3"; });'
+        assert body.rstrip().endswith(f'<script>{script}</script>')
@@ -0,0 +1,48 @@
+import hashlib
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from coredata.models import EvidenceDocument, OperationalPlanItems
+
+
+@pytest.mark.django_db
+class TestUploadDedup:
+    def setup_method(self):
+        self.user = User.objects.create_user(username="uploader")
+        self.content = b"%PDF-1.4 evidence" * 1000
+
+    def make(self, content, name="evidence.pdf"):
+        return EvidenceDocument.objects.create(user=self.user, title="دليل", file=ContentFile(content, name=name))
+
+    def test_size_and_hash_are_captured(self):
+        doc = self.make(self.content)
+        assert doc.file_size == len(self.content)
+        assert doc.file_hash == hashlib.sha256(self.content).hexdigest()
+        assert doc.original_filename == "evidence.pdf"
+
+    def test_identical_content_reuses_the_stored_blob(self):
+        first = self.make(self.content)
+        second = self.make(self.content, name="copy.pdf")
+        third = self.make(self.content + b"!")
+        assert second.file.name == first.file.name
+        assert second.original_filename == "copy.pdf"
+        assert third.file.name != first.file.name
+        second.refresh_from_db()
+        assert second.file.read() == self.content
+
+    @pytest.mark.urls('coredata.urls')
+    def test_upload_view_fills_metadata(self, client):
+        existing = self.make(self.content)
+        item = OperationalPlanItems.objects.create(procedure="إجراء", status="In Progress")
+        client.force_login(self.user)
+        response = client.post(f'/plan/item/{item.pk}/evidence/save/', {
+            'title': "دليل مرفوع", 'file': SimpleUploadedFile("report.pdf", self.content),
+        })
+        assert response.status_code == 200
+        item.refresh_from_db()
+        doc = item.evidence_document
+        assert (doc.file_size, doc.file_hash, doc.original_filename) == (len(self.content), existing.file_hash, "report.pdf")
+        assert doc.file.name == existing.file.name
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from coredata.forms import PlanItemExecutionForm
+from coredata.models import EvidenceDocument, OperationalPlanItems, Staff
+from coredata.vault import AUTOCOMPLETE_PAGE_SIZE
+
+
+def make_doc(user, title, name="e.pdf", **kwargs):
+    return EvidenceDocument.objects.create(user=user, title=title, file=ContentFile(title.encode(), name=name), **kwargs)
+
+@pytest.mark.django_db
+@pytest.mark.urls('coredata.urls')
+class TestVaultAutocomplete:
+    def setup_method(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner")
+        self.other = User.objects.create_user(username="other")
+        self.admin = User.objects.create_superuser(username="admin")
+        self.attendance = make_doc(self.owner, "سجل الحضور", tags="حضور, غياب")
+        self.plan = make_doc(self.owner, "خطة علاجية", name="remedial.pdf")
+        self.foreign = make_doc(self.other, "سجل الحضور للمعلمين")
+
+    def get(self, client, user, **params):
+        client.force_login(user)
+        return client.get('/plan/evidence/autocomplete/', params).content.decode()
+
+    def test_matches_title_tags_and_file_name_within_scope(self, client):
+        body = self.get(client, self.owner, q="سجل")
+        assert "سجل الحضور" in body and "للمعلمين" not in body
+        assert f'value="{self.plan.pk}"' in self.get(client, self.owner, q="خطه")  # Normalized spelling
+        assert f'value="{self.plan.pk}"' in self.get(client, self.owner, q="remedial")
+        assert f'value="{self.attendance.pk}"' in self.get(client, self.owner, q="غياب")
+        assert "للمعلمين" in self.get(client, self.admin, q="سجل")
+
+    def test_matches_owner_staff_name(self, client):
+        Staff.objects.create(user=self.owner, name="خالد")
+        body = self.get(client, self.admin, q="خالد")
+        assert f'value="{self.plan.pk}"' in body and f'value="{self.foreign.pk}"' not in body
+
+    def test_pages_are_bounded(self, client):
+        for i in range(AUTOCOMPLETE_PAGE_SIZE + 5):
+            make_doc(self.owner, f"تقرير {i}")
+        body = self.get(client, self.owner, q="تقرير")
+        assert len(re.findall(r'value="\d+"', body)) == AUTOCOMPLETE_PAGE_SIZE
+        assert "disabled" in body
+        assert len(re.findall(r'value="\d+"', self.get(client, self.owner, q="تقرير", page=2))) == 5
+
+    def test_form_renders_only_the_selected_document(self):
+        item = OperationalPlanItems.objects.create(procedure="إجراء", evidence_document=self.plan)
+        html = str(PlanItemExecutionForm(instance=item, user=self.admin)['evidence_document'])
+        assert f'value="{self.plan.pk}" selected' in html
+        assert f'value="{self.attendance.pk}"' not in html
+
+        data = {'status': 'In Progress', 'evidence_document': str(self.foreign.pk)}
+        assert not PlanItemExecutionForm(data, instance=item, user=self.owner).is_valid()
+        assert PlanItemExecutionForm(data, instance=item, user=self.admin).is_valid()
+
+    def test_tampered_selection_rerenders(self):
+        item = OperationalPlanItems.objects.create(procedure="إجراء")
+        form = PlanItemExecutionForm({'status': 'In Progress', 'evidence_document': "1 OR 1=1"}, instance=item, user=self.owner)
+        assert not form.is_valid()
+        html = str(form['evidence_document'])
+        assert not re.search(r'value="\d+"', html)